@@ -0,0 +1,83 @@
+import sys
+import time
+sys.path.append('../')
+
+import argparse
+import numpy as np
+import pandas as pd
+
+from volta.particle_tools import ParticleIdentifier
+
+argparser = argparse.ArgumentParser()
+argparser.add_argument('--data', type=str, default=None,
+                       help='CSV of raman peaks (time_idx, X, Y, A1g_Amp, A1g_Center, ...); synthetic data if omitted')
+argparser.add_argument('--n_times', type=int, default=114)
+argparser.add_argument('--seed', type=int, default=42)
+args = argparser.parse_args()
+
+
+def legacy_heatmap(identifier, time_idx, column='A1g_Amp'):
+    data = identifier.df[identifier.df['time_idx'] == time_idx]
+    heatmap = np.zeros((identifier.grid_size, identifier.grid_size))
+    for _, row in data.iterrows():
+        heatmap[int(row['Y']), int(row['X'])] = row[column]
+    return heatmap
+
+
+def legacy_timeseries(identifier, particle_pixels, column='A1g_Center'):
+    results = []
+    time_indices = identifier.df['time_idx'].unique()
+    for time_idx in sorted(time_indices):
+        time_data = identifier.df[identifier.df['time_idx'] == time_idx]
+        for pid, pixels in particle_pixels.items():
+            values = []
+            for x, y in pixels:
+                pixel_data = time_data[(time_data['X'] == x) & (time_data['Y'] == y)]
+                if len(pixel_data) > 0:
+                    values.append(pixel_data[column].values[0])
+            if values:
+                results.append({
+                    'time_idx': time_idx,
+                    'particle_id': pid,
+                    'mean_value': np.mean(values),
+                    'std_value': np.std(values),
+                    'n_pixels': len(values)
+                })
+    return pd.DataFrame(results)
+
+
+def synthetic_raman_peaks(n_times, seed):
+    rng = np.random.RandomState(seed)
+    t, y, x = np.meshgrid(np.arange(n_times), np.arange(30), np.arange(30), indexing='ij')
+    df = pd.DataFrame({'time_idx': t.ravel(), 'X': x.ravel(), 'Y': y.ravel()})
+    df['A1g_Amp'] = rng.gamma(2.0, 1.0, len(df))
+    df['A1g_Center'] = 590 + rng.normal(0, 2, len(df))
+    # drop a few pixels so the missing-pixel path is exercised too
+    return df.drop(rng.choice(len(df), len(df) // 200, replace=False)).reset_index(drop=True)
+
+
+df = pd.read_csv(args.data) if args.data else synthetic_raman_peaks(args.n_times, args.seed)
+identifier = ParticleIdentifier(df)
+particles = identifier.identify_particles(time_idx=0)['particle_pixels']
+times = sorted(df['time_idx'].unique())
+print(f"{len(df)} rows, {len(times)} time steps, {len(particles)} particles")
+
+start = time.perf_counter()
+legacy_maps = [legacy_heatmap(identifier, t) for t in times]
+legacy_heatmap_time = time.perf_counter() - start
+start = time.perf_counter()
+maps = [identifier.get_heatmap(t) for t in times]
+heatmap_time = time.perf_counter() - start
+assert all(np.array_equal(a, b) for a, b in zip(legacy_maps, maps))
+print(f"get_heatmap (all frames): legacy {legacy_heatmap_time:.3f}s, vectorized {heatmap_time:.3f}s "
+      f"({legacy_heatmap_time / heatmap_time:.0f}x)")
+
+start = time.perf_counter()
+legacy_ts = legacy_timeseries(identifier, particles)
+legacy_ts_time = time.perf_counter() - start
+start = time.perf_counter()
+ts = identifier.get_particle_timeseries(particles)
+ts_time = time.perf_counter() - start
+pd.testing.assert_frame_equal(legacy_ts, ts, check_exact=True)
+print(f"get_particle_timeseries: legacy {legacy_ts_time:.3f}s, vectorized {ts_time:.3f}s "
+      f"({legacy_ts_time / ts_time:.0f}x)")
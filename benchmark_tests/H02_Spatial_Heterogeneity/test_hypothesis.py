@@ -13,6 +13,7 @@ from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 import pandas as pd
+from volta.loaders import BatteryDataLoader as SharedBatteryDataLoader
 
 HYPOTHESIS_ID = "H02"
 HYPOTHESIS_NAME = "Spatial_Heterogeneity"
@@ -24,19 +25,9 @@ To test: Calculate spatial variance/std of A1g_Center at each time step and corr
 """
 
 
-class BatteryDataLoader:
-    def __init__(self, data_folder: str):
-        self.data_path = data_folder
-        self.table_dict = {}
-        self._load_battery_data()
-        self.data_desc = "Battery Raman data with 900 pixels, 114 time steps, voltage 3.05-4.68V"
-
-    def _load_battery_data(self):
-        self.table_dict["df_raman_peaks"] = pd.read_csv(
-            os.path.join(self.data_path, "raman_peaks_decomposed.csv"))
-        voltage_path = os.path.join(self.data_path, "voltage_profile_detailed.csv")
-        if os.path.exists(voltage_path):
-            self.table_dict["df_voltage_profile"] = pd.read_csv(voltage_path)
+class BatteryDataLoader(SharedBatteryDataLoader):
+    def _generate_data_description(self) -> str:
+        return "Battery Raman data with 900 pixels, 114 time steps, voltage 3.05-4.68V"
 
 
 def run_hypothesis_test():
@@ -14,6 +14,7 @@ from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 import pandas as pd
+from volta.loaders import BatteryDataLoader as SharedBatteryDataLoader
 
 HYPOTHESIS_ID = "H03"
 HYPOTHESIS_NAME = "ID_IG_High_Voltage"
@@ -29,19 +30,9 @@ To test: Compare mean ID_IG_Ratio at voltage bins <4.3V vs >4.3V using statistic
 """
 
 
-class BatteryDataLoader:
-    def __init__(self, data_folder: str):
-        self.data_path = data_folder
-        self.table_dict = {}
-        self._load_battery_data()
-        self.data_desc = "Battery Raman data: ID_IG_Ratio column available for all pixels/times"
-
-    def _load_battery_data(self):
-        self.table_dict["df_raman_peaks"] = pd.read_csv(
-            os.path.join(self.data_path, "raman_peaks_decomposed.csv"))
-        voltage_path = os.path.join(self.data_path, "voltage_profile_detailed.csv")
-        if os.path.exists(voltage_path):
-            self.table_dict["df_voltage_profile"] = pd.read_csv(voltage_path)
+class BatteryDataLoader(SharedBatteryDataLoader):
+    def _generate_data_description(self) -> str:
+        return "Battery Raman data: ID_IG_Ratio column available for all pixels/times"
 
 
 def run_hypothesis_test():
@@ -14,6 +14,7 @@ from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 import pandas as pd
+from volta.loaders import BatteryDataLoader as SharedBatteryDataLoader
 
 HYPOTHESIS_ID = "H04"
 HYPOTHESIS_NAME = "Eg_Amplitude_Increase"
@@ -28,19 +29,9 @@ To test: Track Eg_Amp evolution vs voltage and compute correlation.
 """
 
 
-class BatteryDataLoader:
-    def __init__(self, data_folder: str):
-        self.data_path = data_folder
-        self.table_dict = {}
-        self._load_battery_data()
-        self.data_desc = "Battery Raman data: Eg_Amp column available (~475 cm^-1 peak)"
-
-    def _load_battery_data(self):
-        self.table_dict["df_raman_peaks"] = pd.read_csv(
-            os.path.join(self.data_path, "raman_peaks_decomposed.csv"))
-        voltage_path = os.path.join(self.data_path, "voltage_profile_detailed.csv")
-        if os.path.exists(voltage_path):
-            self.table_dict["df_voltage_profile"] = pd.read_csv(voltage_path)
+class BatteryDataLoader(SharedBatteryDataLoader):
+    def _generate_data_description(self) -> str:
+        return "Battery Raman data: Eg_Amp column available (~475 cm^-1 peak)"
 
 
 def run_hypothesis_test():
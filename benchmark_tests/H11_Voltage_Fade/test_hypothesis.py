@@ -11,6 +11,7 @@ import os, sys, json, time
 from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 import pandas as pd
+from volta.loaders import BatteryDataLoader as SharedBatteryDataLoader
 
 HYPOTHESIS_ID = "H11"
 HYPOTHESIS_NAME = "Voltage_Fade"
@@ -21,18 +22,9 @@ structural transformation from layered to spinel phase.
 Note: This hypothesis requires multi-cycle data to test voltage fade over extended cycling.
 """
 
-class BatteryDataLoader:
-    def __init__(self, data_folder: str):
-        self.data_path = data_folder
-        self.table_dict = {}
-        self._load_battery_data()
-        self.data_desc = "Battery Raman: Single charge cycle only (3.05V-4.68V), no multi-cycle data"
-
-    def _load_battery_data(self):
-        self.table_dict["df_raman_peaks"] = pd.read_csv(os.path.join(self.data_path, "raman_peaks_decomposed.csv"))
-        voltage_path = os.path.join(self.data_path, "voltage_profile_detailed.csv")
-        if os.path.exists(voltage_path):
-            self.table_dict["df_voltage_profile"] = pd.read_csv(voltage_path)
+class BatteryDataLoader(SharedBatteryDataLoader):
+    def _generate_data_description(self) -> str:
+        return "Battery Raman: Single charge cycle only (3.05V-4.68V), no multi-cycle data"
 
 def run_hypothesis_test():
     api_key = os.environ.get("ANTHROPIC_API_KEY")
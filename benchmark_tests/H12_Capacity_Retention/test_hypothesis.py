@@ -11,6 +11,7 @@ import os, sys, json, time
 from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 import pandas as pd
+from volta.loaders import BatteryDataLoader as SharedBatteryDataLoader
 
 HYPOTHESIS_ID = "H12"
 HYPOTHESIS_NAME = "Capacity_Retention"
@@ -20,18 +21,9 @@ The battery exhibits capacity retention below 80% of initial capacity after 500
 Note: This hypothesis requires long-term cycling data with capacity measurements over 500 cycles.
 """
 
-class BatteryDataLoader:
-    def __init__(self, data_folder: str):
-        self.data_path = data_folder
-        self.table_dict = {}
-        self._load_battery_data()
-        self.data_desc = "Battery Raman: Single charge cycle, no capacity or long-term cycling data"
-
-    def _load_battery_data(self):
-        self.table_dict["df_raman_peaks"] = pd.read_csv(os.path.join(self.data_path, "raman_peaks_decomposed.csv"))
-        voltage_path = os.path.join(self.data_path, "voltage_profile_detailed.csv")
-        if os.path.exists(voltage_path):
-            self.table_dict["df_voltage_profile"] = pd.read_csv(voltage_path)
+class BatteryDataLoader(SharedBatteryDataLoader):
+    def _generate_data_description(self) -> str:
+        return "Battery Raman: Single charge cycle, no capacity or long-term cycling data"
 
 def run_hypothesis_test():
     api_key = os.environ.get("ANTHROPIC_API_KEY")
@@ -12,6 +12,7 @@ import os, sys, json, time
 from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 import pandas as pd
+from volta.loaders import BatteryDataLoader as SharedBatteryDataLoader
 
 HYPOTHESIS_ID = "H19"
 HYPOTHESIS_NAME = "Electrolyte_Decomposition"
@@ -24,18 +25,9 @@ decomposition products. The current dataset only contains fitted parameters for
 D-band, and G-band peaks.
 """
 
-class BatteryDataLoader:
-    def __init__(self, data_folder: str):
-        self.data_path = data_folder
-        self.table_dict = {}
-        self._load_battery_data()
-        self.data_desc = "Battery Raman: Only Eg, A1g, D, G peaks fitted. No raw spectra or electrolyte peaks"
-
-    def _load_battery_data(self):
-        self.table_dict["df_raman_peaks"] = pd.read_csv(os.path.join(self.data_path, "raman_peaks_decomposed.csv"))
-        voltage_path = os.path.join(self.data_path, "voltage_profile_detailed.csv")
-        if os.path.exists(voltage_path):
-            self.table_dict["df_voltage_profile"] = pd.read_csv(voltage_path)
+class BatteryDataLoader(SharedBatteryDataLoader):
+    def _generate_data_description(self) -> str:
+        return "Battery Raman: Only Eg, A1g, D, G peaks fitted. No raw spectra or electrolyte peaks"
 
 def run_hypothesis_test():
     api_key = os.environ.get("ANTHROPIC_API_KEY")
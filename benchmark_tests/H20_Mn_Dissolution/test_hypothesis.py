@@ -12,6 +12,7 @@ import os, sys, json, time
 from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 import pandas as pd
+from volta.loaders import BatteryDataLoader as SharedBatteryDataLoader
 
 HYPOTHESIS_ID = "H20"
 HYPOTHESIS_NAME = "Mn_Dissolution"
@@ -23,18 +24,9 @@ Note: This hypothesis requires Mn concentration or dissolution measurements (e.g
 The current dataset contains only Raman spectroscopy data without Mn quantification.
 """
 
-class BatteryDataLoader:
-    def __init__(self, data_folder: str):
-        self.data_path = data_folder
-        self.table_dict = {}
-        self._load_battery_data()
-        self.data_desc = "Battery Raman: No Mn dissolution/concentration data (would need ICP-MS)"
-
-    def _load_battery_data(self):
-        self.table_dict["df_raman_peaks"] = pd.read_csv(os.path.join(self.data_path, "raman_peaks_decomposed.csv"))
-        voltage_path = os.path.join(self.data_path, "voltage_profile_detailed.csv")
-        if os.path.exists(voltage_path):
-            self.table_dict["df_voltage_profile"] = pd.read_csv(voltage_path)
+class BatteryDataLoader(SharedBatteryDataLoader):
+    def _generate_data_description(self) -> str:
+        return "Battery Raman: No Mn dissolution/concentration data (would need ICP-MS)"
 
 def run_hypothesis_test():
     api_key = os.environ.get("ANTHROPIC_API_KEY")
@@ -2,7 +2,7 @@
 Run All 10 Hypothesis Tests in Parallel
 
 This script runs all hypothesis tests concurrently and generates a combined summary.
-Usage: python run_all_parallel.py
+Usage: python run_all_parallel.py [--max-workers N] [--rate-limits SPEC]
 
 Requires ANTHROPIC_API_KEY to be set in environment:
     export ANTHROPIC_API_KEY='your-key-here'
@@ -12,11 +12,16 @@ import os
 import sys
 import json
 import time
+import argparse
 import subprocess
 from datetime import datetime
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from volta.rate_limit import export_rate_limits
+
 # Test directories
 TEST_DIRS = [
     "H01_A1g_Voltage_Correlation",
@@ -140,6 +145,15 @@ def generate_summary(results: list, total_time: float, output_dir: str):
 
 def main():
     """Run all tests in parallel."""
+    parser = argparse.ArgumentParser(description="Run all hypothesis tests in parallel")
+    parser.add_argument("--max-workers", type=int, default=None,
+                        help="Maximum number of parallel tests (default: all of them)")
+    parser.add_argument("--rate-limits", type=str, default=None,
+                        help="Requests/tokens per minute per model shared by all tests, e.g. "
+                             "'requests_per_minute=50,output_tokens_per_minute=8000' (default: no limit)")
+    parser.add_argument("--rate-limit-db", type=str, default=None,
+                        help="SQLite file holding the shared rate-limit buckets (default: in the temp directory)")
+    args = parser.parse_args()
 
     # Check API key
     if not os.environ.get("ANTHROPIC_API_KEY"):
@@ -148,19 +162,23 @@ def main():
         print("  export ANTHROPIC_API_KEY='your-key-here'")
         sys.exit(1)
 
+    # The test subprocesses share these limits through the environment
+    rate_limits = export_rate_limits(args.rate_limits, args.rate_limit_db)
+
     print("=" * 70)
     print("VOLTA Parallel Hypothesis Benchmark")
     print("=" * 70)
     print(f"Running {len(TEST_DIRS)} hypothesis tests in parallel...")
     print(f"Model: claude-sonnet-4-20250514")
+    if rate_limits:
+        print(f"Rate limits: {rate_limits}")
     print("=" * 70)
 
     script_dir = os.path.dirname(os.path.abspath(__file__))
     start_time = time.time()
     results = []
 
-    # Run tests in parallel (max 5 workers to avoid API rate limits)
-    max_workers = min(5, len(TEST_DIRS))
+    max_workers = min(args.max_workers or len(TEST_DIRS), len(TEST_DIRS))
     print(f"\nUsing {max_workers} parallel workers\n")
 
     with ProcessPoolExecutor(max_workers=max_workers) as executor:
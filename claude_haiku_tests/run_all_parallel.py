@@ -4,7 +4,7 @@ Run All 20 Hypotheses Benchmark with Claude Haiku via LangChain
 Tests all 20 hypotheses from the VOLTA benchmark using Claude 3.5 Haiku.
 Note: H11-H20 are designed to be non-verifiable with the available data.
 
-Usage: python run_all_parallel.py [--max-workers N]
+Usage: python run_all_parallel.py [--max-workers N] [--rate-limits SPEC]
 """
 
 import os
@@ -18,6 +18,8 @@ from concurrent.futures import ProcessPoolExecutor, as_completed
 # Add VOLTA to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from volta.rate_limit import export_rate_limits
+
 HYPOTHESES = [f"H{i:02d}" for i in range(1, 21)]
 
 
@@ -72,8 +74,12 @@ def run_single_test(hypothesis_id: str) -> dict:
         }
 
 
-def run_all_tests(max_workers: int = 5):
-    """Run all hypothesis tests in parallel."""
+def run_all_tests(max_workers: int = None, rate_limits: str = None, rate_limit_db: str = None):
+    """Run all hypothesis tests in parallel.
+
+    max_workers defaults to all hypotheses at once; rate_limits (VOLTA_RATE_LIMITS format)
+    and rate_limit_db are passed to the test subprocesses, which then share one budget.
+    """
 
     # Check for API key
     api_key = os.environ.get("ANTHROPIC_API_KEY")
@@ -82,6 +88,9 @@ def run_all_tests(max_workers: int = 5):
         print("Set it with: export ANTHROPIC_API_KEY='your-key'")
         return
 
+    max_workers = max_workers or len(HYPOTHESES)
+    limits = export_rate_limits(rate_limits, rate_limit_db)
+
     print("=" * 70)
     print("VOLTA Hypothesis Benchmark - Claude 3.5 Haiku via LangChain")
     print("=" * 70)
@@ -90,6 +99,8 @@ def run_all_tests(max_workers: int = 5):
     print(f"  - Verifiable (H01-H10): 10")
     print(f"  - Non-verifiable (H11-H20): 10")
     print(f"Max parallel workers: {max_workers}")
+    if limits:
+        print(f"Rate limits: {limits}")
     print("=" * 70)
 
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -204,10 +215,24 @@ if __name__ == "__main__":
     parser.add_argument(
         "--max-workers",
         type=int,
-        default=5,
-        help="Maximum parallel workers (default: 5)"
+        default=None,
+        help="Maximum parallel workers (default: all hypotheses)"
+    )
+    parser.add_argument(
+        "--rate-limits",
+        type=str,
+        default=None,
+        help="Requests/tokens per minute per model shared by all tests, e.g. "
+             "'requests_per_minute=50,output_tokens_per_minute=8000' (default: no limit)"
+    )
+    parser.add_argument(
+        "--rate-limit-db",
+        type=str,
+        default=None,
+        help="SQLite file holding the shared rate-limit buckets (default: in the temp directory)"
     )
 
     args = parser.parse_args()
 
-    run_all_tests(max_workers=args.max_workers)
+    run_all_tests(max_workers=args.max_workers, rate_limits=args.rate_limits,
+                  rate_limit_db=args.rate_limit_db)
@@ -17,6 +17,7 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import pandas as pd
+from volta.loaders import BatteryDataLoader as SharedBatteryDataLoader
 
 HYPOTHESIS_ID = "H03"
 HYPOTHESIS_NAME = "ID_IG_High_Voltage"
@@ -29,22 +30,9 @@ Expected Result: Significant decrease (~10%) in ID/IG at V > 4.3V compared to lo
 """
 
 
-class BatteryDataLoader:
+class BatteryDataLoader(SharedBatteryDataLoader):
     """Custom data loader for battery experiment data."""
 
-    def __init__(self, data_folder: str):
-        self.data_path = data_folder
-        self.table_dict = {}
-        self._load_battery_data()
-        self.data_desc = self._generate_data_description()
-
-    def _load_battery_data(self):
-        raman_path = os.path.join(self.data_path, "raman_peaks_decomposed.csv")
-        self.table_dict["df_raman_peaks"] = pd.read_csv(raman_path)
-        voltage_path = os.path.join(self.data_path, "voltage_profile_detailed.csv")
-        if os.path.exists(voltage_path):
-            self.table_dict["df_voltage_profile"] = pd.read_csv(voltage_path)
-
     def _generate_data_description(self) -> str:
         return """
 Battery Operando Raman Spectroscopy Data:
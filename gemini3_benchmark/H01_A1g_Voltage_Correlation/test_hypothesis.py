@@ -11,26 +11,13 @@ from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 import pandas as pd
+from volta.loaders import BatteryDataLoader as SharedBatteryDataLoader
 
 HYPOTHESIS = """The A1g peak center position (cm⁻¹) decreases (redshifts) with increasing voltage during charging,
 reflecting delithiation-induced M-O bond weakening in Li-rich layered oxides due to oxygen redox participation
 and structural distortion. Expected: Strong negative correlation (r ≈ -0.88), with A1g peak shifting ~22 cm⁻¹ lower during charging."""
 
-class BatteryDataLoader:
-    def __init__(self, data_folder: str):
-        self.data_path = data_folder
-        self.table_dict = {}
-        self._load_battery_data()
-        self.data_desc = self._generate_data_description()
-
-    def _load_battery_data(self):
-        raman_path = os.path.join(self.data_path, "raman_peaks_decomposed.csv")
-        if os.path.exists(raman_path):
-            self.table_dict["df_raman_peaks"] = pd.read_csv(raman_path)
-        voltage_path = os.path.join(self.data_path, "voltage_profile_detailed.csv")
-        if os.path.exists(voltage_path):
-            self.table_dict["df_voltage_profile"] = pd.read_csv(voltage_path)
-
+class BatteryDataLoader(SharedBatteryDataLoader):
     def _generate_data_description(self) -> str:
         desc = """
 === Battery Experiment Data Description ===
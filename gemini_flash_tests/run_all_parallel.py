@@ -4,7 +4,7 @@ Run all 20 VOLTA hypothesis tests in parallel using Gemini 3 Flash Preview.
 
 Usage:
     export GOOGLE_API_KEY='your-api-key'
-    python run_all_parallel.py [--max-workers N]
+    python run_all_parallel.py [--max-workers N] [--rate-limits SPEC]
 """
 
 import os
@@ -16,6 +16,11 @@ import importlib.util
 from datetime import datetime
 from concurrent.futures import ProcessPoolExecutor, as_completed
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from volta.llm_usage import format_usage, merge_usage
+from volta.rate_limit import export_rate_limits
+
 # List of all hypothesis IDs
 HYPOTHESIS_IDS = [f"H{i:02d}" for i in range(1, 21)]
 
@@ -50,10 +55,15 @@ def run_single_hypothesis(hypothesis_id: str) -> dict:
 
 def main():
     parser = argparse.ArgumentParser(description="Run all 20 VOLTA hypothesis tests in parallel")
-    parser.add_argument("--max-workers", type=int, default=5,
-                        help="Maximum number of parallel workers (default: 5)")
+    parser.add_argument("--max-workers", type=int, default=None,
+                        help="Maximum number of parallel workers (default: one per hypothesis)")
     parser.add_argument("--hypotheses", type=str, nargs="+", default=None,
                         help="Specific hypotheses to run (e.g., H01 H02 H03)")
+    parser.add_argument("--rate-limits", type=str, default=None,
+                        help="Requests/tokens per minute per model shared by all tests, e.g. "
+                             "'requests_per_minute=50,output_tokens_per_minute=8000' (default: no limit)")
+    parser.add_argument("--rate-limit-db", type=str, default=None,
+                        help="SQLite file holding the shared rate-limit buckets (default: in the temp directory)")
     args = parser.parse_args()
 
     # Check for API key
@@ -64,11 +74,16 @@ def main():
 
     # Determine which hypotheses to run
     hypotheses_to_run = args.hypotheses if args.hypotheses else HYPOTHESIS_IDS
+    max_workers = args.max_workers or len(hypotheses_to_run)
+    # Set before the pool starts, so every worker draws from the same buckets
+    rate_limits = export_rate_limits(args.rate_limits, args.rate_limit_db)
 
     print("=" * 70)
     print("VOLTA Benchmark: 20 Hypotheses with Gemini 2.0 Flash")
     print("=" * 70)
-    print(f"Running {len(hypotheses_to_run)} hypotheses with {args.max_workers} parallel workers")
+    print(f"Running {len(hypotheses_to_run)} hypotheses with {max_workers} parallel workers")
+    if rate_limits:
+        print(f"Rate limits: {rate_limits}")
     print(f"Hypotheses: {', '.join(hypotheses_to_run)}")
     print("=" * 70)
 
@@ -77,7 +92,7 @@ def main():
     completed = 0
 
     # Run tests in parallel
-    with ProcessPoolExecutor(max_workers=args.max_workers) as executor:
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
         # Submit all tasks
         future_to_hypothesis = {
             executor.submit(run_single_hypothesis, h_id): h_id
@@ -133,6 +148,9 @@ def main():
     print(f"Errors: {error_count}")
     print(f"Total elapsed time: {elapsed_time:.1f} seconds")
     print(f"Average time per hypothesis: {elapsed_time/len(results):.1f} seconds")
+    llm_usage = merge_usage(((r.get("result") or {}).get("log") or {}).get("llm_usage")
+                            for r in results if isinstance(r.get("result"), dict))
+    print(format_usage(llm_usage))
 
     # Save summary
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -147,6 +165,8 @@ def main():
         "errors": error_count,
         "elapsed_time_seconds": elapsed_time,
         "timestamp": datetime.now().isoformat(),
+        # model calls of all hypotheses: tokens, latency and cost by role and by model
+        "llm_usage": llm_usage,
         "results": results
     }
 
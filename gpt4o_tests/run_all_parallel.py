@@ -6,22 +6,25 @@ Each test uses GPT-4o to evaluate the hypothesis against the battery Raman data.
 
 Usage:
     export OPENAI_API_KEY='your-api-key'
-    python run_all_parallel.py
+    python run_all_parallel.py [--max-workers N] [--rate-limits SPEC]
 
 Options:
-    - Adjust MAX_PARALLEL to control how many tests run simultaneously
+    - --max-workers limits how many tests run simultaneously (default: all 20)
+    - --rate-limits caps requests/tokens per minute across all tests instead
     - Results are saved to gpt4o_tests/results/H{XX}/
 """
 
 import os
 import sys
 import time
+import argparse
 import subprocess
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 
-# Maximum number of parallel tests (adjust based on API rate limits)
-MAX_PARALLEL = 5
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from volta.rate_limit import export_rate_limits
 
 # List of all hypothesis test files
 TEST_FILES = [
@@ -92,6 +95,16 @@ def run_test(test_file):
 
 def main():
     """Run all tests in parallel."""
+    parser = argparse.ArgumentParser(description="Run all 20 GPT-4o hypothesis tests in parallel")
+    parser.add_argument("--max-workers", type=int, default=None,
+                        help="Maximum number of parallel tests (default: all of them)")
+    parser.add_argument("--rate-limits", type=str, default=None,
+                        help="Requests/tokens per minute per model shared by all tests, e.g. "
+                             "'requests_per_minute=50,output_tokens_per_minute=8000' (default: no limit)")
+    parser.add_argument("--rate-limit-db", type=str, default=None,
+                        help="SQLite file holding the shared rate-limit buckets (default: in the temp directory)")
+    args = parser.parse_args()
+    max_workers = args.max_workers or len(TEST_FILES)
 
     # Check for API key
     if not os.environ.get("OPENAI_API_KEY"):
@@ -99,17 +112,22 @@ def main():
         print("Set it with: export OPENAI_API_KEY='your-key'")
         sys.exit(1)
 
+    # The test subprocesses share these limits through the environment
+    rate_limits = export_rate_limits(args.rate_limits, args.rate_limit_db)
+
     print("=" * 70)
     print("GPT-4o Hypothesis Testing - Parallel Runner")
     print("=" * 70)
-    print(f"Running {len(TEST_FILES)} tests with max {MAX_PARALLEL} parallel processes")
+    print(f"Running {len(TEST_FILES)} tests with max {max_workers} parallel processes")
+    if rate_limits:
+        print(f"Rate limits: {rate_limits}")
     print(f"Start time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 70)
 
     start_time = time.time()
     results = []
 
-    with ProcessPoolExecutor(max_workers=MAX_PARALLEL) as executor:
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
         future_to_test = {executor.submit(run_test, tf): tf for tf in TEST_FILES}
 
         for future in as_completed(future_to_test):
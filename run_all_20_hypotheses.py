@@ -18,6 +18,8 @@ import pandas as pd
 
 # Add VOLTA to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from volta.loaders import BatteryDataLoader as SharedBatteryDataLoader
+from volta.llm_usage import format_usage, merge_usage
 
 # All 20 hypotheses from the benchmark
 HYPOTHESES = {
@@ -133,27 +135,9 @@ ratio changes, as dissolved Mn catalyzes electrolyte decomposition."""
 }
 
 
-class BatteryDataLoader:
+class BatteryDataLoader(SharedBatteryDataLoader):
     """Custom data loader for battery experiment data."""
 
-    def __init__(self, data_folder: str, random_seed: int = 42):
-        self.data_path = data_folder
-        self.random_seed = random_seed
-        self.table_dict = {}
-        self._load_battery_data()
-        self.data_desc = self._generate_data_description()
-
-    def _load_battery_data(self):
-        raman_path = os.path.join(self.data_path, "raman_peaks_decomposed.csv")
-        if os.path.exists(raman_path):
-            self.table_dict["df_raman_peaks"] = pd.read_csv(raman_path)
-        else:
-            raise FileNotFoundError(f"Raman peaks file not found: {raman_path}")
-
-        voltage_path = os.path.join(self.data_path, "voltage_profile_detailed.csv")
-        if os.path.exists(voltage_path):
-            self.table_dict["df_voltage_profile"] = pd.read_csv(voltage_path)
-
     def _generate_data_description(self) -> str:
         desc = """
 === Battery Experiment Data Description ===
@@ -225,7 +209,9 @@ def run_single_hypothesis(args) -> Dict:
         # Initialize agent
         agent = SequentialFalsificationTest(
             llm=config["llm"],
-            api_key=api_key
+            api_key=api_key,
+            llm_cache=config.get("llm_cache"),
+            rate_limits=config.get("rate_limits")
         )
 
         agent.configure(
@@ -236,7 +222,8 @@ def run_single_hypothesis(args) -> Dict:
             max_retry=config["max_retry"],
             time_limit=config["time_limit"],
             relevance_checker=config["relevance_checker"],
-            use_react_agent=config["use_react_agent"]
+            use_react_agent=config["use_react_agent"],
+            execution_cache=config["execution_cache"]
         )
 
         # Run the test
@@ -275,6 +262,7 @@ def run_single_hypothesis(args) -> Dict:
             "status": "SUCCESS",
             "conclusion": parsed_result.get('conclusion', 'N/A'),
             "elapsed_time": elapsed_time,
+            "llm_usage": log.get('llm_usage'),
             "output_dir": output_dir,
             "error": None
         }
@@ -307,9 +295,17 @@ def run_benchmark(
     time_limit: int = 5,
     max_workers: int = 5,
     relevance_checker: bool = True,
-    use_react_agent: bool = True
+    use_react_agent: bool = True,
+    execution_cache: str = None,
+    llm_cache: str = None,
+    rate_limits: Dict = None
 ) -> Dict:
-    """Run all 20 hypotheses."""
+    """Run all 20 hypotheses.
+
+    execution_cache and llm_cache are SQLite files shared by all workers; re-running the
+    benchmark answers identical code executions and model calls from them. rate_limits
+    (RateLimiter arguments) caps requests and tokens per minute per model across all workers.
+    """
 
     # Determine which API key to check
     if llm.startswith("gemini"):
@@ -337,6 +333,10 @@ def run_benchmark(
     print(f"Alpha: {alpha}")
     print(f"Max tests per hypothesis: {max_tests}")
     print(f"Max parallel workers: {max_workers}")
+    if execution_cache:
+        print(f"Execution cache: {execution_cache}")
+    if llm_cache:
+        print(f"LLM cache: {llm_cache}")
     print(f"Total hypotheses: {len(HYPOTHESES)}")
     print("  - Verifiable (H01-H10): 10")
     print("  - Non-verifiable (H11-H20): 10")
@@ -360,7 +360,10 @@ def run_benchmark(
         "relevance_checker": relevance_checker,
         "use_react_agent": use_react_agent,
         "output_base": output_base,
-        "data_path": data_path
+        "data_path": data_path,
+        "execution_cache": execution_cache,
+        "llm_cache": llm_cache,
+        "rate_limits": rate_limits
     }
 
     # Prepare arguments for each hypothesis
@@ -412,6 +415,8 @@ def run_benchmark(
     print(f"Total time: {total_time:.1f} seconds")
     print(f"Successful: {len(successful)}/{len(results)}")
     print(f"Failed: {len(failed)}/{len(results)}")
+    llm_usage = merge_usage(r.get("llm_usage") for r in results)
+    print(format_usage(llm_usage))
 
     # Save summary
     summary = {
@@ -425,6 +430,8 @@ def run_benchmark(
         "total_time_seconds": total_time,
         "successful_count": len(successful),
         "failed_count": len(failed),
+        # model calls of all hypotheses: tokens, latency and cost by role and by model
+        "llm_usage": llm_usage,
         "results": results
     }
 
@@ -465,6 +472,8 @@ def run_benchmark(
         f.write(f"- **Successful**: {len(successful)}/{len(results)}\n")
         f.write(f"- **Failed**: {len(failed)}/{len(results)}\n")
 
+        f.write(f"\n## Model Usage\n```\n{format_usage(llm_usage)}\n```\n")
+
         if failed:
             f.write("\n## Failures\n")
             for r in failed:
@@ -491,13 +500,32 @@ if __name__ == "__main__":
                         help="Maximum parallel workers (default: 5)")
     parser.add_argument("--time-limit", type=int, default=5,
                         help="Time limit per test in minutes (default: 5)")
+    parser.add_argument("--execution-cache", type=str, default=None,
+                        help="SQLite file caching executed code outputs across runs (default: no cache)")
+    parser.add_argument("--llm-cache", type=str, default=None,
+                        help="SQLite file caching model responses across runs (default: no cache)")
+    parser.add_argument("--rpm", type=float, default=None,
+                        help="Requests per minute per model, shared by all workers (default: no limit)")
+    parser.add_argument("--input-tpm", type=float, default=None,
+                        help="Input tokens per minute per model, shared by all workers (default: no limit)")
+    parser.add_argument("--output-tpm", type=float, default=None,
+                        help="Output tokens per minute per model, shared by all workers (default: no limit)")
+    parser.add_argument("--rate-limit-db", type=str, default=None,
+                        help="SQLite file holding the shared rate-limit buckets (default: in the temp directory)")
 
     args = parser.parse_args()
+    rate_limits = None
+    if args.rpm or args.input_tpm or args.output_tpm:
+        rate_limits = {"path": args.rate_limit_db, "requests_per_minute": args.rpm,
+                       "input_tokens_per_minute": args.input_tpm, "output_tokens_per_minute": args.output_tpm}
 
     results = run_benchmark(
         llm=args.llm,
         alpha=args.alpha,
         max_tests=args.max_tests,
         max_workers=args.max_workers,
-        time_limit=args.time_limit
+        time_limit=args.time_limit,
+        execution_cache=args.execution_cache,
+        llm_cache=args.llm_cache,
+        rate_limits=rate_limits
     )
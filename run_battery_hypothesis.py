@@ -19,116 +19,7 @@ from typing import Dict, Optional
 
 # Add VOLTA to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
-
-class BatteryDataLoader:
-    """
-    Custom data loader for battery experiment data.
-    Loads Raman peak decomposition data and voltage profile data.
-    """
-
-    def __init__(self, data_folder: str, random_seed: int = 42):
-        """
-        Initialize the battery data loader.
-
-        Args:
-            data_folder: Path to the Battery_Data folder containing CSV files
-            random_seed: Random seed for any permutation operations
-        """
-        self.data_path = data_folder
-        self.random_seed = random_seed
-        self.table_dict = {}
-        self._load_battery_data()
-        self.data_desc = self._generate_data_description()
-
-    def _load_battery_data(self):
-        """Load the battery experiment CSV files."""
-        # Load Raman peaks decomposed data
-        raman_path = os.path.join(self.data_path, "raman_peaks_decomposed.csv")
-        if os.path.exists(raman_path):
-            self.table_dict["df_raman_peaks"] = pd.read_csv(raman_path)
-            print(f"Loaded Raman peaks data: {len(self.table_dict['df_raman_peaks'])} rows")
-        else:
-            raise FileNotFoundError(f"Raman peaks file not found: {raman_path}")
-
-        # Load voltage profile data
-        voltage_path = os.path.join(self.data_path, "voltage_profile_detailed.csv")
-        if os.path.exists(voltage_path):
-            self.table_dict["df_voltage_profile"] = pd.read_csv(voltage_path)
-            print(f"Loaded voltage profile data: {len(self.table_dict['df_voltage_profile'])} rows")
-        else:
-            raise FileNotFoundError(f"Voltage profile file not found: {voltage_path}")
-
-    def _generate_data_description(self) -> str:
-        """Generate a description of the battery datasets."""
-        desc = """
-=== Battery Experiment Data Description ===
-
-This dataset contains Operando Raman Spectroscopy data from Li-rich layered oxide cathode cycling.
-
-"""
-        for name, df in self.table_dict.items():
-            if df is not None:
-                desc += f"**{name}**:\n"
-                desc += f"Columns: {df.columns.tolist()}\n"
-                desc += f"Shape: {df.shape}\n"
-                desc += f"Sample row: {dict(zip(df.columns, df.iloc[0]))}\n\n"
-
-                # Add column descriptions for key columns
-                if name == "df_raman_peaks":
-                    desc += """
-Column Descriptions for df_raman_peaks:
-- pixel_id: Spatial pixel identifier (0-899 for 30x30 grid)
-- time_idx: Time step index (0-113, each step is 15 minutes)
-- Eg_Center: E_g peak position in cm^{-1} (~475 cm^{-1}, M-O bending)
-- Eg_Amp: E_g peak amplitude
-- Eg_Sigma: E_g peak width
-- A1g_Center: A_{1g} peak position in cm^{-1} (~590 cm^{-1}, M-O stretching, PRIMARY SOC INDICATOR)
-- A1g_Amp: A_{1g} peak amplitude
-- A1g_Sigma: A_{1g} peak width
-- D_Center: D-band center (~1350 cm^{-1}, disordered carbon)
-- D_Amp: D-band amplitude
-- D_Sigma: D-band width
-- G_Center: G-band center (~1585 cm^{-1}, graphitic carbon)
-- G_Amp: G-band amplitude
-- G_Sigma: G-band width
-- ID_IG_Ratio: Ratio of D-band to G-band intensity (carbon disorder indicator)
-- X, Y: Spatial coordinates on the 30x30 um grid
-- Time_Min: Time in minutes from start
-- Voltage: Corresponding cell voltage (V vs Li/Li+)
-
-"""
-                elif name == "df_voltage_profile":
-                    desc += """
-Column Descriptions for df_voltage_profile:
-- time/h: Time in hours from start of experiment
-- Ewe/V: Working electrode voltage (V vs Li/Li+)
-  - Charging: Voltage increases from ~3.0V to ~4.7V (delithiation)
-  - Discharging: Voltage decreases from ~4.7V to ~3.0V (lithiation)
-
-"""
-        return desc
-
-    def get_data(self, table_name: str) -> Optional[pd.DataFrame]:
-        """Return the requested DataFrame."""
-        return self.table_dict.get(table_name, None)
-
-    def load_into_globals(self):
-        """Load each dataset into the global namespace."""
-        for name, df in self.table_dict.items():
-            if df is not None:
-                globals()[name] = df
-
-    def display_data_description(self):
-        """Print the data description."""
-        print(self.data_desc)
-
-    def permute_selected_columns(self, random_seed: int = 42):
-        """Permute columns for null hypothesis testing."""
-        np.random.seed(random_seed)
-        for df_name in self.table_dict:
-            df = self.table_dict[df_name]
-            self.table_dict[df_name] = df.apply(np.random.permutation)
+from volta.loaders import BatteryDataLoader
 
 
 def run_battery_hypothesis_test(
@@ -16,6 +16,8 @@ import pandas as pd
 
 # Add VOLTA to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from volta.loaders import BatteryDataLoader as SharedBatteryDataLoader
+from volta.llm_usage import format_usage, merge_usage
 
 # Define the 10 verifiable hypotheses
 HYPOTHESES = {
@@ -79,27 +81,9 @@ indicating local electrochemical domains larger than 1 μm."""
 }
 
 
-class BatteryDataLoader:
+class BatteryDataLoader(SharedBatteryDataLoader):
     """Custom data loader for battery experiment data."""
 
-    def __init__(self, data_folder: str, random_seed: int = 42):
-        self.data_path = data_folder
-        self.random_seed = random_seed
-        self.table_dict = {}
-        self._load_battery_data()
-        self.data_desc = self._generate_data_description()
-
-    def _load_battery_data(self):
-        raman_path = os.path.join(self.data_path, "raman_peaks_decomposed.csv")
-        if os.path.exists(raman_path):
-            self.table_dict["df_raman_peaks"] = pd.read_csv(raman_path)
-        else:
-            raise FileNotFoundError(f"Raman peaks file not found: {raman_path}")
-
-        voltage_path = os.path.join(self.data_path, "voltage_profile_detailed.csv")
-        if os.path.exists(voltage_path):
-            self.table_dict["df_voltage_profile"] = pd.read_csv(voltage_path)
-
     def _generate_data_description(self) -> str:
         desc = """
 === Battery Experiment Data Description ===
@@ -158,7 +142,9 @@ def run_single_hypothesis(args) -> Dict:
         # Initialize agent
         agent = SequentialFalsificationTest(
             llm=config["llm"],
-            api_key=api_key
+            api_key=api_key,
+            llm_cache=config.get("llm_cache"),
+            rate_limits=config.get("rate_limits")
         )
 
         agent.configure(
@@ -169,7 +155,8 @@ def run_single_hypothesis(args) -> Dict:
             max_retry=config["max_retry"],
             time_limit=config["time_limit"],
             relevance_checker=config["relevance_checker"],
-            use_react_agent=config["use_react_agent"]
+            use_react_agent=config["use_react_agent"],
+            execution_cache=config.get("execution_cache")
         )
 
         # Run the test
@@ -208,6 +195,7 @@ def run_single_hypothesis(args) -> Dict:
             "status": "SUCCESS",
             "conclusion": parsed_result.get('conclusion', 'N/A'),
             "elapsed_time": elapsed_time,
+            "llm_usage": log.get('llm_usage'),
             "output_dir": output_dir,
             "error": None
         }
@@ -240,9 +228,17 @@ def run_parallel_benchmark(
     time_limit: int = 5,
     max_workers: int = 5,
     relevance_checker: bool = True,
-    use_react_agent: bool = True
+    use_react_agent: bool = True,
+    llm_cache: Optional[str] = None,
+    execution_cache: Optional[str] = None,
+    rate_limits: Optional[Dict] = None
 ) -> Dict:
-    """Run all 10 hypotheses in parallel."""
+    """Run all 10 hypotheses in parallel.
+
+    llm_cache and execution_cache are SQLite files shared by all workers; re-running the
+    benchmark answers identical model calls and code executions from them. rate_limits
+    (RateLimiter arguments) caps requests and tokens per minute per model across all workers.
+    """
 
     # Check API key
     api_key = os.environ.get("ANTHROPIC_API_KEY")
@@ -258,6 +254,12 @@ def run_parallel_benchmark(
     print(f"Alpha: {alpha}")
     print(f"Max tests per hypothesis: {max_tests}")
     print(f"Max parallel workers: {max_workers}")
+    if llm_cache:
+        print(f"LLM cache: {llm_cache}")
+    if execution_cache:
+        print(f"Execution cache: {execution_cache}")
+    if rate_limits:
+        print(f"Rate limits: {rate_limits}")
     print(f"Total hypotheses: {len(HYPOTHESES)}")
     print("=" * 70)
 
@@ -278,6 +280,9 @@ def run_parallel_benchmark(
         "time_limit": time_limit,
         "relevance_checker": relevance_checker,
         "use_react_agent": use_react_agent,
+        "llm_cache": llm_cache,
+        "execution_cache": execution_cache,
+        "rate_limits": rate_limits,
         "output_base": output_base,
         "data_path": data_path
     }
@@ -331,6 +336,8 @@ def run_parallel_benchmark(
     print(f"Total time: {total_time:.1f} seconds")
     print(f"Successful: {len(successful)}/{len(results)}")
     print(f"Failed: {len(failed)}/{len(results)}")
+    llm_usage = merge_usage(r.get("llm_usage") for r in results)
+    print(format_usage(llm_usage))
 
     # Save summary
     summary = {
@@ -344,6 +351,8 @@ def run_parallel_benchmark(
         "total_time_seconds": total_time,
         "successful_count": len(successful),
         "failed_count": len(failed),
+        # model calls of all hypotheses: tokens, latency and cost by role and by model
+        "llm_usage": llm_usage,
         "results": results
     }
 
@@ -373,6 +382,8 @@ def run_parallel_benchmark(
         f.write(f"- **Successful**: {len(successful)}/{len(results)}\n")
         f.write(f"- **Failed**: {len(failed)}/{len(results)}\n")
 
+        f.write(f"\n## Model Usage\n```\n{format_usage(llm_usage)}\n```\n")
+
         if failed:
             f.write("\n## Failures\n")
             for r in failed:
@@ -399,13 +410,32 @@ if __name__ == "__main__":
                         help="Maximum parallel workers (default: 5)")
     parser.add_argument("--time-limit", type=int, default=5,
                         help="Time limit per test in minutes (default: 5)")
+    parser.add_argument("--llm-cache", type=str, default=None,
+                        help="SQLite file caching model responses across runs (default: no cache)")
+    parser.add_argument("--execution-cache", type=str, default=None,
+                        help="SQLite file caching executed code outputs across runs (default: no cache)")
+    parser.add_argument("--rpm", type=float, default=None,
+                        help="Requests per minute per model, shared by all workers (default: no limit)")
+    parser.add_argument("--input-tpm", type=float, default=None,
+                        help="Input tokens per minute per model, shared by all workers (default: no limit)")
+    parser.add_argument("--output-tpm", type=float, default=None,
+                        help="Output tokens per minute per model, shared by all workers (default: no limit)")
+    parser.add_argument("--rate-limit-db", type=str, default=None,
+                        help="SQLite file holding the shared rate-limit buckets (default: in the temp directory)")
 
     args = parser.parse_args()
+    rate_limits = None
+    if args.rpm or args.input_tpm or args.output_tpm:
+        rate_limits = {"path": args.rate_limit_db, "requests_per_minute": args.rpm,
+                       "input_tokens_per_minute": args.input_tpm, "output_tokens_per_minute": args.output_tpm}
 
     results = run_parallel_benchmark(
         llm=args.llm,
         alpha=args.alpha,
         max_tests=args.max_tests,
         max_workers=args.max_workers,
-        time_limit=args.time_limit
+        time_limit=args.time_limit,
+        llm_cache=args.llm_cache,
+        execution_cache=args.execution_cache,
+        rate_limits=rate_limits
     )
@@ -0,0 +1,41 @@
+import numpy as np
+
+from volta.battery_stats import pixel_voltage_correlation
+
+
+def _null_cube(rng, n_times=60, side=30):
+    """Feature independent of voltage: a common per-frame offset plus pixel noise, with a
+    random-walk voltage."""
+    voltage = np.cumsum(rng.normal(size=n_times))
+    offset = rng.normal(size=n_times)[:, None, None]
+    values = 3.0 + offset + 0.5 * rng.normal(size=(n_times, side, side))
+    return values, voltage
+
+
+def test_pixel_voltage_correlation_is_calibrated_under_the_null():
+    rng = np.random.default_rng(1)
+    p_values = []
+    for _ in range(200):
+        values, voltage = _null_cube(rng)
+        p_values.append(pixel_voltage_correlation(values, voltage, permutations=199, seed=None)['p_value'])
+    rejected = np.mean(np.array(p_values) < 0.05)
+    assert 0.01 <= rejected <= 0.1
+
+
+def test_pixel_voltage_correlation_detects_a_shared_response():
+    rng = np.random.default_rng(2)
+    values, voltage = _null_cube(rng)
+    values = values + (voltage - voltage.mean())[:, None, None]
+    result = pixel_voltage_correlation(values, voltage, method='spearman', permutations=199)
+    assert result['statistic'] > 0.5
+    assert result['p_value'] <= 0.01
+    assert result['n'] == 60
+    assert result['details']['r_map'].shape == (30, 30)
+
+
+def test_pixel_voltage_correlation_without_permutations_uses_t_distribution():
+    values, voltage = _null_cube(np.random.default_rng(3))
+    values[:5, 0, 0] = np.nan
+    result = pixel_voltage_correlation(values, voltage, permutations=0)
+    assert result['p_value'] == result['details']['frame_mean_p']
+    assert np.isfinite(result['details']['r_map']).all()
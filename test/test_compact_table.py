@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from volta.utils import CustomDataLoader, compact_table
+
+
+def test_integers_stay_at_least_32_bit():
+    df = pd.DataFrame({'small': np.arange(100, dtype=np.int64), 'big': np.array([0, 2**40], dtype=np.int64).repeat(50)})
+    compacted, before, after = compact_table(df)
+    assert compacted['small'].dtype == np.int32
+    assert compacted['big'].dtype == np.int64
+    assert after < before
+    # arithmetic that overflows int8/int16 is still exact
+    assert (compacted['small'] * 1000).tolist() == (df['small'] * 1000).tolist()
+    assert compacted['small'].sum() == df['small'].sum()
+
+
+def test_floats_only_narrowed_when_exact():
+    df = pd.DataFrame({'halves': np.arange(10) / 2, 'thirds': np.arange(10) / 3})
+    compacted, _, _ = compact_table(df)
+    assert compacted['halves'].dtype == np.float32
+    assert compacted['thirds'].dtype == np.float64
+
+
+def test_strings_are_not_categorical():
+    df = pd.DataFrame({'label': ['a', 'b', None, 'a'] * 5})
+    compacted, _, _ = compact_table(df)
+    assert not isinstance(compacted['label'].dtype, pd.CategoricalDtype)
+    assert compacted.groupby('label').size().to_dict() == df.groupby('label').size().to_dict()
+    mask = compacted['label'] == 'a'
+    assert mask.dtype == bool
+    assert len(compacted[mask]) == 10
+
+
+def test_data_description_reports_compacted_dtypes(tmp_path):
+    pd.DataFrame({'x': np.arange(5, dtype=np.int64), 'y': np.arange(5) / 2}).to_csv(tmp_path / 'table.csv', index=False)
+    loader = CustomDataLoader(str(tmp_path), compact_dtypes=True, use_cache=False)
+    assert "Dtypes: {'x': 'int32', 'y': 'float32'}" in loader.data_desc
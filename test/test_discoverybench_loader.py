@@ -0,0 +1,25 @@
+import pandas as pd
+
+from volta.utils import DiscoveryBenchDataLoader
+
+
+def _task(tmp_path):
+    pd.DataFrame({'x': [1.0, None, 3.0], 'y': ['a', 'b', 'c']}).to_csv(tmp_path / 'data.csv', index=False)
+    return {'datasets': [{'name': 'data.csv', 'description': 'test table',
+                          'columns': {'raw': [{'name': 'x', 'description': 'x'}, {'name': 'y', 'description': 'y'}]}}]}
+
+
+def test_loaders_sharing_a_file_cache_do_not_see_each_others_edits(tmp_path):
+    file_cache = {}
+    first = DiscoveryBenchDataLoader(str(tmp_path), _task(tmp_path), file_cache=file_cache)
+    df = first.table_dict['df_data']
+    df.loc[df['y'] == 'a', 'x'] = 100.0
+    df.fillna({'x': -1.0}, inplace=True)
+    df.iloc[2, 1] = 'edited'
+
+    second = DiscoveryBenchDataLoader(str(tmp_path), _task(tmp_path), file_cache=file_cache)
+    permuted = second.permuted()
+    assert len(file_cache) == 1
+    expected = pd.read_csv(tmp_path / 'data.csv')
+    pd.testing.assert_frame_equal(second.table_dict['df_data'], expected)
+    assert sorted(permuted.table_dict['df_data']['y']) == ['a', 'b', 'c']
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from volta.execution_cache import CodeInfo, ExecutionCache, namespace_resolver
+
+
+@pytest.mark.parametrize('code', [
+    "import numpy as np\nnp.random.seed(0)\nprint(np.random.rand())",
+    "import numpy as np\nrng = np.random.default_rng(42)\nprint(rng.normal())",
+    "import numpy as np\nprint(np.random.RandomState(seed=1).rand())",
+    "from scipy import stats\nprint(stats.permutation_test((x, y), f, random_state=0))",
+])
+def test_seeded_randomness_is_cacheable(code):
+    assert CodeInfo(code).cacheable
+
+
+@pytest.mark.parametrize('code', [
+    "import numpy as np\nrng = np.random.default_rng()\nprint(rng.normal())",
+    "import numpy as np\nprint(np.random.RandomState().rand())",
+    "import numpy as np\nnp.random.seed()\nprint(np.random.rand())",
+    "import numpy as np\nrng = np.random.default_rng(None)\nprint(rng.permutation(10))",
+    "import numpy as np\nprint(np.random.permutation(10))",
+    # a seeded generator does not make another, unseeded one deterministic
+    "import numpy as np\na = np.random.default_rng(0)\nb = np.random.default_rng()\nprint(b.normal())",
+])
+def test_unseeded_randomness_is_not_cacheable(code):
+    info = CodeInfo(code)
+    assert not info.cacheable
+    assert info.reason == 'unseeded randomness'
+
+
+def test_hit_requires_same_code_and_same_table():
+    cache = ExecutionCache()
+    tables = {'df': pd.DataFrame({'a': [1, 2, 3]})}
+    code = "print(df['a'].sum())"
+    key, output, _ = cache.lookup(code, namespace_resolver(tables))
+    assert output is None
+    cache.store(key, "6\n")
+    # formatting does not matter
+    assert cache.lookup("print( df['a'].sum() )  # total", namespace_resolver(tables))[1] == "6\n"
+    changed = {'df': pd.DataFrame({'a': [1, 2, 4]})}
+    assert cache.lookup(code, namespace_resolver(changed))[1] is None
@@ -0,0 +1,246 @@
+import asyncio
+import io
+import contextlib
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import types
+import gc
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from volta.data_registry import DataRegistry
+from volta.execution_cache import ExecutionCache, value_fingerprint
+from volta.executor import ExecutorPool, ForkedExecution
+from volta.shared_tables import TableServer
+from volta.utils import LazyTableDict
+
+# edits the table through a Series taken from it, which is a view unless copy-on-write is on
+EDIT_THROUGH_VIEW = "s = df_t['a']\ns[0] = 100\nprint(int(df_t['a'][0]))"
+
+
+class _NoThreads(ThreadPoolExecutor):
+    """Default executor that fails the test if anything but a table export is handed to
+    a thread."""
+
+    def submit(self, fn, *args, **kwargs):
+        # asyncio.to_thread submits partial(context.run, func, *args)
+        func = fn.args[0] if isinstance(fn, functools.partial) and fn.args else fn
+        if getattr(func, '__func__', None) is not TableServer.export:
+            raise AssertionError(f"{fn} was run in a thread")
+        return super().submit(fn, *args, **kwargs)
+
+
+def _run_without_threads(coroutine_function):
+    async def main():
+        asyncio.get_running_loop().set_default_executor(_NoThreads())
+        return await coroutine_function()
+    return asyncio.run(main())
+
+
+def _session():
+    loader = types.SimpleNamespace(table_dict={'df_t': pd.DataFrame({'a': np.arange(5), 'b': np.arange(5) * 2.0})})
+    return DataRegistry().open(loader), loader
+
+
+def _run_in_process(code, tables):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        exec(code, {name: df.copy() for name, df in tables.items()})
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('transport', ['shared_memory', 'inherit'])
+def test_pool_jobs_match_in_process_pandas_semantics(transport):
+    session, loader = _session()
+    expected = _run_in_process(EDIT_THROUGH_VIEW, loader.table_dict)
+    with ExecutorPool(session, n_workers=1, preload=(), transport=transport) as pool:
+        status, output, _ = pool.run(EDIT_THROUGH_VIEW, timeout=60)
+        assert status == 'ok'
+        assert output == expected
+        # the edit stayed in the first job's copy of the table
+        status, output, _ = pool.run("print(int(df_t['a'][0]))", timeout=60)
+        assert output.strip() == '0'
+    assert loader.table_dict['df_t']['a'][0] == 0
+
+
+def test_release_stops_workers_and_frees_shared_memory():
+    session, _ = _session()
+    with ExecutorPool(session, n_workers=2, preload=()) as pool:
+        assert pool.run("print(df_t['a'].sum())", timeout=60)[1].strip() == '10'
+        processes = [worker.process for worker in pool._workers]
+        assert pool.stats()['shared_tables'] == 1
+
+        pool.release()
+        assert pool._workers == []
+        assert not any(process.is_alive() for process in processes)
+        assert pool.stats()['shared_tables'] == 0
+
+        # the pool starts workers again on demand
+        assert pool.run("print(df_t['b'].sum())", timeout=60)[1].strip() == '20.0'
+
+
+def test_collected_pool_stops_its_workers():
+    session, _ = _session()
+    pool = ExecutorPool(session, n_workers=1, preload=())
+    pool.run("print(df_t.shape)", timeout=60)
+    process = pool._workers[0].process
+    segment = pool._server.store.get('df_t').segment
+    del pool
+    gc.collect()
+    assert not process.is_alive()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=segment)
+
+
+def _lazy_session():
+    frame = pd.DataFrame({'a': np.arange(5)})
+    loader = types.SimpleNamespace(table_dict=LazyTableDict({'df_t': frame.copy}))
+    return DataRegistry().open(loader), loader, frame
+
+
+def test_pool_fingerprints_tables_without_loading_them_here():
+    session, loader, frame = _lazy_session()
+    with ExecutorPool(session, n_workers=1, preload=()) as pool:
+        cache = ExecutionCache()
+        key, output, _ = cache.lookup("print(df_t['a'].sum())", fingerprints=pool.fingerprints)
+        assert key is not None and output is None
+        assert pool.fingerprints(['df_t', 'undefined_name']) == {
+            'df_t': value_fingerprint(frame), 'undefined_name': 'undefined'}
+    assert loader.table_dict.loaded_items() == []
+
+
+def test_forked_execution_fingerprints_then_runs():
+    session, loader, frame = _lazy_session()
+    execution = ForkedExecution(session.namespace, "print(df_t['a'].sum())", timeout=60)
+    assert execution.fingerprints(['df_t']) == {'df_t': value_fingerprint(frame)}
+    status, output, usage = execution.run()
+    assert (status, output.strip(), usage['status']) == ('ok', '10', 'ok')
+    assert loader.table_dict.loaded_items() == []
+
+
+def test_forked_execution_timeout_and_cancel():
+    execution = ForkedExecution(dict, "while True: pass", timeout=0.5)
+    assert execution.run()[0] == 'timeout'
+    assert not execution._process.is_alive()
+    execution = ForkedExecution(dict, "print(1)")
+    execution.cancel()
+    assert not execution._process.is_alive()
+
+
+def test_reused_worker_reports_each_jobs_own_peak_rss():
+    big = "import numpy as np\nx = np.ones(400 * 2**20 // 8)\nprint(x.sum() > 0)\ndel x"
+    small = "print(1 + 1)"
+    with ExecutorPool(None, n_workers=1, preload=()) as pool:
+        status, _, big_usage = pool.run(big, timeout=60)
+        assert status == 'ok'
+        status, _, small_usage = pool.run(small, timeout=60)
+        assert status == 'ok'
+    assert big_usage['rss_growth'] > 300 * 2**20
+    assert small_usage['rss_growth'] < 50 * 2**20
+    assert small_usage['peak_rss'] < big_usage['peak_rss'] - 300 * 2**20
+    # the worker's lifetime peak still remembers the first job
+    assert small_usage['worker_peak_rss'] >= big_usage['peak_rss']
+
+
+def test_concurrent_arun_shares_the_workers_without_threads():
+    session, loader, frame = _lazy_session()
+    with ExecutorPool(session, n_workers=2, preload=()) as pool:
+        async def main():
+            fingerprints = await pool.afingerprints(['df_t'], timeout=60)
+            results = await asyncio.gather(*(pool.arun(f"print(df_t['a'].sum() + {i})", timeout=60) for i in range(5)))
+            return fingerprints, results
+        fingerprints, results = _run_without_threads(main)
+        assert fingerprints == {'df_t': value_fingerprint(frame)}
+        assert [(status, output.strip()) for status, output, _ in results] == [('ok', str(10 + i)) for i in range(5)]
+        assert pool.stats()['jobs'] == 5 and pool.stats()['spawns'] == 2
+
+
+def test_cancelled_arun_replaces_its_worker():
+    with ExecutorPool(None, n_workers=1, preload=()) as pool:
+        async def main():
+            job = asyncio.create_task(pool.arun("import time\ntime.sleep(60)"))
+            await asyncio.sleep(0.5)
+            job.cancel()
+            await asyncio.gather(job, return_exceptions=True)
+            return await pool.arun("print('next')", timeout=60)
+        status, output, _ = _run_without_threads(main)
+        assert (status, output.strip()) == ('ok', 'next')
+        assert pool.stats()['spawns'] == 2
+
+
+def test_arun_timeout():
+    with ExecutorPool(None, n_workers=1, preload=()) as pool:
+        status, _, usage = _run_without_threads(lambda: pool.arun("while True: pass", timeout=0.5))
+        assert status == 'timeout' and usage['status'] == 'timeout'
+        assert pool.stats()['timeouts'] == 1
+
+
+def test_forked_execution_awaited_without_threads():
+    session, loader, frame = _lazy_session()
+    execution = ForkedExecution(session.namespace, "print(df_t['a'].sum())", timeout=60)
+
+    async def main():
+        return await execution.afingerprints(['df_t']), await execution.arun()
+    try:
+        fingerprints, (status, output, _) = _run_without_threads(main)
+    finally:
+        execution.cancel()
+    assert fingerprints == {'df_t': value_fingerprint(frame)}
+    assert (status, output.strip()) == ('ok', '10')
+
+
+ANON_RSS = ("def anon_rss():\n"
+            "    with open('/proc/self/status') as f:\n"
+            "        return next(int(line.split()[1]) * 1024 for line in f if line.startswith('RssAnon'))\n")
+
+
+@pytest.mark.skipif(not os.path.isdir('/dev/shm'), reason="needs /proc and /dev/shm")
+def test_shared_tables_are_not_copied_into_read_only_jobs():
+    big = pd.DataFrame({'a': np.arange(25 * 2**20, dtype=np.float64), 'b': np.ones(25 * 2**20)})
+    loader = types.SimpleNamespace(table_dict={'df_big': big})
+    session = DataRegistry().open(loader)
+    read = ANON_RSS + "before = anon_rss()\nprint(df_big['a'].sum() + df_big['b'].sum())\nprint(anon_rss() - before)"
+    write = "df_big.loc[0, 'a'] = -1.0\ns = df_big['b']\ns[1] = 5.0\nprint(df_big.iloc[0, 0], df_big.iloc[1, 1])"
+    # a memory limit far below the table's 400 MB does not stop jobs from reading it
+    with ExecutorPool(session, n_workers=1, preload=(), memory_limit=100 * 2**20) as pool:
+        for _ in range(2):
+            status, output, _ = pool.run(read, timeout=60)
+            assert status == 'ok', output
+            total, growth = output.split()
+            assert float(total) == big['a'].sum() + big['b'].sum()
+            # a copy would add 400 MB; sum() itself allocates a NaN mask per column
+            assert int(growth) < 100 * 2**20
+        status, output, _ = pool.run(write, timeout=60)
+        assert (status, output.split()) == ('ok', ['-1.0', '5.0'])
+        status, output, _ = pool.run("print(df_big.iloc[0, 0], df_big.iloc[1, 1])", timeout=60)
+        assert output.split() == ['0.0', '1.0']
+    assert big.iloc[0, 0] == 0.0 and big.iloc[1, 1] == 1.0
+
+
+def test_slow_table_export_does_not_block_the_event_loop():
+    def slow_table():
+        time.sleep(1.0)
+        return pd.DataFrame({'a': np.arange(5)})
+    loader = types.SimpleNamespace(table_dict=LazyTableDict({'df_slow': slow_table}))
+    session = DataRegistry().open(loader)
+    with ExecutorPool(session, n_workers=1, preload=()) as pool:
+        async def main():
+            ticks = []
+
+            async def ticker():
+                while True:
+                    ticks.append(time.monotonic())
+                    await asyncio.sleep(0.05)
+
+            task = asyncio.create_task(ticker())
+            result = await pool.arun("print(df_slow['a'].sum())", timeout=60)
+            task.cancel()
+            return result, ticks
+        (status, output, _), ticks = _run_without_threads(main)
+    assert (status, output.strip()) == ('ok', '10')
+    assert max(np.diff(ticks)) < 0.5
@@ -0,0 +1,25 @@
+import gc
+
+from volta.kernel import ReplKernel
+
+
+def test_collected_kernel_stops_its_process():
+    kernel = ReplKernel({}, time_limit=30, transport='inherit')
+    assert kernel.run("x = 1", "x")[1].strip() == '1'
+    process = kernel._process
+    del kernel
+    gc.collect()
+    assert not process.is_alive()
+
+
+def test_restart_replaces_process_and_keeps_imports():
+    kernel = ReplKernel({}, time_limit=1, transport='inherit')
+    try:
+        kernel.run("import math", "None")
+        first = kernel._process
+        ok, message, usage = kernel.run("while True: pass", "None")
+        assert not ok and usage['status'] == 'timeout'
+        assert not first.is_alive()
+        assert kernel.run("", "math.floor(2.5)")[1].strip() == '2'
+    finally:
+        kernel.close()
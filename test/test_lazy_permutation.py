@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from volta.utils import ExperimentalDataLoader
+
+
+def _write_bio_database(root):
+    bio = root / 'bio_database'
+    bio.mkdir()
+    rng = np.random.RandomState(0)
+    loader = ExperimentalDataLoader(str(root))
+    for name in loader.available_datasets:
+        n_cols = 2 + len(name) % 3
+        pd.DataFrame(rng.randint(0, 100, size=(20, n_cols)), columns=[f"c{i}" for i in range(n_cols)]).to_pickle(bio / f"{name}.pkl")
+    return bio
+
+
+def _expected_all_bio(tables, seed):
+    expected = {}
+    for name, df in tables.items():
+        permuted = df.copy()
+        for col in df.columns:
+            indices = np.random.RandomState(seed).permutation(len(df))
+            permuted[col] = df[col].iloc[indices].reset_index(drop=True)
+            seed = seed * 2 % (2 ** 31)
+        expected[name] = permuted
+    return expected
+
+
+def test_all_bio_permutation_loads_no_table(tmp_path):
+    _write_bio_database(tmp_path)
+    # the first pass writes the sidecars
+    warm = ExperimentalDataLoader(str(tmp_path), table_dict_selection='all_bio')
+    tables = {name: warm.table_dict[name] for name in warm.table_dict}
+
+    loader = ExperimentalDataLoader(str(tmp_path), table_dict_selection='all_bio')
+    loader.permute_selected_columns(random_seed=7)
+    assert loader.table_dict.loaded_items() == []
+
+    expected = _expected_all_bio(tables, 7)
+    for name in ['df_trait', 'df_gene_info']:
+        pd.testing.assert_frame_equal(loader.table_dict[name], expected[name])
+    assert len(loader.table_dict.loaded_items()) == 2
+
+
+def test_default_permutation_without_sidecars(tmp_path):
+    bio = _write_bio_database(tmp_path)
+    pd.DataFrame({'Gene': list('abcdefgh'), 'tpm': np.arange(8)}).to_pickle(bio / 'gtex_tissue_gene_tpm.pkl')
+    loader = ExperimentalDataLoader(str(tmp_path), use_cache=False)
+    loader.permute_selected_columns(random_seed=3)
+
+    permuted = loader.table_dict['df_gtex_tissue_gene_tpm']
+    indices = np.random.RandomState(3).permutation(8)
+    assert permuted['Gene'].tolist() == [list('abcdefgh')[i] for i in indices]
+    assert permuted['tpm'].tolist() == list(range(8))
@@ -0,0 +1,111 @@
+import io
+import logging
+import os
+import time
+
+import pytest
+
+from volta.executor import run_job
+from volta.output_capture import BoundedOutput, prune_spill_dir, redirect_output
+
+
+def _lines(n):
+    return [f"line {i:05d}\n" for i in range(n)]
+
+
+def test_small_output_is_kept_whole():
+    out = BoundedOutput(limit=1024)
+    for line in _lines(10):
+        out.write(line)
+    assert out.getvalue() == "".join(_lines(10))
+    assert not out.truncated
+
+
+def test_large_output_keeps_head_and_tail_lines(tmp_path):
+    lines = _lines(2000)
+    out = BoundedOutput(limit=1024, spill_dir=str(tmp_path))
+    for line in lines:
+        out.write(line)
+    value = out.getvalue()
+    out.close()
+    head, marker, tail = value.partition("[... ")
+    marker, _, tail = tail.partition(" ...]\n")
+    # whole lines on either side of the gap, from the start and the end of the output
+    assert head and "".join(lines).startswith(head) and head.endswith("\n")
+    assert tail and "".join(lines).endswith(tail)
+    assert len(head.encode()) <= 512 and len(tail.encode()) <= 512
+    dropped = int(marker.split()[0])
+    assert dropped == out.total_bytes - len(head.encode()) - len(tail.encode())
+    # the spill file has everything that was written
+    assert out.spill_path.startswith(str(tmp_path))
+    with open(out.spill_path) as f:
+        assert f.read() == "".join(lines)
+    assert out.usage() == {'output_bytes': out.total_bytes, 'output_dropped': out.dropped_bytes,
+                           'output_path': out.spill_path}
+
+
+def test_one_large_write_is_split_between_head_and_tail():
+    out = BoundedOutput(limit=100)
+    out.write("a" * 60 + "b" * 1000 + "c" * 60)
+    assert out.truncated
+    assert "".join(out._head) == "a" * 50
+    assert "".join(chunk for chunk, _ in out._tail) == "c" * 50
+
+
+def test_prune_spill_dir_by_age_and_count(tmp_path):
+    now = time.time()
+    for i in range(6):
+        path = tmp_path / f"output-{i}.txt"
+        path.write_text("x")
+        os.utime(path, (now - i * 60, now - i * 60))
+    os.utime(tmp_path / "output-5.txt", (now - 3 * 24 * 3600,) * 2)
+    (tmp_path / "other.txt").write_text("kept")
+    prune_spill_dir(str(tmp_path), max_files=3, max_age=24 * 3600)
+    assert sorted(os.listdir(tmp_path)) == ["other.txt", "output-0.txt", "output-1.txt", "output-2.txt"]
+
+
+def test_opening_a_spill_file_prunes_old_ones(tmp_path):
+    stale = tmp_path / "output-stale.txt"
+    stale.write_text("x")
+    os.utime(stale, (time.time() - 7 * 24 * 3600,) * 2)
+    out = BoundedOutput(limit=10, spill_dir=str(tmp_path))
+    out.write("y" * 100)
+    out.close()
+    assert not stale.exists()
+    assert os.listdir(tmp_path) == [os.path.basename(out.spill_path)]
+
+
+def test_unwritable_spill_dir_keeps_the_output(capsys):
+    out = BoundedOutput(limit=100, spill_dir='/proc/nonexistent/spill')
+    with redirect_output(out):
+        print("x" * 500)
+    value = out.getvalue()
+    out.close()
+    assert out.spill_dir is None and out.spill_path is None
+    assert value.startswith("x" * 50)
+    assert "bytes of output elided" in value
+    assert "could not spill" not in value
+
+
+def _run_in_repl(code):
+    from volta.react_utils import CustomPythonAstREPLTool
+    tool = CustomPythonAstREPLTool()
+    tool._set_globals({})
+    return tool._run(code)
+
+
+@pytest.mark.parametrize('run', [lambda code: run_job(code, {})[1], _run_in_repl],
+                         ids=['run_job', 'repl'])
+def test_logging_handler_gets_its_stream_back(run):
+    logger = logging.getLogger()
+    handler = logging.StreamHandler(io.StringIO())
+    logger.handlers.insert(0, handler)
+    previous_level = logger.level
+    logger.setLevel(logging.INFO)
+    try:
+        assert 'inside' in run("import logging\nlogging.info('inside')\nNone")
+        logging.info('after')
+        assert handler.stream.getvalue() == 'after\n'
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(previous_level)
@@ -0,0 +1,53 @@
+import pytest
+
+from volta.p_value import extract_p_value, parse_final_answer, parse_reports, report_p_value
+
+
+def test_report_lines_win_and_the_last_one_is_final(capsys):
+    report_p_value(0.2, "Shapiro-Wilk", 40)
+    report_p_value(3.5e-4, "Welch t-test", 40)
+    output = "Shapiro-Wilk p-value: 0.2\n" + capsys.readouterr().out
+    assert [report['test'] for report in parse_reports(output)] == ["Shapiro-Wilk", "Welch t-test"]
+    assert extract_p_value(output, anchored=True) == (repr(3.5e-4), 'report_p_value')
+
+
+def test_report_p_value_rejects_values_outside_0_1():
+    with pytest.raises(ValueError):
+        report_p_value(1.5)
+
+
+@pytest.mark.parametrize('text', [
+    'Shapiro-Wilk normality p-value: 0.21\nSpearman rho=0.62 (p-value < 0.001)',
+    "Levene's test p-value: 0.45\nWelch's t-test: t=12.3, p < 1e-10",
+    'The p-value is less than 0.05',
+    'Final Answer: p = 0.03, and the Welch test gave p <= 0.001',
+])
+def test_inequalities_are_left_to_the_llm_parser(text):
+    assert parse_final_answer(text) is None
+    assert extract_p_value(text) == (None, None)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Final Answer: the correlation is significant with a p-value of 3.50e-03', '3.50e-03'),
+    ('p-value: 0.012 ... Final Answer: p = 0.04 (p = 0.04)', '0.04'),
+    ('Final Answer: p_value = .5', '.5'),
+])
+def test_final_answer_p_value(text, expected):
+    assert extract_p_value(text, anchored=True) == (expected, 'regex')
+
+
+@pytest.mark.parametrize('text', [
+    'Final Answer: p-values of 0.01 and 0.2',
+    'Final Answer: p-value = 2.5',
+    'Final Answer: no test was run',
+])
+def test_ambiguous_or_invalid_answers_are_left_to_the_llm_parser(text):
+    assert extract_p_value(text) == (None, None)
+
+
+def test_anchored_ignores_p_values_printed_before_any_final_answer():
+    output = 'Shapiro-Wilk normality p-value: 0.21\nMann-Whitney U p-value: 0.003'
+    assert extract_p_value(output, anchored=True) == (None, None)
+    assert extract_p_value('Mann-Whitney U p-value: 0.003', anchored=True) == (None, None)
+    # a final answer in free text (e.g. of the ReAct agent) is still read unanchored
+    assert extract_p_value('The Mann-Whitney U test gives p = 0.003.') == ('0.003', 'regex')
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from volta.llm_cache import LLMCache
+from volta.rate_limit import RATE_LIMIT_DB_ENV, RATE_LIMITS_ENV, RateLimiter, export_rate_limits
+
+
+class _TokenModel(BaseChatModel):
+    """Answers every prompt with 10 input and 2 output tokens."""
+
+    @property
+    def _llm_type(self) -> str:
+        return 'token-model'
+
+    def _result(self, messages):
+        message = AIMessage(content=f"echo {messages[-1].content}",
+                            usage_metadata={'input_tokens': 10, 'output_tokens': 2, 'total_tokens': 12})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return self._result(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(0.05)
+        return self._result(messages)
+
+
+def _model(tmp_path, **kwargs):
+    limiter = RateLimiter(path=str(tmp_path / 'limits.sqlite'), requests_per_minute=6000,
+                          input_tokens_per_minute=10 ** 6, output_tokens_per_minute=10 ** 6)
+    model_limiter = limiter.for_model('test', 'token-model')
+    return limiter, _TokenModel(rate_limiter=model_limiter, callbacks=[model_limiter.handler], **kwargs)
+
+
+def test_concurrent_ainvoke_calls_are_all_charged(tmp_path):
+    limiter, model = _model(tmp_path, cache=False)
+
+    async def main():
+        await asyncio.gather(*(model.ainvoke(f"question {i}") for i in range(8)))
+
+    asyncio.run(main())
+    stats = limiter.stats()
+    assert stats['requests'] == 8
+    assert stats['input_tokens'] == 80
+    assert stats['output_tokens'] == 16
+
+
+def test_cache_hits_are_not_charged(tmp_path):
+    limiter, model = _model(tmp_path, cache=LLMCache(str(tmp_path / 'cache.sqlite')))
+    model.invoke("question")
+    model.invoke("question")
+    asyncio.run(model.ainvoke("question"))
+    stats = limiter.stats()
+    assert stats['requests'] == 1
+    assert stats['input_tokens'] == 10
+
+
+def test_aacquire_waits_on_the_event_loop(tmp_path):
+    limiter = RateLimiter(path=str(tmp_path / 'limits.sqlite'), requests_per_minute=120)
+    model_limiter = limiter.for_model('test', 'token-model')
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(loop.time())
+                await asyncio.sleep(0.05)
+
+        task = asyncio.create_task(ticker())
+        # 120 per minute: the bucket starts full, the 121st request waits about 0.5 s
+        for _ in range(121):
+            assert await model_limiter.aacquire()
+        task.cancel()
+        return ticks
+
+    ticks = asyncio.run(main())
+    stats = limiter.stats()
+    assert stats['requests'] == 121 and stats['waits'] == 1
+    # the loop kept running other coroutines during the wait
+    assert len(ticks) >= 5
+
+
+def test_exported_rate_limits_reach_subprocesses(tmp_path, monkeypatch):
+    monkeypatch.delenv(RATE_LIMITS_ENV, raising=False)
+    monkeypatch.delenv(RATE_LIMIT_DB_ENV, raising=False)
+    path = str(tmp_path / 'limits.sqlite')
+    assert export_rate_limits("requests_per_minute=50,output_tokens_per_minute=8000", path) == \
+        {'requests_per_minute': 50.0, 'output_tokens_per_minute': 8000.0}
+    child = ("from volta.rate_limit import active_rate_limiter\n"
+             "limiter = active_rate_limiter()\n"
+             "print(limiter.path, limiter.defaults['requests_per_minute'], limiter.defaults['output_tokens_per_minute'])")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, '-c', child], capture_output=True, text=True, check=True,
+                            env=dict(os.environ, PYTHONPATH=root)).stdout
+    assert output.split() == [path, '50.0', '8000.0']
+
+
+def test_export_rate_limits_rejects_unknown_names(monkeypatch):
+    monkeypatch.delenv(RATE_LIMITS_ENV, raising=False)
+    with pytest.raises(ValueError):
+        export_rate_limits("requests_per_second=5")
+    assert RATE_LIMITS_ENV not in os.environ
+    assert export_rate_limits(None) == {}
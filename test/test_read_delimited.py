@@ -0,0 +1,41 @@
+import json
+
+import pandas as pd
+import pytest
+
+from volta.utils import read_delimited
+
+CASES = {
+    'index_and_duplicates': ",a,a,b\n0,1,2,x\n1,3,4,y\n",
+    'wide_integers': "id,v\n12345678901234567890,1.5\n18446744073709551615,2.5\n",
+    'plain': "a,b,c\n1,2.5,x\n2,,y\n3,4.25,\n",
+    'tabs': "a\tb\n1\t2020-01-01\n2\t2020-01-02\n",
+}
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+@pytest.mark.parametrize('use_cache', [False, True])
+def test_read_delimited_matches_read_csv(tmp_path, name, use_cache):
+    path = tmp_path / f"{name}.csv"
+    path.write_text(CASES[name])
+    delimiter = '\t' if name == 'tabs' else ','
+    expected = pd.read_csv(path, delimiter=delimiter)
+    # a second read comes from the sidecar
+    for _ in range(2 if use_cache else 1):
+        df = read_delimited(str(path), delimiter=delimiter, use_cache=use_cache)
+        assert list(df.columns) == list(expected.columns)
+        assert list(df.dtypes) == list(expected.dtypes)
+        pd.testing.assert_frame_equal(df, expected)
+
+
+def test_sidecar_of_an_older_reader_is_replaced(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text(CASES['index_and_duplicates'])
+    read_delimited(str(path))
+    meta_path = tmp_path / '.volta_cache' / 'data.csv.json'
+    meta = json.loads(meta_path.read_text())
+    del meta['reader']
+    meta_path.write_text(json.dumps(meta))
+    df = read_delimited(str(path))
+    assert list(df.columns) == ['Unnamed: 0', 'a', 'a.1', 'b']
+    assert json.loads(meta_path.read_text())['reader'] == 2
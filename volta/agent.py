@@ -1,13 +1,17 @@
 # Standard Library Imports
+import asyncio
 import contextlib
+import inspect
 import io
 import logging
 import os
 import re
 import sys
 import json
+import time
 import traceback
 import multiprocessing
+from functools import partial
 
 # Third-Party Imports
 import numpy as np
@@ -22,6 +26,7 @@ from pydantic import BaseModel, Field
 
 # LangChain and LangGraph Imports
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableLambda
 from langchain_core.utils.interactive_env import is_interactive_env
 from langchain_core.messages.base import get_msg_title_repr
 from langgraph.prebuilt import create_react_agent
@@ -31,9 +36,22 @@ from langgraph.graph.message import add_messages
 # Logging Configuration
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
-from .utils import get_llm, pretty_print, KnowledgeGraphLoader
+from .utils import get_llm, pretty_print, KnowledgeGraphLoader, LazyNamespace
 from .prompt_utils import *
 from volta.react_agent import ReactAgent
+from volta.raman_cube import get_raman_cube
+from volta.schema_digest import build_schema_digest
+from volta.data_registry import default_registry
+from volta.executor import ExecutorPool, ForkedExecution, record_usage
+from volta.import_check import check_imports
+from volta.output_capture import DEFAULT_OUTPUT_LIMIT
+from volta.llm_cache import use_llm_cache
+from volta.rate_limit import use_rate_limits
+from volta.llm_registry import structured_output
+from volta.llm_usage import format_usage, llm_role, track_usage
+from volta.p_value import describe_report, extract_p_value, report_p_value  # report_p_value: resolved by generated code
+from volta.perf_lint import PerfLinter, table_stats
+from volta.execution_cache import open_execution_cache
 
 class TimeoutException(Exception):
     pass
@@ -211,8 +229,17 @@ def p_val_to_log_likelihood_ratio(p_val):
 
 class falsification_test_coding_agent:
 
-    def __init__(self, data, llm = "claude-3-5-sonnet-20241022", max_retry = 10, time_limit = 10, reflect = True, verbose = True, llm_approx = False, domain="biology", port=None, api_key="EMPTY"):
+    def __init__(self, data, llm = "claude-3-5-sonnet-20241022", max_retry = 10, time_limit = 10, reflect = True, verbose = True, llm_approx = False, domain="biology", port=None, api_key="EMPTY", data_session=None, executor_pool=None, execution_cache=None, memory_limit=None, cpu_limit=None, output_limit=DEFAULT_OUTPUT_LIMIT, perf_linter=None):
         self.data = data
+        self.data_session = data_session
+        self.executor_pool = executor_pool
+        self.execution_cache = execution_cache
+        # ceilings for code run without a pool (bytes, CPU seconds); a pool applies its own
+        self.memory_limit = memory_limit
+        self.cpu_limit = cpu_limit
+        self.output_limit = output_limit
+        self.perf_linter = perf_linter  # sends code estimated to exceed time_limit back before running it
+        self.log = None  # set by go(); receives the usage of each execution
         self.llm = get_llm(llm, temperature=0.0, port=port, api_key=api_key)
         print(llm)
         self.time_limit = time_limit
@@ -229,7 +256,7 @@ class falsification_test_coding_agent:
         )
     
         
-        self.tool_404_parser_llm = self.format_check_prompt | self.llm.with_structured_output(parser_yes_no)
+        self.tool_404_parser_llm = self.format_check_prompt | structured_output(self.llm, parser_yes_no)
         
         self.data_check_prompt = ChatPromptTemplate.from_messages(
             [
@@ -239,7 +266,7 @@ class falsification_test_coding_agent:
                 ("placeholder", "{messages}"),
             ]
         )
-        self.data_checker = self.data_check_prompt | self.llm.with_structured_output(data_input_check_result)
+        self.data_checker = self.data_check_prompt | structured_output(self.llm, data_input_check_result)
         
         self.max_retry = max_retry
         if reflect:
@@ -260,7 +287,7 @@ class falsification_test_coding_agent:
             ]
         )
 
-        structured_llm_claude = self.llm.with_structured_output(code, include_raw=True)
+        structured_llm_claude = structured_output(self.llm, code, include_raw=True)
 
         code_gen_chain = code_gen_prompt_claude | structured_llm_claude | parse_output
 
@@ -268,16 +295,7 @@ class falsification_test_coding_agent:
         flag = self.reflect
 
 
-        def generate(state: GraphState):
-            """
-            Generate a code solution
-
-            Args:
-                state (dict): The current graph state
-
-            Returns:
-                state (dict): New key added to state, generation
-            """
+        def start_generation(state: GraphState):
             if self.verbose:
                 print("---GENERATING CODE SOLUTION---")
 
@@ -294,18 +312,9 @@ class falsification_test_coding_agent:
                         "Now, try again. Invoke the code tool to structure the output with a prefix, imports and code block.",
                     )
                 ]
+            return messages, iterations
 
-            # Solution
-
-            for try_ in range(20):
-                code_solution = code_gen_chain.invoke(
-                    {"context": self.data, "messages": messages}
-                )
-                if code_solution:
-                    break
-                else:
-                    print('NoneType code_solution')
-
+        def finish_generation(code_solution, messages, iterations):
             messages += [
                 (
                     "assistant",
@@ -317,228 +326,321 @@ class falsification_test_coding_agent:
             iterations = iterations + 1
             return {"generation": code_solution, "messages": messages, "iterations": iterations}
 
-
-        def code_check(state: GraphState):
+        def generate(state: GraphState):
             """
-            Check code
+            Generate a code solution
 
             Args:
                 state (dict): The current graph state
 
             Returns:
-                state (dict): New key added to state, error
+                state (dict): New key added to state, generation
             """
-            if self.verbose:
-                print("---CHECKING CODE---")
+            messages, iterations = start_generation(state)
 
-            # State
+            # Solution
+
+            for try_ in range(20):
+                code_solution = code_gen_chain.invoke(
+                    {"context": self.data, "messages": messages}
+                )
+                if code_solution:
+                    break
+                else:
+                    print('NoneType code_solution')
+
+            return finish_generation(code_solution, messages, iterations)
+
+        async def agenerate(state: GraphState):
+            """generate() with the model awaited."""
+            messages, iterations = start_generation(state)
+            for try_ in range(20):
+                code_solution = await code_gen_chain.ainvoke(
+                    {"context": self.data, "messages": messages}
+                )
+                if code_solution:
+                    break
+                else:
+                    print('NoneType code_solution')
+            return finish_generation(code_solution, messages, iterations)
+
+        def failed_test(state: GraphState, message: str):
+            """Adds message to the conversation and marks the attempt as failed."""
             messages = state["messages"]
-            code_solution = state["generation"]
-            iterations = state["iterations"]
+            messages += [("user", message)]
+            return {
+                "generation": state["generation"],
+                "messages": messages,
+                "iterations": state["iterations"],
+                "error": "yes",
+                "status": "Failed test"
+            }
+
+        def check_before_run(state: GraphState):
+            """Import and performance checks; returns the failed state or None."""
+            if self.verbose:
+                print("---CHECKING CODE---")
 
             # Get solution components
+            code_solution = state["generation"]
             imports = code_solution.imports
             code = code_solution.code
 
             print(imports + '\n\n' + code)
 
-            # Check imports
-            try:
-                exec(imports)
-            except Exception as e:
+            # Check imports by resolving module specs; they are only imported in the sandbox
+            import_error = check_imports(imports)
+            if import_error is not None:
                 if self.verbose:
                     print("---CODE IMPORT CHECK: FAILED---")
-                error_message = [("user", f"Your solution failed the import test: {e}")]
-                messages += error_message
-                return {
-                    "generation": code_solution,
-                    "messages": messages,
-                    "iterations": iterations,
-                    "error": "yes",
-                    "status": "Failed test"
-                }
-            
-            data_check = self.data_checker.invoke({ "messages": [("user", imports + '\n\n' + code)]}).dict()
+                return failed_test(state, f"Your solution failed the import test: {import_error}")
+
+            # Estimate the run time from the table sizes before spending it
+            if self.perf_linter is not None:
+                perf_hint = self.perf_linter.review(imports + '\n\n' + code, self.time_limit * 60)
+                if perf_hint is not None:
+                    if self.verbose:
+                        print("---CODE PERFORMANCE CHECK: FAILED---")
+                        print(perf_hint)
+                    if self.log is not None:
+                        self.log['executor'].append(perf_hint)
+                    return failed_test(state, f"Your solution failed the performance check: {perf_hint}")
+            return None
+
+        def check_data(state: GraphState, data_check):
             if data_check['fake_data_entries'].lower() == "yes":
                 print("Data input check failed")
-                messages += [("user", "Your solution failed the data input test: Do NOT make up fake data entries.")]
-                return {
-                    "generation": code_solution,
-                    "messages": messages,
-                    "iterations": iterations,
-                    "error": "yes",
-                    "status": "Failed test"
-                }
+                return failed_test(state, "Your solution failed the data input test: Do NOT make up fake data entries.")
+            return None
 
+        def start_run():
             # Set up logging and output capture as before
             logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%H:%M:%S')
             logging.getLogger().setLevel(logging.INFO)
-            
-            # Function to run the code and capture the exception and output within the thread
-            def run_code(queue):
-                output_capture = io.StringIO()
-                try:
-                    full_code = imports + '\n\n' + code
-                    exec_globals = globals().copy()
-                    exec_globals.update(__builtins__)
-
-                    with contextlib.redirect_stdout(output_capture), contextlib.redirect_stderr(output_capture):
-                        logging.getLogger().handlers[0].stream = output_capture
-                        exec(full_code, exec_globals)
-                except Exception as e:
-                    # Capture the exception, format the traceback, and put it in the queue
-                    error_message = f"{traceback.format_exc()}"
-                    queue.put(error_message)  # Place error message in queue for retrieval
-                else:
-                    # Put successful output in the queue if no error occurred
-                    queue.put(output_capture.getvalue())
 
-            queue = multiprocessing.Queue()
-            process = multiprocessing.Process(target=run_code, args=(queue,))
-            process.start()
-            process.join(timeout=self.time_limit * 60)
+        def cached_run(lookup):
+            """(cache_key, cached output or None) from the result of an execution-cache lookup."""
+            cache_key, captured_output, _ = lookup
+            if captured_output is not None:
+                print("Reusing the cached output of an identical run.")
+            return cache_key, captured_output
+
+        def finish_run(cache_key, status, captured_output, usage):
+            record_usage(self.log, usage)
+            if status == 'ok' and self.execution_cache is not None and "Traceback" not in captured_output:
+                self.execution_cache.store(cache_key, captured_output)
 
-            if process.is_alive():
+        def run_code(full_code):
+            """Runs the code (or reuses a cached run); returns (status, captured_output).
+
+            Free names are fingerprinted for the execution cache by the process that runs
+            the code, so the tables are never loaded or hashed here.
+            """
+            start_run()
+            cache_key = None
+            if self.executor_pool is not None:
+                if self.execution_cache is not None:
+                    cache_key, captured_output = cached_run(self.execution_cache.lookup(
+                        full_code, fingerprints=partial(self.executor_pool.fingerprints, timeout=self.time_limit * 60)))
+                    if captured_output is not None:
+                        return 'ok', captured_output
+                status, captured_output, usage = self.executor_pool.run(full_code, timeout=self.time_limit * 60)
+            else:
+                execution = self._fork_execution(full_code)
+                try:
+                    if self.execution_cache is not None:
+                        cache_key, captured_output = cached_run(self.execution_cache.lookup(full_code, fingerprints=execution.fingerprints))
+                        if captured_output is not None:
+                            return 'ok', captured_output
+                    status, captured_output, usage = execution.run()
+                finally:
+                    execution.cancel()
+            finish_run(cache_key, status, captured_output, usage)
+            return status, captured_output
+
+        async def arun_code(full_code):
+            """run_code() with the execution awaited through the executor pool."""
+            start_run()
+            cache_key = None
+            if self.executor_pool is not None:
+                if self.execution_cache is not None:
+                    cache_key, captured_output = cached_run(await self.execution_cache.alookup(
+                        full_code, partial(self.executor_pool.afingerprints, timeout=self.time_limit * 60)))
+                    if captured_output is not None:
+                        return 'ok', captured_output
+                status, captured_output, usage = await self.executor_pool.arun(full_code, timeout=self.time_limit * 60)
+            else:
+                execution = self._fork_execution(full_code)
+                try:
+                    if self.execution_cache is not None:
+                        cache_key, captured_output = cached_run(await self.execution_cache.alookup(
+                            full_code, execution.afingerprints))
+                        if captured_output is not None:
+                            return 'ok', captured_output
+                    status, captured_output, usage = await execution.arun()
+                finally:
+                    execution.cancel()
+            finish_run(cache_key, status, captured_output, usage)
+            return status, captured_output
+
+        def check_run(state: GraphState, status, captured_output):
+            """Time limit, traceback and missing output checks; returns the failed state or None."""
+            if status == 'timeout':
                 print("Process is taking too long... terminating.")
-                process.terminate()
-                process.join()  # Ensure process is cleaned up properly after termination
                 if self.verbose:
                     print("---CODE BLOCK CHECK: FAILED---")
                     print("Execution surpassed time limit, please come up with a more efficient implementation.")
-                    error_message = [("user", "Your solution failed due to time limit: Execution surpassed time limit, please come up with a more efficient implementation.")]
-                    messages += error_message
-                    return {
-                        "generation": code_solution,
-                        "messages": messages,
-                        "iterations": iterations,
-                        "error": "yes",
-                        "status": "Failed test"
-                    }
-            else:
-                # Check if queue contains an error message or the actual output
-                if not queue.empty():
-                    captured_output = queue.get()
-                    if "Traceback" in captured_output:  # Check if result is an error
-                        print("---CODE BLOCK CHECK: FAILED---")
-                        print(captured_output)  # Print the error message
-                        messages += [("user", f"Your solution failed the code execution test: {captured_output}")]
-                        return {
-                            "generation": code_solution,
-                            "messages": messages,
-                            "iterations": iterations,
-                            "error": "yes",
-                            "status": "Failed test"
-                        }
-                    else:
-                        print("Process completed within the time limit.")
-                        print("Captured Output:", captured_output)
-                else:
-                    print("No output was captured.")
-                    messages += [("user", "Your solution failed the code execution test: No output was captured.")]
-                    return {
-                        "generation": code_solution,
-                        "messages": messages,
-                        "iterations": iterations,
-                        "error": "yes",
-                        "status": "Failed test"
-                    }
-
-            if self.llm_approx:
-                #print("Captured output: ", captured_output)
-                if len(captured_output) == 0:
-                    if self.verbose:
-                        print("---NO OUTPUT RETURNED---")
-                    error_message = [("user", f"Your solution failed the output test, which tests if the result returns any thing for falsification test: " + captured_output)]
-                    messages += error_message
-                    return {
-                        "generation": code_solution,
-                        "messages": messages,
-                        "iterations": iterations,
-                        "error": "yes",
-                        "status": "Failed test"
-                    }
+                return failed_test(state, "Your solution failed due to time limit: Execution surpassed time limit, please come up with a more efficient implementation.")
+            elif captured_output is not None:
+                if "Traceback" in captured_output:  # Check if result is an error
+                    print("---CODE BLOCK CHECK: FAILED---")
+                    print(captured_output)  # Print the error message
+                    return failed_test(state, f"Your solution failed the code execution test: {captured_output}")
                 else:
-                    if self.verbose:
-                        print("---NO CODE TEST FAILURES---")
-
-                    return {
-                        "generation": code_solution,
-                        "messages": messages,
-                        "iterations": iterations,
-                        "error": "no",
-                        "status": "success",
-                        "captured_output": captured_output
-                    }
+                    print("Process completed within the time limit.")
+                    print("Captured Output:", captured_output)
+            else:
+                print("No output was captured.")
+                return failed_test(state, "Your solution failed the code execution test: No output was captured.")
+            return None
 
+        def check_llm_approx_output(state: GraphState, captured_output):
+            #print("Captured output: ", captured_output)
+            if len(captured_output) == 0:
+                if self.verbose:
+                    print("---NO OUTPUT RETURNED---")
+                return failed_test(state, f"Your solution failed the output test, which tests if the result returns any thing for falsification test: " + captured_output)
             else:
-                #print("Captured output: ", captured_output)
-                # check if example produces reasonable output, or just return no result found
-                if len(captured_output) == 0:
-                    output = 'No'
-                else:      
-                    checker = self.tool_404_parser_llm.invoke({ "messages": [("user", captured_output)]}).dict()
-                    output = checker['check_output_error']
-                    try:
-                        p_val = float(checker['p_val'])
-                    except:
-                        print('Error parsing p_value')
-                        print(checker['p_val'])
-                        output = 'No'
-                    
-                if output == 'No':
-                    if self.verbose:
-                        print("---P-value OUTPUT CHECK: FAILED---")
-                    error_message = [("user", f"Your solution failed the output test, which tests if the result returns any p-value for falsification test: " + captured_output)]
-                    messages += error_message
-                    return {
-                        "generation": code_solution,
-                        "messages": messages,
-                        "iterations": iterations,
-                        "error": "yes",
-                        "status": "Failed test"
-                    }
-
-                p_val = float(checker['p_val'])
-
-                if np.isnan(p_val):
-                    if self.verbose:
-                        print("---P-value is nan: FAILED---")
-                    error_message = [("user", f"Your solution p-value for falsification test is nan: " + captured_output)]
-                    messages += error_message
-                    return {
-                        "generation": code_solution,
-                        "messages": messages,
-                        "iterations": iterations,
-                        "error": "yes",
-                        "status": "Failed test"
-                    }
-
-                if p_val == 0:
-                    if self.verbose:
-                        print("---P-value is 0: FAILED---")
-                    error_message = [("user", f"Your solution p-value for falsification test is exact 0 - supposedly wrong: " + captured_output)]
-                    messages += error_message
-                    return {
-                        "generation": code_solution,
-                        "messages": messages,
-                        "iterations": iterations,
-                        "error": "yes",
-                        "status": "Failed test"
-                    }
-
-                # No errors
                 if self.verbose:
                     print("---NO CODE TEST FAILURES---")
+
                 return {
-                    "generation": code_solution,
-                    "messages": messages,
-                    "iterations": iterations,
+                    "generation": state["generation"],
+                    "messages": state["messages"],
+                    "iterations": state["iterations"],
                     "error": "no",
                     "status": "success",
-                    "captured_output": captured_output,
-                    "p_val": checker['p_val']
+                    "captured_output": captured_output
                 }
 
+        def check_p_value(state: GraphState, captured_output, checker, source):
+            """Checks the p-value read from the output (checker is None if there was no output)."""
+            # check if example produces reasonable output, or just return no result found
+            if checker is None:
+                output = 'No'
+            else:
+                output = checker['check_output_error']
+                try:
+                    p_val = float(checker['p_val'])
+                except:
+                    print('Error parsing p_value')
+                    print(checker['p_val'])
+                    output = 'No'
+                if self.log is not None:
+                    self.log['executor'].append(f"P-value source: {source}")
+
+            if output == 'No':
+                if self.verbose:
+                    print("---P-value OUTPUT CHECK: FAILED---")
+                return failed_test(state, f"Your solution failed the output test, which tests if the result returns any p-value for falsification test: " + captured_output)
+
+            p_val = float(checker['p_val'])
+
+            if np.isnan(p_val):
+                if self.verbose:
+                    print("---P-value is nan: FAILED---")
+                return failed_test(state, f"Your solution p-value for falsification test is nan: " + captured_output)
+
+            if p_val == 0:
+                if self.verbose:
+                    print("---P-value is 0: FAILED---")
+                return failed_test(state, f"Your solution p-value for falsification test is exact 0 - supposedly wrong: " + captured_output)
+
+            # No errors
+            if self.verbose:
+                print("---NO CODE TEST FAILURES---")
+            return {
+                "generation": state["generation"],
+                "messages": state["messages"],
+                "iterations": state["iterations"],
+                "error": "no",
+                "status": "success",
+                "captured_output": captured_output,
+                "p_val": checker['p_val']
+            }
+
+        def read_p_value(captured_output):
+            """(checker, source) read without the LLM; checker is None when the LLM parser is needed."""
+            # report_p_value() lines (or a p-value after "Final Answer:") are read directly;
+            # other printed p-values may belong to assumption checks, so the LLM parser
+            # reads the output then
+            parsed_p_val, source = extract_p_value(captured_output, anchored=True)
+            if parsed_p_val is not None:
+                return {'check_output_error': 'Yes', 'p_val': parsed_p_val}, source
+            return None, 'llm'
+
+        def code_check(state: GraphState):
+            """
+            Check code
+
+            Args:
+                state (dict): The current graph state
+
+            Returns:
+                state (dict): New key added to state, error
+            """
+            failed = check_before_run(state)
+            if failed is not None:
+                return failed
+
+            full_code = state["generation"].imports + '\n\n' + state["generation"].code
+            data_check = self.data_checker.invoke({ "messages": [("user", full_code)]}).dict()
+            failed = check_data(state, data_check)
+            if failed is not None:
+                return failed
+
+            status, captured_output = run_code(full_code)
+            failed = check_run(state, status, captured_output)
+            if failed is not None:
+                return failed
+
+            if self.llm_approx:
+                return check_llm_approx_output(state, captured_output)
+            checker, source = None, None
+            if len(captured_output) > 0:
+                checker, source = read_p_value(captured_output)
+                if checker is None:
+                    with llm_role('p_value_parser'):
+                        checker = self.tool_404_parser_llm.invoke({ "messages": [("user", captured_output)]}).dict()
+            return check_p_value(state, captured_output, checker, source)
+
+        async def acode_check(state: GraphState):
+            """code_check() with the model calls and the execution awaited."""
+            failed = check_before_run(state)
+            if failed is not None:
+                return failed
+
+            full_code = state["generation"].imports + '\n\n' + state["generation"].code
+            data_check = (await self.data_checker.ainvoke({ "messages": [("user", full_code)]})).dict()
+            failed = check_data(state, data_check)
+            if failed is not None:
+                return failed
+
+            status, captured_output = await arun_code(full_code)
+            failed = check_run(state, status, captured_output)
+            if failed is not None:
+                return failed
+
+            if self.llm_approx:
+                return check_llm_approx_output(state, captured_output)
+            checker, source = None, None
+            if len(captured_output) > 0:
+                checker, source = read_p_value(captured_output)
+                if checker is None:
+                    with llm_role('p_value_parser'):
+                        checker = (await self.tool_404_parser_llm.ainvoke({ "messages": [("user", captured_output)]})).dict()
+            return check_p_value(state, captured_output, checker, source)
+
 
         def reflect(state: GraphState):
             """
@@ -567,6 +669,17 @@ class falsification_test_coding_agent:
             messages += [("assistant", f"Here are reflections on the error: {reflections}")]
             return {"generation": code_solution, "messages": messages, "iterations": iterations}
 
+        async def areflect(state: GraphState):
+            """reflect() with the model awaited."""
+            if self.verbose:
+                print("---GENERATING CODE SOLUTION---")
+            messages = state["messages"]
+            reflections = await code_gen_chain.ainvoke(
+                {"context": self.data, "messages": messages}
+            )
+            messages += [("assistant", f"Here are reflections on the error: {reflections}")]
+            return {"generation": state["generation"], "messages": messages, "iterations": state["iterations"]}
+
 
         ### Edges
 
@@ -601,9 +714,10 @@ class falsification_test_coding_agent:
         workflow = StateGraph(GraphState)
 
         # Define the nodes
-        workflow.add_node("generate", generate)  # generation solution
-        workflow.add_node("check_code", code_check)  # check code
-        workflow.add_node("reflect", reflect)  # reflect
+        # each node has an async twin, used when the graph runs through ago()
+        workflow.add_node("generate", RunnableLambda(generate, afunc=agenerate))  # generation solution
+        workflow.add_node("check_code", RunnableLambda(code_check, afunc=acode_check))  # check code
+        workflow.add_node("reflect", RunnableLambda(reflect, afunc=areflect))  # reflect
 
         # Build graph
         workflow.set_entry_point("generate")
@@ -620,17 +734,41 @@ class falsification_test_coding_agent:
         workflow.add_edge("reflect", "generate")
         self.app = workflow.compile()
 
+    def _fork_execution(self, full_code):
+        """Starts a ForkedExecution of code; used when no executor pool is configured."""
+        def make_globals():
+            # tables come from the session; this module's imports stay visible without copying them
+            if self.data_session is not None:
+                return self.data_session.namespace(fallback=globals())
+            return LazyNamespace(fallback=globals())
+
+        return ForkedExecution(make_globals, full_code, timeout=self.time_limit * 60,
+                               limits=(self.memory_limit, self.cpu_limit, self.output_limit))
+
     def go(self, question, log = None):
         print(question)
         self.question = question
+        self.log = log
         config = {"recursion_limit": 500}
         graph = self.app.invoke({"messages": [("user", question)], "iterations": 0}, config = config)
         #solution = graph["generation"]
         return graph
 
+    async def ago(self, question, log = None):
+        """go() as a coroutine: model calls are awaited and the code runs through the executor pool."""
+        print(question)
+        self.question = question
+        self.log = log
+        config = {"recursion_limit": 500}
+        return await self.app.ainvoke({"messages": [("user", question)], "iterations": 0}, config = config)
+
 class falsification_test_react_agent:
-    def __init__(self, data_loader, llm = "claude-3-5-sonnet-20241022", max_retry = 10, domain="biology", prompt_revision = False, port=None, api_key="EMPTY"):
+    def __init__(self, data_loader, llm = "claude-3-5-sonnet-20241022", max_retry = 10, domain="biology", prompt_revision = False, port=None, api_key="EMPTY", data_session=None, execution_cache=None, time_limit = None, memory_limit = None, cpu_limit = None, output_limit = DEFAULT_OUTPUT_LIMIT, perf_linter = None):
         self.data_loader = data_loader
+        self.data_session = data_session
+        self.execution_cache = execution_cache
+        self.perf_linter = perf_linter
+        self.dataset_desc = None  # overrides data_loader.data_desc in prompts when set
         self.llm = get_llm(llm, temperature=0.0, port=port, api_key=api_key)
         self.domain = domain
         self.max_retry = max_retry
@@ -640,6 +778,11 @@ class falsification_test_react_agent:
             prompt_revision=prompt_revision,
             port=port,
             api_key=api_key,
+            # with a time (minutes), memory (MB) or CPU (seconds) limit, actions run in a restartable kernel process
+            action_time_limit=time_limit * 60 if time_limit is not None else None,
+            memory_limit=memory_limit * 2**20 if memory_limit is not None else None,
+            cpu_limit=cpu_limit,
+            output_limit=output_limit,
         )
         
         self.pvalue_check_prompt = ChatPromptTemplate.from_messages(
@@ -652,9 +795,11 @@ class falsification_test_react_agent:
         )
     
         
-        self.pvalue_parser = self.pvalue_check_prompt | self.llm.with_structured_output(parser_yes_no)
+        self.pvalue_parser = self.pvalue_check_prompt | structured_output(self.llm, parser_yes_no)
     
-    def go(self, question, log = None):
+    @staticmethod
+    def _test_spec(question):
+        """JSON spec of the falsification test described in question; None if it cannot be parsed."""
         def parse_falsification_test(input_string):
             # Define the regex pattern to capture each field, allowing for variable spacing
             pattern = (
@@ -687,83 +832,147 @@ class falsification_test_react_agent:
         if not falsification_test:
             print("Failed to parse Falsification Test")
             print(question)
-            return {
-                "error": "yes",
-                "status": "Failed test",
-                "captured_output": None,
-                "p_val": None,
-            }
+            return None
         
-        test_spec = json.dumps(falsification_test, indent=4)
+        return json.dumps(falsification_test, indent=4)
+
+    def _generate_kwargs(self):
+        return dict(dataset_desc=self.dataset_desc, data_session=self.data_session, execution_cache=self.execution_cache, perf_linter=self.perf_linter)
+
+    def _check_attempt(self, captured_output, parsed_output, source, reports, log):
+        """Checks the p-value of one attempt; returns the result, or None to retry."""
+        print(f"P-value source: {source}")
+        log['executor'].append(f"P-value source: {source}" + (f" - {describe_report(reports[-1])}" if source == 'report_p_value' and reports else ""))
+        
+        if 'check_output_error' in parsed_output and parsed_output['check_output_error'] and parsed_output['check_output_error'].strip().lower() == "no":
+            print("---P-value OUTPUT CHECK: FAILED---")
+            print("---DECISION: RE-TRY SOLUTION---")
+            log['executor'].append("P-value OUTPUT CHECK: FAILED - Retry Solution")
+            return None
+        p_val = float(parsed_output['p_val'])
+        
+        if np.isnan(p_val):
+            print("---P-value is nan: FAILED---")
+            print("---DECISION: RE-TRY SOLUTION---")
+            log['executor'].append("P-value is nan: FAILED - Retry Solution")
+            return None
+
+        if p_val == 0:
+            print("---P-value is 0: FAILED---")
+            print("---DECISION: RE-TRY SOLUTION---")
+            log['executor'].append("P-value is 0: FAILED - Retry Solution")
+            return None
+
+        # No errors
+        print("---NO CODE TEST FAILURES---")
+        print("---DECISION: FINISH---")
+        log['executor'].append("NO CODE TEST FAILURES - FINISH")
+        log['executor'].append(f"P-value: {p_val}")
+        return {
+            "error": "no",
+            "status": "success",
+            "captured_output": captured_output,
+            "p_val": parsed_output['p_val'],
+        }
+
+    def _failed(self, log=None):
+        if log is not None:
+            print(f"Falsification Test exceeded maximum number of retries; max_retries={self.max_retry}")
+            print("---DECISION: FINISH---")
+            log['executor'].append(f"Falsification Test exceeded maximum number of retries; max_retries={self.max_retry}")
+        return {
+            "error": "yes",
+            "status": "Failed test",
+            "captured_output": None,
+            "p_val": None,
+        }
+
+    def _no_output(self, log):
+        print("---No Captured Output---")
+        print("---DECISION: RE-TRY SOLUTION---")
+        log['executor'].append("No Captured Output - Retry Solution")
+
+    def _attempt_failed(self, e, log):
+        print(f"Falsification Test failed with the following error: {e}")
+        print(traceback.format_exc())
+        print("---DECISION: RE-TRY SOLUTION---")
+        log['executor'].append(f"Falsification Test failed with the following error: {e}")
+
+    def go(self, question, log = None):
+        test_spec = self._test_spec(question)
+        if test_spec is None:
+            return self._failed()
         
         for _ in range(self.max_retry):
             try:
-                captured_output = self.agent.generate(self.data_loader, test_spec, self.domain, log)
+                captured_output = self.agent.generate(self.data_loader, test_spec, self.domain, log, **self._generate_kwargs())
                 if not captured_output:
-                    print("---No Captured Output---")
-                    print("---DECISION: RE-TRY SOLUTION---")
-                    log['executor'].append("No Captured Output - Retry Solution")
+                    self._no_output(log)
                     continue
                 
-                for _ in range(10):
-                    parsed_output = self.pvalue_parser.invoke({ "messages": [("user", captured_output)]}).dict()
-                    if parsed_output:
-                        print(parsed_output)
-                        #log['executor'].append(f"Check Output Error: {parsed_output['check_output_error']}, P-Value: {parsed_output['p_val']}")
-                        break
-                
-                if 'check_output_error' in parsed_output and parsed_output['check_output_error'] and parsed_output['check_output_error'].strip().lower() == "no":
-                    print("---P-value OUTPUT CHECK: FAILED---")
-                    print("---DECISION: RE-TRY SOLUTION---")
-                    log['executor'].append("P-value OUTPUT CHECK: FAILED - Retry Solution")
-                    continue
-                p_val = float(parsed_output['p_val'])
-                
-                if np.isnan(p_val):
-                    print("---P-value is nan: FAILED---")
-                    print("---DECISION: RE-TRY SOLUTION---")
-                    log['executor'].append("P-value is nan: FAILED - Retry Solution")
-                    continue
+                # report_p_value() calls made in the REPL come first, then the p-value stated
+                # in the Final Answer; the LLM parser is only asked when neither gives one
+                reports = self.agent.p_value_reports
+                p_val, source = extract_p_value(captured_output, reports)
+                if p_val is not None:
+                    parsed_output = {'check_output_error': 'Yes', 'p_val': p_val}
+                else:
+                    source = 'llm'
+                    for _ in range(10):
+                        with llm_role('p_value_parser'):
+                            parsed_output = self.pvalue_parser.invoke({ "messages": [("user", captured_output)]}).dict()
+                        if parsed_output:
+                            print(parsed_output)
+                            #log['executor'].append(f"Check Output Error: {parsed_output['check_output_error']}, P-Value: {parsed_output['p_val']}")
+                            break
+                result = self._check_attempt(captured_output, parsed_output, source, reports, log)
+                if result is not None:
+                    return result
+                    
+            except Exception as e:
+                self._attempt_failed(e, log)
+        
+        return self._failed(log)
 
-                if p_val == 0:
-                    print("---P-value is 0: FAILED---")
-                    print("---DECISION: RE-TRY SOLUTION---")
-                    log['executor'].append("P-value is 0: FAILED - Retry Solution")
+    async def ago(self, question, log = None):
+        """go() as a coroutine; the ReAct loop and the p-value parser are awaited."""
+        test_spec = self._test_spec(question)
+        if test_spec is None:
+            return self._failed()
+        
+        for _ in range(self.max_retry):
+            try:
+                captured_output = await self.agent.agenerate(self.data_loader, test_spec, self.domain, log, **self._generate_kwargs())
+                if not captured_output:
+                    self._no_output(log)
                     continue
-
-                # No errors
-                print("---NO CODE TEST FAILURES---")
-                print("---DECISION: FINISH---")
-                log['executor'].append("NO CODE TEST FAILURES - FINISH")
-                log['executor'].append(f"P-value: {p_val}")
-                return {
-                    "error": "no",
-                    "status": "success",
-                    "captured_output": captured_output,
-                    "p_val": parsed_output['p_val'],
-                }
+                
+                reports = self.agent.p_value_reports
+                p_val, source = extract_p_value(captured_output, reports)
+                if p_val is not None:
+                    parsed_output = {'check_output_error': 'Yes', 'p_val': p_val}
+                else:
+                    source = 'llm'
+                    for _ in range(10):
+                        with llm_role('p_value_parser'):
+                            parsed_output = (await self.pvalue_parser.ainvoke({ "messages": [("user", captured_output)]})).dict()
+                        if parsed_output:
+                            print(parsed_output)
+                            break
+                result = self._check_attempt(captured_output, parsed_output, source, reports, log)
+                if result is not None:
+                    return result
                     
             except Exception as e:
-                print(f"Falsification Test failed with the following error: {e}")
-                print(traceback.format_exc())
-                print("---DECISION: RE-TRY SOLUTION---")
-                log['executor'].append(f"Falsification Test failed with the following error: {e}")
+                self._attempt_failed(e, log)
         
-        print(f"Falsification Test exceeded maximum number of retries; max_retries={self.max_retry}")
-        print("---DECISION: FINISH---")
-        log['executor'].append(f"Falsification Test exceeded maximum number of retries; max_retries={self.max_retry}")
-        return {
-            "error": "yes",
-            "status": "Failed test",
-            "captured_output": None,
-            "p_val": None,
-        }
+        return self._failed(log)
         
 
 class likelihood_estimation_agent:
     def __init__(self, llm = 'claude-3-5-sonnet-20241022', port=None, api_key="EMPTY"):
         self.llm = get_llm(llm, port=port, api_key=api_key)
-        self.output_parser = self.llm.with_structured_output(LogLikelihoodRatioInput)
+        self.output_parser = structured_output(self.llm, LogLikelihoodRatioInput)
 
     def go(self, main_hypothesis, falsification_test, data):
         prompt_modifier = get_likelihood_estimation_agent_prompt(main_hypothesis, falsification_test, data)
@@ -785,6 +994,21 @@ class likelihood_estimation_agent:
         }
         return result
 
+    async def ago(self, main_hypothesis, falsification_test, data):
+        """go() with the model calls awaited."""
+        prompt_modifier = get_likelihood_estimation_agent_prompt(main_hypothesis, falsification_test, data)
+        self.app = create_react_agent(self.llm, [])
+
+        config = {"recursion_limit": 500}
+        inputs = {"messages": [("user", prompt_modifier)]}
+        async for s in self.app.astream(inputs, stream_mode="values", config = config):
+            pretty_print(s["messages"][-1])
+        res = await self.output_parser.ainvoke(s["messages"][-1].content)
+        return {
+            'likelihood_h1': res.likelihood_h1,
+            'likelihood_h0': res.likelihood_h0
+        }
+
 
 class reference_agent:
     """
@@ -802,7 +1026,7 @@ class reference_agent:
             ("system", get_reference_agent_system_prompt(self.domain)),
             ("human", "{input}")
         ])
-        self.output_parser = self.llm.with_structured_output(reference_check_result)
+        self.output_parser = structured_output(self.llm, reference_check_result)
 
     def go(self, hypothesis, log=None):
         """
@@ -821,6 +1045,53 @@ class reference_agent:
         if log is None:
             log = {'reference_agent': []}
 
+        prior_knowledge, prior_knowledge_summary, inputs = self._query(hypothesis, log)
+
+        # Get structured analysis from LLM
+        self.app = create_react_agent(self.llm, [])
+        config = {"recursion_limit": 500}
+
+        for s in self.app.stream(inputs, stream_mode="values", config=config):
+            self._log_message(s["messages"][-1], log)
+
+        # Parse the structured output
+        reference_check = None
+        for _ in range(10):
+            try:
+                reference_check = self.output_parser.invoke(s["messages"][-1].content)
+                if reference_check:
+                    break
+            except Exception as e:
+                print(f"Error parsing reference check output: {e}")
+
+        return self._result(prior_knowledge, prior_knowledge_summary, reference_check, log)
+
+    async def ago(self, hypothesis, log=None):
+        """go() with the model calls awaited."""
+        if log is None:
+            log = {'reference_agent': []}
+
+        prior_knowledge, prior_knowledge_summary, inputs = self._query(hypothesis, log)
+
+        self.app = create_react_agent(self.llm, [])
+        config = {"recursion_limit": 500}
+
+        async for s in self.app.astream(inputs, stream_mode="values", config=config):
+            self._log_message(s["messages"][-1], log)
+
+        reference_check = None
+        for _ in range(10):
+            try:
+                reference_check = await self.output_parser.ainvoke(s["messages"][-1].content)
+                if reference_check:
+                    break
+            except Exception as e:
+                print(f"Error parsing reference check output: {e}")
+
+        return self._result(prior_knowledge, prior_knowledge_summary, reference_check, log)
+
+    def _query(self, hypothesis, log):
+        """Queries the knowledge graph; returns the prior knowledge, its summary and the agent's input."""
         to_print = [get_msg_title_repr("Reference Agent", bold=is_interactive_env())]
         print(to_print[0])
 
@@ -839,30 +1110,16 @@ class reference_agent:
 
         # Generate the user prompt with prior knowledge
         user_prompt = get_reference_agent_user_prompt(hypothesis, self.domain, prior_knowledge_summary)
+        return prior_knowledge, prior_knowledge_summary, {"messages": [("user", user_prompt)]}
 
-        # Get structured analysis from LLM
-        self.app = create_react_agent(self.llm, [])
-        config = {"recursion_limit": 500}
-        inputs = {"messages": [("user", user_prompt)]}
-
-        for s in self.app.stream(inputs, stream_mode="values", config=config):
-            message = s["messages"][-1]
-            out = pretty_print(message)
-            pattern = r"={32}\x1b\[1m (Ai|Human) Message \x1b\[0m={32}"
-            clean_out = re.sub(pattern, '', out)
-            if 'reference_agent' in log:
-                log['reference_agent'].append(clean_out)
-
-        # Parse the structured output
-        reference_check = None
-        for _ in range(10):
-            try:
-                reference_check = self.output_parser.invoke(s["messages"][-1].content)
-                if reference_check:
-                    break
-            except Exception as e:
-                print(f"Error parsing reference check output: {e}")
+    def _log_message(self, message, log):
+        out = pretty_print(message)
+        pattern = r"={32}\x1b\[1m (Ai|Human) Message \x1b\[0m={32}"
+        clean_out = re.sub(pattern, '', out)
+        if 'reference_agent' in log:
+            log['reference_agent'].append(clean_out)
 
+    def _result(self, prior_knowledge, prior_knowledge_summary, reference_check, log):
         result = {
             'prior_knowledge_summary': prior_knowledge_summary,
             'prior_knowledge': prior_knowledge,
@@ -893,8 +1150,8 @@ class falsification_test_proposal_agent:
         self.failed_tests = []
         
         self.system_prompt = ChatPromptTemplate.from_messages([("system", get_test_proposal_agent_system_prompt(self.domain)), ("human", "{input}")])
-        self.chain = self.system_prompt | self.llm.with_structured_output(test_specification)
-        self.output_parser = self.llm.with_structured_output(test_specification)
+        self.chain = self.system_prompt | structured_output(self.llm, test_specification)
+        self.output_parser = structured_output(self.llm, test_specification)
 
     def go(self, main_hypothesis, test_results=None, log=None):
         if not test_results:
@@ -919,6 +1176,31 @@ class falsification_test_proposal_agent:
             if res:
                 break
         
+        return self._question(main_hypothesis, res)
+
+    async def ago(self, main_hypothesis, test_results=None, log=None):
+        """go() with the model calls awaited."""
+        if not test_results:
+            test_results = self.existing_tests
+        prompt_modifier = get_test_proposal_agent_user_prompt(self.domain, main_hypothesis, self.data, test_results, self.failed_tests)
+        self.app = create_react_agent(self.llm, [])
+
+        config = {"recursion_limit": 500}
+        inputs = {"messages": [("user", prompt_modifier)]}
+        async for s in self.app.astream(inputs, stream_mode="values", config = config):
+            out = pretty_print(s["messages"][-1])
+            pattern = r"={32}\x1b\[1m (Ai|Human) Message \x1b\[0m={32}"
+            log['designer'].append(re.sub(pattern, '', out))
+
+        for _ in range(10):
+            # retry when output_parser fails
+            res = await self.output_parser.ainvoke(s["messages"][-1].content)
+            if res:
+                break
+        return self._question(main_hypothesis, res)
+
+    @staticmethod
+    def _question(main_hypothesis, res):
         question = "Main hypothesis: {main_hypothesis} \n Falsification Test name: {test_name} \n Falsification Test description: {test_description} \n Falsification Test Null sub-hypothesis: {null_hypothesis} \n Falsification Test Alternate sub-hypothesis: {alternate_hypothesis}".format(main_hypothesis = main_hypothesis, test_name = res.test_name, test_description=res.test_description, null_hypothesis=res.null_hypothesis, alternate_hypothesis=res.alternate_hypothesis)
         return question
 
@@ -929,14 +1211,20 @@ class falsification_test_proposal_agent:
         self.failed_tests.append(test)
 
 class SequentialFalsificationTest:
-    def __init__(self, llm = 'claude-3-5-sonnet-20241022', is_local=False, port=None, api_key="EMPTY"):
+    def __init__(self, llm = 'claude-3-5-sonnet-20241022', is_local=False, port=None, api_key="EMPTY", llm_cache=None, rate_limits=None):
         if is_local:
             assert port is not None, "A server port must be provided when using a locally served model."
+        if llm_cache is not None:
+            # every agent built from here on (including those built in configure) uses the cache
+            use_llm_cache(llm_cache)
+        if rate_limits is not None:
+            # a dict of RateLimiter arguments or a RateLimiter; the buckets are shared across processes
+            use_rate_limits(rate_limits)
         self.port = port
         self.api_key = api_key
         self.llm_use = llm
         self.llm = get_llm(llm, port=self.port, api_key=self.api_key)
-        self.output_parser = self.llm.with_structured_output(OutputSpecification)
+        self.output_parser = structured_output(self.llm, OutputSpecification)
         self.num_of_tests = 0
         self.res = False
         self.res_stat = None
@@ -946,7 +1234,7 @@ class SequentialFalsificationTest:
             ("placeholder", "{messages}"),
             ]
         )
-        self.proposal_relevance_checker = self.proposal_relevance_checker_prompt | self.llm.with_structured_output(relevance_subhypothesis)
+        self.proposal_relevance_checker = self.proposal_relevance_checker_prompt | structured_output(self.llm, relevance_subhypothesis)
 
         self.log = {
             'reference_agent': [],
@@ -955,7 +1243,8 @@ class SequentialFalsificationTest:
             'relevance_checker': [],
             'summarizer': [],
             'sequential_testing': [],
-            'hitl': []
+            'hitl': [],
+            'execution_usage': []
         }
 
         # Reference Agent and HITL settings (configured in configure())
@@ -965,8 +1254,32 @@ class SequentialFalsificationTest:
         self.hitl_callback = None
         self.prior_knowledge_context = ""
         self.pending_hitl_decision = None
-
-    def summarize(self):
+        self.data_session = None
+        self.executor_pool = None
+        self.execution_cache = None
+
+    def release(self):
+        """Stops the executor pool's workers (or the REPL kernel) and frees the tables they
+        share; they start again when the next hypothesis runs code. go() and ago() call
+        this when they return, so a finished hypothesis holds no processes or shared memory."""
+        if isinstance(getattr(self, 'test_coding_agent', None), falsification_test_react_agent):
+            self.test_coding_agent.agent.close()
+        if self.executor_pool is not None:
+            self.executor_pool.release()
+
+    def close(self):
+        """Stops the executor pool (or REPL kernel) and releases this agent's reference to the configured data."""
+        if isinstance(getattr(self, 'test_coding_agent', None), falsification_test_react_agent):
+            self.test_coding_agent.agent.close()
+        if self.executor_pool is not None:
+            self.executor_pool.close()
+            self.executor_pool = None
+        if self.data_session is not None:
+            self.data_session.close()
+            self.data_session = None
+
+    def _summary_inputs(self):
+        """Prompt and input of the summarizer."""
         to_print = [get_msg_title_repr("Summarizer", bold=is_interactive_env())]
         print(to_print[0])
         prompt_modifier = get_summarizer_system_prompt()
@@ -991,39 +1304,74 @@ class SequentialFalsificationTest:
 
         res_log = "sufficient evidence - PASS" if self.res else "insufficient evidence - CONTINUE"
         test_results += f"\n\n Sequential testing result: {res_log} with statistics {res} \n Number of total tests done: {self.num_of_tests}"
+        return prompt, {"messages": [("user", test_results)]}
+
+    def _log_summary(self, response):
+        message = response["messages"][-1]
+        out = pretty_print(message, printout = True)
 
+        pattern = r"={32}\x1b\[1m (Ai|Human) Message \x1b\[0m={32}"
+        clean_out = re.sub(pattern, '', out)
+        self.log['summarizer'].append(clean_out)
+
+    def summarize(self):
+        prompt, inputs = self._summary_inputs()
         agent_executor = create_react_agent(self.llm, [], messages_modifier=prompt)
 
         config = {"recursion_limit": 500}
-        inputs = {"messages": [("user", test_results)]}
-        for response in agent_executor.stream(inputs, stream_mode="values", config = config):
-            message = response["messages"][-1]
-            out = pretty_print(message, printout = True)
-            to_print.append(out)
-
-            pattern = r"={32}\x1b\[1m (Ai|Human) Message \x1b\[0m={32}"
-            clean_out = re.sub(pattern, '', out)
-            self.log['summarizer'].append(clean_out)
+        with llm_role('summarizer'):
+            for response in agent_executor.stream(inputs, stream_mode="values", config = config):
+                self._log_summary(response)
 
         #self.log.append('\n'.join(to_print))
 
         return {"messages": [('assistant', response["messages"][-1].content)]}
 
+    async def asummarize(self):
+        """summarize() with the model calls awaited."""
+        prompt, inputs = self._summary_inputs()
+        agent_executor = create_react_agent(self.llm, [], messages_modifier=prompt)
+
+        config = {"recursion_limit": 500}
+        with llm_role('summarizer'):
+            async for response in agent_executor.astream(inputs, stream_mode="values", config = config):
+                self._log_summary(response)
+
+        return {"messages": [('assistant', response["messages"][-1].content)]}
+
 
     def configure(self, data, alpha = 0.1, beta = 0.1, aggregate_test = 'E-value', llm_approx = False,
                     max_num_of_tests = 10, plot_agent_architecture = True,
                     time_limit = 10, max_retry = 10, domain="biology", max_failed_tests = 10,
                     relevance_checker = False, use_react_agent = False,
                     use_reference_agent = False, kg_path = None,
-                    use_hitl = False, hitl_callback = None, **kwargs):
+                    use_hitl = False, hitl_callback = None, schema_token_budget = None, executor_workers = 1, execution_cache = None, memory_limit = None, cpu_limit = None, output_limit = DEFAULT_OUTPUT_LIMIT, perf_lint = True, **kwargs):
         self.relevance_checker = relevance_checker
         self.max_num_of_tests = max_num_of_tests
-        for name, df in data.table_dict.items():
-            globals()[name] = df
-
         self.aggregate_test = aggregate_test
         self.data_loader = data
         self.data = data.data_desc
+
+        raman_cube = get_raman_cube(data)
+        self.raman_cube_desc = ""
+        if raman_cube is not None:
+            self.raman_cube_desc = "\n" + raman_cube.describe()
+            self.data = self.data + self.raman_cube_desc
+        # executors see the tables through a registry session instead of module globals;
+        # reconfiguring releases the previous loader's session
+        self.close()
+        # None, True (in memory), a path to a persistent SQLite cache, or an ExecutionCache
+        self.execution_cache = open_execution_cache(execution_cache)
+        self.data_session = default_registry.open(data, extras={'raman_cube': raman_cube} if raman_cube is not None else None)
+        # flags slow pandas patterns and estimates their run time from the table profiles
+        self.perf_linter = None
+        if perf_lint:
+            try:
+                self.perf_linter = PerfLinter(table_stats(data))
+            except Exception as e:
+                print(f"Warning: performance linting disabled, could not profile the tables: {e}")
+        # if set, data_desc is replaced in go() by a digest of this many tokens ranked for the hypothesis
+        self.schema_token_budget = schema_token_budget
         self.alpha = alpha
         self.beta = beta
         self.llm_approx = llm_approx
@@ -1054,9 +1402,15 @@ class SequentialFalsificationTest:
             raise ValueError("React Falsitication Test Agent does not yet support llm approx")
 
         if use_react_agent:
-            self.test_coding_agent = falsification_test_react_agent(self.data_loader, llm =self.llm_use, max_retry=max_retry, domain=self.domain, port=self.port, api_key=self.api_key)
+            self.test_coding_agent = falsification_test_react_agent(self.data_loader, llm =self.llm_use, max_retry=max_retry, domain=self.domain, port=self.port, api_key=self.api_key, data_session=self.data_session, execution_cache=self.execution_cache, time_limit=time_limit, memory_limit=memory_limit, cpu_limit=cpu_limit, output_limit=output_limit, perf_linter=self.perf_linter)
         else:
-            self.test_coding_agent = falsification_test_coding_agent(self.data, self.llm_use, time_limit = time_limit, max_retry = max_retry, llm_approx = self.llm_approx, domain=self.domain, port=self.port, api_key=self.api_key)
+            # memory_limit is in MB, cpu_limit in CPU seconds per execution
+            memory_bytes = memory_limit * 2**20 if memory_limit is not None else None
+            # pre-forked workers reuse imports and loaded tables across attempts; 0 forks a process per attempt
+            if executor_workers > 0:
+                self.executor_pool = ExecutorPool(self.data_session, n_workers=executor_workers, fallback_module=__name__,
+                                                  memory_limit=memory_bytes, cpu_limit=cpu_limit, output_limit=output_limit)
+            self.test_coding_agent = falsification_test_coding_agent(self.data, self.llm_use, time_limit = time_limit, max_retry = max_retry, llm_approx = self.llm_approx, domain=self.domain, port=self.port, api_key=self.api_key, data_session=self.data_session, executor_pool=self.executor_pool, execution_cache=self.execution_cache, memory_limit=memory_bytes, cpu_limit=cpu_limit, output_limit=output_limit, perf_linter=self.perf_linter)
 
         self.test_proposal_agent = falsification_test_proposal_agent(self.data, self.llm_use, self.domain, port=self.port, api_key=self.api_key)
 
@@ -1069,27 +1423,57 @@ class SequentialFalsificationTest:
             prior_knowledge_context: str
             hitl_approved: bool
 
+        def tracked_results():
+            return '\n'.join([f"------- Round {i+1} ------- \n Falsification Test: {self.tracked_tests[i]} \n test statistics: {self.tracked_stat[i]}" for i in range(len(self.tracked_tests))]) if len(self.tracked_tests) > 0 else "No Implemented Falsification Test Yet."
+
+        def relevance_input(proposal):
+            return { "messages": [("user", f"Subhypothesis: {proposal}; Main hypothesis: {self.main_hypothesis}")]}
+
+        def checked_proposal(proposal, proposal_check):
+            """Logs the relevance check; returns the node's update if the proposal passes, else None."""
+            if float(proposal_check['relevance_score']) < 0.8:
+                self.test_proposal_agent.add_to_failed_tests(proposal)
+                print(f"Proposed falsification test is not relevant enough to the main hypothesis! \n Proposal: \n{proposal} \nRelevance score: {proposal_check['relevance_score']} \nReasoning: {proposal_check['relevance_reasoning']}")
+                self.log['relevance_checker'].append(f"Proposed falsification test is not relevant enough to the main hypothesis! \n Proposal: \n{proposal} \nRelevance score: {proposal_check['relevance_score']} \nReasoning: {proposal_check['relevance_reasoning']}")
+                return None
+            print(f"Proposed falsification test passes relevance check: \n Proposal: {proposal} \nRelevance score {proposal_check['relevance_score']} \nReasoning: {proposal_check['relevance_reasoning']}")
+            self.log['relevance_checker'].append(f"Proposed falsification test passes relevance check: \n Proposal: {proposal} \nRelevance score {proposal_check['relevance_score']} \nReasoning: {proposal_check['relevance_reasoning']}")
+            return {"cur_test_proposal": proposal, "messages": [('assistant', "Proposed falsification test: " + proposal)]}
+
         def design_falsification_test(state: State):
-            test_results = '\n'.join([f"------- Round {i+1} ------- \n Falsification Test: {self.tracked_tests[i]} \n test statistics: {self.tracked_stat[i]}" for i in range(len(self.tracked_tests))]) if len(self.tracked_tests) > 0 else "No Implemented Falsification Test Yet."
+            test_results = tracked_results()
             if self.relevance_checker:
                 for i in range(self.max_failed_tests):
-                    proposal = self.test_proposal_agent.go(self.main_hypothesis, test_results, self.log)
-                    proposal_check = self.proposal_relevance_checker.invoke({ "messages": [("user", f"Subhypothesis: {proposal}; Main hypothesis: {self.main_hypothesis}")]}).dict()
-                    if float(proposal_check['relevance_score']) < 0.8:
-                        self.test_proposal_agent.add_to_failed_tests(proposal)
-                        print(f"Proposed falsification test is not relevant enough to the main hypothesis! \n Proposal: \n{proposal} \nRelevance score: {proposal_check['relevance_score']} \nReasoning: {proposal_check['relevance_reasoning']}")
-                        self.log['relevance_checker'].append(f"Proposed falsification test is not relevant enough to the main hypothesis! \n Proposal: \n{proposal} \nRelevance score: {proposal_check['relevance_score']} \nReasoning: {proposal_check['relevance_reasoning']}")
-                    else:
-                        print(f"Proposed falsification test passes relevance check: \n Proposal: {proposal} \nRelevance score {proposal_check['relevance_score']} \nReasoning: {proposal_check['relevance_reasoning']}")
-                        self.log['relevance_checker'].append(f"Proposed falsification test passes relevance check: \n Proposal: {proposal} \nRelevance score {proposal_check['relevance_score']} \nReasoning: {proposal_check['relevance_reasoning']}")
-                        return {"cur_test_proposal": proposal, "messages": [('assistant', "Proposed falsification test: " + proposal)]}
+                    with llm_role('designer'):
+                        proposal = self.test_proposal_agent.go(self.main_hypothesis, test_results, self.log)
+                    with llm_role('relevance_checker'):
+                        proposal_check = self.proposal_relevance_checker.invoke(relevance_input(proposal)).dict()
+                    update = checked_proposal(proposal, proposal_check)
+                    if update is not None:
+                        return update
             else:
-                proposal = self.test_proposal_agent.go(self.main_hypothesis, test_results)
+                with llm_role('designer'):
+                    proposal = self.test_proposal_agent.go(self.main_hypothesis, test_results, self.log)
                 return {"cur_test_proposal": proposal, "messages": [('assistant', "Proposed falsification test: " + proposal)]}
 
-        def implement_falsification_test(state: State):
-            out = self.test_coding_agent.go(state["cur_test_proposal"], self.log)
+        async def adesign_falsification_test(state: State):
+            test_results = tracked_results()
+            if self.relevance_checker:
+                for i in range(self.max_failed_tests):
+                    with llm_role('designer'):
+                        proposal = await self.test_proposal_agent.ago(self.main_hypothesis, test_results, self.log)
+                    with llm_role('relevance_checker'):
+                        proposal_check = (await self.proposal_relevance_checker.ainvoke(relevance_input(proposal))).dict()
+                    update = checked_proposal(proposal, proposal_check)
+                    if update is not None:
+                        return update
+            else:
+                with llm_role('designer'):
+                    proposal = await self.test_proposal_agent.ago(self.main_hypothesis, test_results, self.log)
+                return {"cur_test_proposal": proposal, "messages": [('assistant', "Proposed falsification test: " + proposal)]}
 
+        def record_implementation(state: State, out):
+            """Records the coding agent's result; returns None when the likelihood ratio is still to be estimated."""
             if out['status'] == "Failed test":
                 self.implementation_success_status = False
                 self.test_proposal_agent.add_to_failed_tests(state["cur_test_proposal"])
@@ -1100,18 +1484,38 @@ class SequentialFalsificationTest:
                 self.tracked_tests.append(state["cur_test_proposal"])
 
                 if self.llm_approx:
-                    evidence = out['captured_output']
                     print(get_msg_title_repr("Likelihood ratio estimation agent", bold=is_interactive_env()))
-                    out = self.likelihood_estimation_agent.go(self.main_hypothesis, state["cur_test_proposal"], evidence)
-
-                    likelihood_h1 = float(out['likelihood_h1'])
-                    likelihood_h0 = float(out['likelihood_h0'])
-                    self.tracked_stat.append(likelihood_h1/likelihood_h0)
-                    return {"messages": [('assistant', f"Falsification test: {state['cur_test_proposal']} \n likelihood under H1: {likelihood_h1} \n likelihood under H0: {likelihood_h0} \n likelihood ratio: {likelihood_h1/likelihood_h0}")]}
+                    return None
                 else:
                     self.tracked_stat.append(float(out['p_val']))
                     return {"messages": [('assistant', f"Falsification test: {state['cur_test_proposal']} \n p-value: {out['p_val']}")]}
 
+        def record_likelihood(state: State, out):
+            likelihood_h1 = float(out['likelihood_h1'])
+            likelihood_h0 = float(out['likelihood_h0'])
+            self.tracked_stat.append(likelihood_h1/likelihood_h0)
+            return {"messages": [('assistant', f"Falsification test: {state['cur_test_proposal']} \n likelihood under H1: {likelihood_h1} \n likelihood under H0: {likelihood_h0} \n likelihood ratio: {likelihood_h1/likelihood_h0}")]}
+
+        def implement_falsification_test(state: State):
+            with llm_role('executor'):
+                out = self.test_coding_agent.go(state["cur_test_proposal"], self.log)
+            update = record_implementation(state, out)
+            if update is None:
+                evidence = out['captured_output']
+                with llm_role('likelihood_estimation'):
+                    update = record_likelihood(state, self.likelihood_estimation_agent.go(self.main_hypothesis, state["cur_test_proposal"], evidence))
+            return update
+
+        async def aimplement_falsification_test(state: State):
+            with llm_role('executor'):
+                out = await self.test_coding_agent.ago(state["cur_test_proposal"], self.log)
+            update = record_implementation(state, out)
+            if update is None:
+                evidence = out['captured_output']
+                with llm_role('likelihood_estimation'):
+                    update = record_likelihood(state, await self.likelihood_estimation_agent.ago(self.main_hypothesis, state["cur_test_proposal"], evidence))
+            return update
+
         def sequential_testing(state: State):
             to_print = [get_msg_title_repr("Sequential Testing", bold=is_interactive_env())]
             print(to_print[0])
@@ -1162,16 +1566,18 @@ class SequentialFalsificationTest:
         def summarizer(state: State):
             return self.summarize()
 
-        def reference_agent_check(state: State):
-            """Query the knowledge graph and examine prior knowledge about the hypothesis."""
+        async def asummarizer(state: State):
+            return await self.asummarize()
+
+        def reference_skipped():
             if not self.use_reference_agent or self.reference_agent_instance is None:
                 return {"prior_knowledge_context": "", "messages": [('assistant', "Reference Agent skipped (not enabled).")]}
 
             to_print = [get_msg_title_repr("Reference Agent", bold=is_interactive_env())]
             print(to_print[0])
+            return None
 
-            result = self.reference_agent_instance.go(self.main_hypothesis, self.log)
-
+        def record_reference(result):
             self.prior_knowledge_context = result['prior_knowledge_summary']
 
             # Check for caution flags
@@ -1185,11 +1591,25 @@ class SequentialFalsificationTest:
                 "messages": [('assistant', f"Reference Agent Analysis Complete.\n{result['prior_knowledge_summary']}")]
             }
 
-        def hitl_checkpoint(state: State):
-            """Human-in-the-loop checkpoint for approving/rejecting/editing proposed tests."""
-            if not self.use_hitl:
-                return {"hitl_approved": True, "messages": [('assistant', "HITL checkpoint skipped (not enabled).")]}
-
+        def reference_agent_check(state: State):
+            """Query the knowledge graph and examine prior knowledge about the hypothesis."""
+            skipped = reference_skipped()
+            if skipped is not None:
+                return skipped
+            with llm_role('reference_agent'):
+                result = self.reference_agent_instance.go(self.main_hypothesis, self.log)
+            return record_reference(result)
+
+        async def areference_agent_check(state: State):
+            skipped = reference_skipped()
+            if skipped is not None:
+                return skipped
+            with llm_role('reference_agent'):
+                result = await self.reference_agent_instance.ago(self.main_hypothesis, self.log)
+            return record_reference(result)
+
+        def hitl_checkpoint_info(state: State):
+            """Prints and logs the checkpoint summary; returns (proposal, current_stats)."""
             to_print = [get_msg_title_repr("Human-in-the-Loop Checkpoint", bold=is_interactive_env())]
             print(to_print[0])
 
@@ -1208,30 +1628,58 @@ class SequentialFalsificationTest:
 
             print(checkpoint_info)
             self.log['hitl'].append(checkpoint_info)
+            return proposal, current_stats
+
+        def hitl_result(proposal, decision):
+            if decision is None:
+                # Default: auto-approve if no callback
+                self.log['hitl'].append("Auto-approved (no callback provided)")
+                return {"hitl_approved": True, "messages": [('assistant', "Test auto-approved.")]}
+
+            if decision.get('action') == 'reject':
+                feedback = decision.get('feedback', 'User rejected the proposed test.')
+                self.log['hitl'].append(f"User REJECTED: {feedback}")
+                self.test_proposal_agent.add_to_failed_tests(proposal)
+                return {"hitl_approved": False, "messages": [('assistant', f"Test rejected by user: {feedback}")]}
+
+            elif decision.get('action') == 'edit':
+                edited_proposal = decision.get('edited_proposal', proposal)
+                self.log['hitl'].append(f"User EDITED proposal")
+                return {"hitl_approved": True, "cur_test_proposal": edited_proposal,
+                        "messages": [('assistant', f"Test edited by user. New proposal: {edited_proposal}")]}
+
+            else:  # approve
+                self.log['hitl'].append("User APPROVED the proposed test")
+                return {"hitl_approved": True, "messages": [('assistant', "Test approved by user.")]}
+
+        def hitl_checkpoint(state: State):
+            """Human-in-the-loop checkpoint for approving/rejecting/editing proposed tests."""
+            if not self.use_hitl:
+                return {"hitl_approved": True, "messages": [('assistant', "HITL checkpoint skipped (not enabled).")]}
+
+            proposal, current_stats = hitl_checkpoint_info(state)
 
             # If callback is provided, use it to get user decision
+            decision = None
             if self.hitl_callback:
                 decision = self.hitl_callback(proposal, self.main_hypothesis, len(self.tracked_tests), current_stats)
+            return hitl_result(proposal, decision)
 
-                if decision.get('action') == 'reject':
-                    feedback = decision.get('feedback', 'User rejected the proposed test.')
-                    self.log['hitl'].append(f"User REJECTED: {feedback}")
-                    self.test_proposal_agent.add_to_failed_tests(proposal)
-                    return {"hitl_approved": False, "messages": [('assistant', f"Test rejected by user: {feedback}")]}
-
-                elif decision.get('action') == 'edit':
-                    edited_proposal = decision.get('edited_proposal', proposal)
-                    self.log['hitl'].append(f"User EDITED proposal")
-                    return {"hitl_approved": True, "cur_test_proposal": edited_proposal,
-                            "messages": [('assistant', f"Test edited by user. New proposal: {edited_proposal}")]}
+        async def ahitl_checkpoint(state: State):
+            if not self.use_hitl:
+                return {"hitl_approved": True, "messages": [('assistant', "HITL checkpoint skipped (not enabled).")]}
 
-                else:  # approve
-                    self.log['hitl'].append("User APPROVED the proposed test")
-                    return {"hitl_approved": True, "messages": [('assistant', "Test approved by user.")]}
+            proposal, current_stats = hitl_checkpoint_info(state)
 
-            # Default: auto-approve if no callback
-            self.log['hitl'].append("Auto-approved (no callback provided)")
-            return {"hitl_approved": True, "messages": [('assistant', "Test auto-approved.")]}
+            # a coroutine callback is awaited; a blocking one waits for the user in a thread
+            decision = None
+            if self.hitl_callback:
+                args = (proposal, self.main_hypothesis, len(self.tracked_tests), current_stats)
+                if inspect.iscoroutinefunction(self.hitl_callback):
+                    decision = await self.hitl_callback(*args)
+                else:
+                    decision = await asyncio.to_thread(self.hitl_callback, *args)
+            return hitl_result(proposal, decision)
 
         def hitl_decision(state: State) -> Literal["implement_falsification_test", "design_falsification_test"]:
             """Route based on HITL decision."""
@@ -1243,15 +1691,15 @@ class SequentialFalsificationTest:
         # Build the graph
         graph_builder = StateGraph(State)
 
-        # Add all nodes
+        # Add all nodes; nodes calling a model have an async twin, used when the graph runs through ago()
         if self.use_reference_agent:
-            graph_builder.add_node("reference_agent_check", reference_agent_check)
-        graph_builder.add_node("design_falsification_test", design_falsification_test)
+            graph_builder.add_node("reference_agent_check", RunnableLambda(reference_agent_check, afunc=areference_agent_check))
+        graph_builder.add_node("design_falsification_test", RunnableLambda(design_falsification_test, afunc=adesign_falsification_test))
         if self.use_hitl:
-            graph_builder.add_node("hitl_checkpoint", hitl_checkpoint)
-        graph_builder.add_node("implement_falsification_test", implement_falsification_test)
+            graph_builder.add_node("hitl_checkpoint", RunnableLambda(hitl_checkpoint, afunc=ahitl_checkpoint))
+        graph_builder.add_node("implement_falsification_test", RunnableLambda(implement_falsification_test, afunc=aimplement_falsification_test))
         graph_builder.add_node("sequential_testing", sequential_testing)
-        graph_builder.add_node("summarizer", summarizer)
+        graph_builder.add_node("summarizer", RunnableLambda(summarizer, afunc=asummarizer))
 
         # Build edges based on configuration
         if self.use_reference_agent:
@@ -1273,7 +1721,8 @@ class SequentialFalsificationTest:
         self.graph = graph_builder.compile()
         
 
-    def go(self, prompt):
+    def _start(self, prompt):
+        """Resets the log for a new hypothesis; returns the graph's initial state."""
         self.log = {
             'reference_agent': [],
             'designer': [],
@@ -1281,28 +1730,96 @@ class SequentialFalsificationTest:
             'relevance_checker': [],
             'summarizer': [],
             'sequential_testing': [],
-            'hitl': []
+            'hitl': [],
+            'execution_usage': []
         }
         self.main_hypothesis = prompt
-        config = {"recursion_limit": 500}
+        # the cache may be shared across hypotheses; the log reports this run's hits and misses
+        self._cache_stats_before = self.execution_cache.stats() if self.execution_cache is not None else {}
+
+        if self.schema_token_budget:
+            self.data = build_schema_digest(self.data_loader, prompt, self.schema_token_budget) + self.raman_cube_desc
+            self.test_proposal_agent.data = self.data
+            if isinstance(self.test_coding_agent, falsification_test_react_agent):
+                self.test_coding_agent.dataset_desc = self.data
+            else:
+                self.test_coding_agent.data = self.data
 
         # Initialize state with new fields
-        initial_state = {
+        return {
             "messages": ("user", prompt),
             "prior_knowledge_context": "",
             "hitl_approved": True
         }
 
-        for s in self.graph.stream(initial_state, stream_mode="values", config = config):
-            message = s["messages"][-1]
-            out = message.content
-            if self.num_of_tests + 1 > self.max_num_of_tests or self.max_failed_tests <= len(self.test_proposal_agent.failed_tests):
-                print('Surpassing the maximum number of falsification tests, stopped and summarizing...')
-                self.log['summarizer'].append('Surpassing the maximum number of falsification tests, stopped and summarizing...')
-                out = self.summarize()['messages'][0][1]
-                self.log['summarizer'].append(out)
-                break
+    def _over_limit(self):
+        if self.num_of_tests + 1 > self.max_num_of_tests or self.max_failed_tests <= len(self.test_proposal_agent.failed_tests):
+            print('Surpassing the maximum number of falsification tests, stopped and summarizing...')
+            self.log['summarizer'].append('Surpassing the maximum number of falsification tests, stopped and summarizing...')
+            return True
+        return False
+
+    def _finish(self, usage):
+        # model calls of this hypothesis: tokens, latency and cost per role and model
+        self.log['llm_usage'] = usage.summary()
+        self.log['llm_calls'] = usage.calls
+        print(format_usage(self.log['llm_usage']))
+        if self.executor_pool is not None:
+            self.log['executor_pool'] = self.executor_pool.stats()
+        if self.execution_cache is not None:
+            stats = self.execution_cache.stats()
+            for name in ('hits', 'misses', 'stores', 'evictions', 'uncacheable'):
+                stats[name] -= self._cache_stats_before[name]
+            self.log['execution_cache'] = stats
+
+    def go(self, prompt):
+        initial_state = self._start(prompt)
+        config = {"recursion_limit": 500}
+
+        try:
+            with track_usage(prompt) as usage:
+                for s in self.graph.stream(initial_state, stream_mode="values", config = config):
+                    message = s["messages"][-1]
+                    out = message.content
+                    if self._over_limit():
+                        out = self.summarize()['messages'][0][1]
+                        self.log['summarizer'].append(out)
+                        break
 
-        result = self.output_parser.invoke(out)
+                with llm_role('output_parser'):
+                    result = self.output_parser.invoke(out)
+            self._finish(usage)
+        finally:
+            self.release()
         # result.conclusion = self.res
         return self.log, out, result.dict()
+
+    async def ago(self, prompt):
+        """go() as a coroutine.
+
+        Model calls, rate-limit waits and the executions of the generated code (in the
+        executor pool or a forked process) are awaited on the event loop without
+        holding a thread, so several hypotheses (each on its own
+        SequentialFalsificationTest) can be validated concurrently in one event loop.
+        The default executor still runs SQLite cache lookups, a blocking hitl_callback
+        and the loading of a table into shared memory on its first reference.
+        """
+        initial_state = self._start(prompt)
+        config = {"recursion_limit": 500}
+
+        try:
+            with track_usage(prompt) as usage:
+                async for s in self.graph.astream(initial_state, stream_mode="values", config = config):
+                    message = s["messages"][-1]
+                    out = message.content
+                    if self._over_limit():
+                        out = (await self.asummarize())['messages'][0][1]
+                        self.log['summarizer'].append(out)
+                        break
+
+                with llm_role('output_parser'):
+                    result = await self.output_parser.ainvoke(out)
+            self._finish(usage)
+        finally:
+            self.release()
+        return self.log, out, result.dict()
@@ -0,0 +1,372 @@
+import json
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import stats
+from langchain.tools import BaseTool
+from pydantic import PrivateAttr
+
+from volta.raman_cube import RamanCube
+
+
+def _result(test: str, statistic: float, p_value: float, n: int, **details) -> Dict:
+    """Common return value: every routine reports a statistic and its p-value."""
+    return {'test': test, 'statistic': float(statistic), 'p_value': float(p_value), 'n': int(n), 'details': details}
+
+
+def _as_series(values: np.ndarray) -> np.ndarray:
+    """(T,) series from a (T,) array or the per-frame mean of a (T, Y, X) array."""
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        return values
+    return np.nanmean(values.reshape(values.shape[0], -1), axis=1)
+
+
+def _finite_pair(x, y):
+    keep = np.isfinite(x) & np.isfinite(y)
+    return x[keep], y[keep]
+
+
+def _correlation_p(r: np.ndarray, n) -> np.ndarray:
+    """Two-sided p-value of Pearson's r with n paired samples (t distribution)."""
+    r = np.clip(r, -0.999999, 0.999999)
+    df = np.maximum(np.asarray(n, dtype=np.float64) - 2, 1)
+    t = r * np.sqrt(df / (1 - r ** 2))
+    return 2 * stats.t.sf(np.abs(t), df)
+
+
+def _rank_time(values: np.ndarray) -> np.ndarray:
+    """Ranks along the time axis, keeping NaN where the value is missing."""
+    ranked = stats.rankdata(values, axis=0, nan_policy='omit') if np.isnan(values).any() else stats.rankdata(values, axis=0)
+    return np.where(np.isnan(values), np.nan, ranked)
+
+
+def _block_permutations(n: int, block: int, permutations: int, rng) -> np.ndarray:
+    """(permutations, n) indices that shuffle the order of consecutive blocks of length
+    block (the last one may be shorter), keeping the order within each block."""
+    blocks = [np.arange(start, min(start + block, n)) for start in range(0, n, block)]
+    return np.stack([np.concatenate([blocks[i] for i in rng.permutation(len(blocks))]) for _ in range(permutations)])
+
+
+def pixel_voltage_correlation(values: np.ndarray, voltage: np.ndarray, method: str = 'pearson',
+                              permutations: int = 999, block: Optional[int] = None, seed: Optional[int] = 0) -> Dict:
+    """Correlation of a feature with voltage, tested on the frame mean with one sample per
+    time step; the correlation of every pixel is computed at once for the details.
+
+    The pixels share the voltage series and are spatially correlated, so they are not
+    independent samples: the p-value comes from the T time steps, permuting the voltage
+    series in blocks so that its autocorrelation is kept.
+
+    Args:
+        values: (T, Y, X) feature array, e.g. raman_cube.feature('A1g_Center')
+        voltage: (T,) voltage per time step
+        method: 'pearson' or 'spearman'
+        permutations: Block permutations of the voltage series; 0 uses the t
+            distribution with T - 2 degrees of freedom instead
+        block: Block length in time steps; defaults to round(sqrt(T))
+        seed: Seed of the permutations
+
+    Returns:
+        statistic: r of the frame-mean feature with voltage; p_value: its two-sided
+        block-permutation p-value. details holds the per-pixel r map, its median and
+        Fisher-z mean, the share of pixels individually significant at 0.05
+        (uncorrected) and the parametric p-value of the frame-mean r.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    voltage = np.asarray(voltage, dtype=np.float64)
+    if method not in ('pearson', 'spearman'):
+        raise ValueError(f"Unknown method: {method}")
+    n_times = values.shape[0]
+
+    # per-pixel correlations, for the details only
+    pixels = values.reshape(n_times, -1)
+    volts = np.broadcast_to(voltage[:, None], pixels.shape).copy()
+    valid = ~np.isnan(pixels) & ~np.isnan(volts)
+    if method == 'spearman':
+        pixels = _rank_time(np.where(valid, pixels, np.nan))
+        volts = _rank_time(np.where(valid, volts, np.nan))
+    n = valid.sum(axis=0)
+    x = np.where(valid, pixels, 0.0)
+    y = np.where(valid, volts, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_mean = x.sum(axis=0) / n
+        y_mean = y.sum(axis=0) / n
+        dx = np.where(valid, x - x_mean, 0.0)
+        dy = np.where(valid, y - y_mean, 0.0)
+        r = (dx * dy).sum(axis=0) / np.sqrt((dx ** 2).sum(axis=0) * (dy ** 2).sum(axis=0))
+    usable = (n >= 3) & np.isfinite(r)
+    r_pixels = r[usable]
+    z = np.arctanh(np.clip(r_pixels, -0.999999, 0.999999))
+    p_pixels = _correlation_p(r_pixels, n[usable])
+
+    frame, volt = _finite_pair(_as_series(values), voltage)
+    if len(frame) < 3:
+        raise ValueError("Fewer than three time steps have a frame mean and a voltage")
+    if method == 'spearman':
+        frame, volt = stats.rankdata(frame), stats.rankdata(volt)
+    frame_r = np.corrcoef(frame, volt)[0, 1]
+    frame_p = float(_correlation_p(frame_r, len(frame)))
+    p_value = frame_p
+    block = block or max(1, int(round(np.sqrt(len(frame)))))
+    if permutations:
+        order = _block_permutations(len(frame), block, permutations, np.random.default_rng(seed))
+        centered = frame - frame.mean()
+        shuffled = volt[order] - volt.mean()
+        null = shuffled.dot(centered) / np.sqrt(centered.dot(centered) * (shuffled ** 2).sum(axis=1))
+        p_value = (np.sum(np.abs(null) >= abs(frame_r) - 1e-12) + 1) / (permutations + 1)
+    test = f"{method} correlation of the frame mean with voltage (" + (
+        f"{permutations} block permutations of {block} steps)" if permutations else "t distribution)")
+    return _result(test, frame_r, p_value, len(frame),
+                   r_map=r.reshape(values.shape[1:]),
+                   median_pixel_r=float(np.median(r_pixels)) if len(r_pixels) else float('nan'),
+                   mean_pixel_r=float(np.tanh(z.mean())) if len(z) else float('nan'),
+                   fraction_pixels_significant=float((p_pixels < 0.05).mean()) if len(p_pixels) else float('nan'),
+                   frame_mean_p=frame_p)
+
+
+def frame_spatial_std(values: np.ndarray, against: Optional[np.ndarray] = None) -> Dict:
+    """Spatial heterogeneity per frame: the std over pixels of each time step.
+
+    Args:
+        values: (T, Y, X) feature array
+        against: (T,) series to test the trend against (e.g. voltage); defaults to time
+
+    Returns:
+        statistic: Spearman rho of the per-frame std against the series; p_value: its
+        p-value. details holds the per-frame std and its first/last values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    spread = np.nanstd(values.reshape(values.shape[0], -1), axis=1, ddof=1)
+    axis = np.arange(len(spread), dtype=np.float64) if against is None else np.asarray(against, dtype=np.float64)
+    x, y = _finite_pair(axis, spread)
+    rho, p_value = stats.spearmanr(x, y)
+    return _result("Spearman trend of per-frame spatial std " + ("over time" if against is None else "against the series"),
+                   rho, p_value, len(x), frame_std=spread, first=float(spread[0]), last=float(spread[-1]))
+
+
+def lagged_cross_correlation(x: np.ndarray, y: np.ndarray, max_lag: int = 10) -> Dict:
+    """Pearson correlation of y with x shifted by -max_lag..max_lag steps.
+
+    A positive lag means y follows x (y[t + lag] correlates with x[t]). (T, Y, X) inputs
+    are reduced to their per-frame means.
+
+    Returns:
+        statistic: r at the lag with the largest |r|; p_value: its p-value, Bonferroni
+        corrected for the number of lags tried. details holds the best lag and r per lag.
+    """
+    x, y = _as_series(x), _as_series(y)
+    n = min(len(x), len(y))
+    x, y = x[:n], y[:n]
+    lags = np.arange(-max_lag, max_lag + 1)
+    r_by_lag, n_by_lag = np.full(len(lags), np.nan), np.zeros(len(lags), dtype=int)
+    for i, lag in enumerate(lags):
+        a, b = (x[:n - lag], y[lag:]) if lag >= 0 else (x[-lag:], y[:n + lag])
+        a, b = _finite_pair(a, b)
+        if len(a) >= 3 and a.std() > 0 and b.std() > 0:
+            r_by_lag[i] = np.corrcoef(a, b)[0, 1]
+            n_by_lag[i] = len(a)
+    if np.all(np.isnan(r_by_lag)):
+        raise ValueError("Not enough overlapping samples at any lag")
+    best = int(np.nanargmax(np.abs(r_by_lag)))
+    p_value = min(1.0, float(_correlation_p(r_by_lag[best], n_by_lag[best])) * np.isfinite(r_by_lag).sum())
+    zero = int(np.flatnonzero(lags == 0)[0])
+    return _result("lagged Pearson cross-correlation (Bonferroni over lags)", r_by_lag[best], p_value, n_by_lag[best],
+                   best_lag=int(lags[best]), r_at_zero_lag=float(r_by_lag[zero]),
+                   r_by_lag=dict(zip(lags.tolist(), np.round(r_by_lag, 4).tolist())))
+
+
+def edge_center_contrast(values: np.ndarray, width: int = 1, summary: str = 'shift') -> Dict:
+    """Compares pixels within width of the map border with the interior pixels.
+
+    Args:
+        values: (T, Y, X) feature array
+        width: Border width in pixels
+        summary: Per-pixel value compared: 'shift' (last minus first valid time step),
+            'mean' (mean over time) or 'std' (std over time)
+
+    Returns:
+        statistic: Welch's t; p_value: its two-sided p-value. details holds the group
+        means and sizes and Cohen's d.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if summary == 'shift':
+        valid = ~np.isnan(values)
+        first = np.argmax(valid, axis=0)
+        last = values.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+        per_pixel = (np.take_along_axis(values, last[None], axis=0)[0]
+                     - np.take_along_axis(values, first[None], axis=0)[0])
+    elif summary == 'mean':
+        per_pixel = np.nanmean(values, axis=0)
+    elif summary == 'std':
+        per_pixel = np.nanstd(values, axis=0, ddof=1)
+    else:
+        raise ValueError(f"Unknown summary: {summary}")
+    n_y, n_x = per_pixel.shape
+    ys, xs = np.ogrid[:n_y, :n_x]
+    edge = (ys < width) | (ys >= n_y - width) | (xs < width) | (xs >= n_x - width)
+    edge_values = per_pixel[edge & np.isfinite(per_pixel)]
+    center_values = per_pixel[~edge & np.isfinite(per_pixel)]
+    t, p_value = stats.ttest_ind(edge_values, center_values, equal_var=False)
+    pooled = np.sqrt((edge_values.var(ddof=1) + center_values.var(ddof=1)) / 2)
+    return _result(f"Welch t-test, edge vs center per-pixel {summary}", t, p_value, len(edge_values) + len(center_values),
+                   edge_mean=float(edge_values.mean()), center_mean=float(center_values.mean()),
+                   n_edge=len(edge_values), n_center=len(center_values),
+                   cohens_d=float((edge_values.mean() - center_values.mean()) / pooled) if pooled > 0 else 0.0)
+
+
+def _morans_i(frames: np.ndarray) -> np.ndarray:
+    """Moran's I with rook adjacency of each (Y, X) map in frames (..., Y, X); NaN pixels
+    are left out of both the moments and the neighbour pairs."""
+    valid = np.isfinite(frames)
+    n = valid.sum(axis=(-2, -1))
+    mean = np.where(valid, frames, 0.0).sum(axis=(-2, -1)) / n
+    dev = np.where(valid, frames - mean[..., None, None], 0.0)
+    # each neighbour pair is counted in both directions, as in the symmetric weight matrix
+    cross_y = (dev[..., 1:, :] * dev[..., :-1, :]).sum(axis=(-2, -1))
+    cross_x = (dev[..., :, 1:] * dev[..., :, :-1]).sum(axis=(-2, -1))
+    weight = (valid[..., 1:, :] & valid[..., :-1, :]).sum(axis=(-2, -1)) + (valid[..., :, 1:] & valid[..., :, :-1]).sum(axis=(-2, -1))
+    return (n / (2 * weight)) * (2 * (cross_y + cross_x)) / (dev ** 2).sum(axis=(-2, -1))
+
+
+def morans_i(frame: np.ndarray, permutations: int = 999, seed: Optional[int] = 0) -> Dict:
+    """Moran's I spatial autocorrelation of a (Y, X) map with rook (4-neighbour) weights.
+
+    A (T, Y, X) input is tested on its time-mean map, and details also report I per
+    frame.
+
+    Returns:
+        statistic: Moran's I; p_value: two-sided permutation p-value (or the normal
+        approximation if permutations is 0). details holds E[I], the z-score and the
+        per-frame I for 3-D input.
+    """
+    values = np.asarray(frame, dtype=np.float64)
+    per_frame = None
+    if values.ndim == 3:
+        per_frame = _morans_i(values)
+        values = np.nanmean(values, axis=0)
+    observed = float(_morans_i(values))
+    valid = np.isfinite(values)
+    n = int(valid.sum())
+    expected = -1.0 / (n - 1)
+
+    # normal approximation with the rook weights of the valid pixels
+    links = np.zeros_like(values)
+    links[1:, :] += valid[:-1, :]
+    links[:-1, :] += valid[1:, :]
+    links[:, 1:] += valid[:, :-1]
+    links[:, :-1] += valid[:, 1:]
+    degree = links[valid]
+    s0 = degree.sum()
+    s1 = 2 * s0
+    s2 = (2 * degree).dot(2 * degree)
+    variance = (n * n * s1 - n * s2 + 3 * s0 * s0) / ((n * n - 1) * s0 * s0) - expected ** 2
+    z = (observed - expected) / np.sqrt(variance)
+    p_value = 2 * stats.norm.sf(abs(z))
+
+    if permutations:
+        rng = np.random.default_rng(seed)
+        pool = values[valid]
+        shuffled = np.full((permutations,) + values.shape, np.nan)
+        shuffled[:, valid] = rng.permuted(np.broadcast_to(pool, (permutations, n)), axis=1)
+        null = _morans_i(shuffled)
+        extreme = np.sum(np.abs(null - expected) >= abs(observed - expected))
+        p_value = (extreme + 1) / (permutations + 1)
+    details = {'expected': expected, 'z': float(z)}
+    if per_frame is not None:
+        details['per_frame'] = np.round(per_frame, 4)
+    return _result("Moran's I (rook weights, " + (f"{permutations} permutations)" if permutations else "normal approximation)"),
+                   observed, p_value, n, **details)
+
+
+class BatteryStatTool(BaseTool):
+    """LangChain tool running one battery_stats routine on the Raman cube.
+
+    The tool input is a JSON dict; 'feature' (and 'against' where it applies) name cube
+    features, and 'Voltage' is reduced to one value per time step.
+    """
+
+    name: str
+    description: str
+    routine: str
+    _cube: Optional[RamanCube] = PrivateAttr(default=None)
+
+    def set_cube(self, cube: RamanCube):
+        self._cube = cube
+
+    def _series(self, name: str) -> np.ndarray:
+        return _as_series(self._cube.feature(name))
+
+    def _run(self, query: str) -> str:
+        if self._cube is None:
+            return "Error: no Raman data (raman_cube) is available for this dataset."
+        try:
+            params = json.loads(query.replace("'", '"')) if query.strip() else {}
+            feature = params.pop('feature', 'A1g_Center')
+            if self.routine == 'pixel_voltage_correlation':
+                result = pixel_voltage_correlation(self._cube.feature(feature), self._series(params.pop('against', 'Voltage')), **params)
+            elif self.routine == 'frame_spatial_std':
+                against = params.pop('against', None)
+                result = frame_spatial_std(self._cube.feature(feature), self._series(against) if against else None)
+            elif self.routine == 'lagged_cross_correlation':
+                result = lagged_cross_correlation(self._series(params.pop('against', 'Voltage')), self._cube.feature(feature), **params)
+            elif self.routine == 'edge_center_contrast':
+                result = edge_center_contrast(self._cube.feature(feature), **params)
+            else:
+                time_idx = params.pop('time_idx', None)
+                values = self._cube.feature(feature) if time_idx is None else self._cube.frame(time_idx, feature)
+                result = morans_i(values, **params)
+        except Exception as e:
+            return f"Error in {self.name}: {e}"
+        return format_result(result)
+
+    async def _arun(self, query: str) -> str:
+        return self._run(query)
+
+
+def format_result(result: Dict) -> str:
+    lines = [f"Test: {result['test']}",
+             f"Statistic: {result['statistic']:.4g}",
+             f"p-value: {result['p_value']:.3e}",
+             f"n: {result['n']}"]
+    for key, value in result['details'].items():
+        if isinstance(value, np.ndarray):
+            if value.ndim > 1 or value.size > 20:
+                # maps and per-frame series are too large for an observation
+                lines.append(f"{key}: array of shape {value.shape}, min {np.nanmin(value):.4g}, max {np.nanmax(value):.4g}")
+                continue
+            value = np.round(value, 4).tolist()
+        lines.append(f"{key}: {value:.4g}" if isinstance(value, float) else f"{key}: {value}")
+    return "\n".join(lines)
+
+
+_TOOL_SPECS = [
+    ('pixel_voltage_correlation', 'pixel_voltage_correlation',
+     'Correlates the frame mean of a Raman feature with voltage, with a p-value from block permutations of '
+     'the voltage series (one sample per time step, as the pixels share the voltage); the per-pixel '
+     'correlations are reported as details.\n'
+     'Input: {"feature": "A1g_Center", "method": "pearson" or "spearman", "permutations": 999}'),
+    ('frame_spatial_std', 'frame_spatial_std',
+     'Spatial heterogeneity: std over pixels of a feature at each time step, tested for a monotonic trend '
+     'over time (or against another feature such as Voltage) with Spearman\'s rho.\n'
+     'Input: {"feature": "A1g_Center", "against": "Voltage" (optional)}'),
+    ('lagged_cross_correlation', 'lagged_cross_correlation',
+     'Cross-correlation of the frame-mean of a feature with voltage (or another feature) at lags '
+     '-max_lag..max_lag; a positive best lag means the feature follows voltage.\n'
+     'Input: {"feature": "D_Amp", "against": "Voltage", "max_lag": 10}'),
+    ('edge_center_contrast', 'edge_center_contrast',
+     'Compares edge pixels (within width of the map border) with center pixels using Welch\'s t-test on a '
+     'per-pixel summary: "shift" (last minus first time step), "mean" or "std".\n'
+     'Input: {"feature": "A1g_Center", "width": 1, "summary": "shift"}'),
+    ('morans_i', 'morans_i',
+     'Moran\'s I spatial autocorrelation of a feature map (one time step, or the time-mean map) with a '
+     'permutation p-value.\n'
+     'Input: {"feature": "A1g_Center", "time_idx": 0 (optional), "permutations": 999}'),
+]
+
+
+def battery_stats_tools() -> List[BatteryStatTool]:
+    """One tool per routine; call set_cube() on each before use."""
+    return [BatteryStatTool(name=name, routine=routine,
+                            description=description + "\nEvery call returns a statistic and a p-value over the "
+                                                      "pixel x time data.")
+            for name, routine, description in _TOOL_SPECS]
@@ -101,7 +101,15 @@ class discovery_bench_hypothesis:
 
         ground_truth_path = os.path.join(root_path, "answer_key/answer_key_synth.csv") if self.synthetic else os.path.join(root_path, "answer_key/answer_key_real_cleaned_1.csv")
         self.ground_truth = pd.read_csv(ground_truth_path)
-        
+        # one row per (dataset, metadataid, query_id); the first occurrence wins, as with the old mask lookups
+        ground_truth_index = self.ground_truth.set_index(['dataset', 'metadataid', 'query_id'])
+        ground_truth_index = ground_truth_index[~ground_truth_index.index.duplicated(keep='first')].sort_index()
+        check_falsifiable = 'non-trivially falsifiable' in self.ground_truth.columns
+
+        # Loaders are only built when an example is fetched; parsed files are shared per task directory
+        self._loaders = {}
+        self._file_caches = {}
+
         self.examples = []
         for task_dir in os.listdir(self.data_path):
             task_path = os.path.join(self.data_path, task_dir)
@@ -112,30 +120,14 @@ class discovery_bench_hypothesis:
                     with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
                         metadata = json.load(f)
                     metadata_id = int(file.split(".")[0].split("_")[1])
-                    data_loader = DiscoveryBenchDataLoader(task_path, metadata)
-                    
-                    # permute the data loader for negative example
-                    permuted_dataloader = DiscoveryBenchDataLoader(task_path, metadata)
-                    permuted_dataloader.permute_selected_columns()
-                    
                     
                     for query_list in metadata["queries"]:
                         for query in query_list:
                             try:
-                                # print(file_path)
-                                hypothesis = self.ground_truth.loc[
-                                    (self.ground_truth['dataset'] == task_dir) &
-                                    (self.ground_truth['metadataid'] == metadata_id) &
-                                    (self.ground_truth['query_id'] == query["qid"]),
-                                    'gold_hypo'
-                                ].iloc[0]
+                                row = ground_truth_index.loc[(task_dir, metadata_id, query["qid"])]
+                                hypothesis = row['gold_hypo']
                                 
-                                if 'non-trivially falsifiable' in self.ground_truth.columns and self.ground_truth.loc[
-                                    (self.ground_truth['dataset'] == task_dir) &
-                                    (self.ground_truth['metadataid'] == metadata_id) &
-                                    (self.ground_truth['query_id'] == query["qid"]),
-                                    'non-trivially falsifiable'
-                                ].iloc[0] == 0:
+                                if check_falsifiable and row['non-trivially falsifiable'] == 0:
                                     continue
                                 
                                 self.examples.append({
@@ -144,19 +136,18 @@ class discovery_bench_hypothesis:
                                     "metadataid": metadata_id,
                                     "query_id": query["qid"],
                                     "prompt": hypothesis,
-                                    # "metadata": metadata,
-                                    "data_loader": data_loader,
+                                    "metadata_path": file_path,
                                     "answer": True,
                                 })
 
+                                # permuted data loader for negative example
                                 self.examples.append({
                                     "task": task_dir,
                                     "domain": metadata["domain"],
                                     "metadataid": metadata_id,
                                     "query_id": query["qid"],
                                     "prompt": hypothesis,
-                                    # "metadata": metadata,
-                                    "data_loader": permuted_dataloader,
+                                    "metadata_path": file_path,
                                     "answer": False,
                                 })
                             except Exception as e:
@@ -173,8 +164,23 @@ class discovery_bench_hypothesis:
         print(f"Loaded {self.num_samples} hypotheses")
         print("--------------------------------------")
     
+    def _get_data_loader(self, metadata_path, permuted):
+        """Builds (once) the loader for a metadata file, or its permuted twin."""
+        key = (metadata_path, permuted)
+        if key not in self._loaders:
+            if permuted:
+                self._loaders[key] = self._get_data_loader(metadata_path, False).permuted()
+            else:
+                with open(metadata_path, 'r', encoding='utf-8', errors='replace') as f:
+                    metadata = json.load(f)
+                task_path = os.path.dirname(metadata_path)
+                file_cache = self._file_caches.setdefault(task_path, {})
+                self._loaders[key] = DiscoveryBenchDataLoader(task_path, metadata, file_cache=file_cache)
+        return self._loaders[key]
+
     def get_example(self, index = None):
-        return self.examples[index]
+        example = self.examples[index]
+        return dict(example, data_loader=self._get_data_loader(example["metadata_path"], not example["answer"]))
     
     def get_iterator(self):
         for i in range(self.num_samples):
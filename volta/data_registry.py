@@ -0,0 +1,132 @@
+import threading
+import weakref
+from typing import Dict, Optional
+
+from volta.utils import LazyNamespace
+
+
+class DataSession:
+    """A hypothesis session's reference to the tables of one loader in a DataRegistry.
+
+    Executors build their namespaces from the session instead of module globals. The
+    reference is dropped by close(), at the end of a ``with`` block, or when the session
+    object is garbage collected, whichever comes first.
+    """
+
+    def __init__(self, registry, key):
+        self.key = key
+        self._entry = registry._entries[key]
+        self._finalizer = weakref.finalize(self, registry._release, key)
+
+    @property
+    def closed(self):
+        return not self._finalizer.alive
+
+    @property
+    def tables(self):
+        return self._entry['tables']
+
+    @property
+    def extras(self):
+        """Non-table objects exposed to executed code next to the tables (e.g. raman_cube)."""
+        return self._entry['extras']
+
+    def namespace(self, fallback=None):
+        """Fresh execution globals that resolve tables and extras on first reference.
+
+        Args:
+            fallback: Optional mapping (e.g. a module's globals) consulted for any other
+                name; it is read on demand, not copied.
+        """
+        if self.closed:
+            raise RuntimeError(f"Data session {self.key} is closed")
+        tables = self._entry['tables']
+        if self._entry['extras']:
+            tables = _ChainedTables(self._entry['extras'], tables)
+        return LazyNamespace(tables, fallback=fallback)
+
+    def close(self):
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _ChainedTables:
+    """Read-only lookup over extras first, then tables, without loading any table."""
+
+    def __init__(self, extras, tables):
+        self._extras = extras
+        self._tables = tables
+
+    def __contains__(self, name):
+        return name in self._extras or name in self._tables
+
+    def __getitem__(self, name):
+        if name in self._extras:
+            return self._extras[name]
+        return self._tables[name]
+
+
+class DataRegistry:
+    """Reference-counted store of the tables that running sessions can execute against.
+
+    Sessions opened on the same loader share one entry. The entry, and with it the
+    registry's reference to the loader's tables, is dropped when the last session on it
+    is released, so a long-lived worker that runs many hypotheses only keeps the tables
+    of the sessions still in progress.
+
+    Example:
+        with default_registry.open(data_loader, extras={'raman_cube': cube}) as session:
+            exec(code, session.namespace())
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(data_loader):
+        return f"{type(data_loader).__name__}-{id(data_loader.table_dict):x}"
+
+    def open(self, data_loader, extras: Optional[Dict] = None) -> DataSession:
+        """Registers the loader's tables (once) and returns a new session referencing them.
+
+        Args:
+            data_loader: Any loader with a table_dict
+            extras: Additional named objects to expose to executed code
+        """
+        key = self._key(data_loader)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {'tables': data_loader.table_dict, 'extras': {}, 'refs': 0}
+            entry['extras'].update(extras or {})
+            entry['refs'] += 1
+            return DataSession(self, key)
+
+    def _release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry['refs'] -= 1
+            if entry['refs'] <= 0:
+                del self._entries[key]
+
+    def refcount(self, data_loader) -> int:
+        entry = self._entries.get(self._key(data_loader))
+        return entry['refs'] if entry is not None else 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, data_loader):
+        return self._key(data_loader) in self._entries
+
+
+# registry shared by the agents of this process
+default_registry = DataRegistry()
@@ -0,0 +1,384 @@
+import ast
+import builtins
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import types
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# bump when the key layout or the fingerprints change, so old persistent entries stop matching
+CACHE_VERSION = 2
+
+# calls whose result differs between runs unless a seed is set
+_RANDOM_CALLS = {
+    'random', 'rand', 'randn', 'randint', 'random_sample', 'choice', 'shuffle', 'permutation',
+    'sample', 'normal', 'uniform', 'binomial', 'poisson', 'bootstrap', 'permutation_test',
+    'monte_carlo_test', 'getrandbits', 'integers',
+}
+_SEED_CALLS = {'seed', 'default_rng', 'RandomState', 'manual_seed', 'set_seed'}
+_SEED_KEYWORDS = {'random_state', 'seed', 'rng'}
+# calls that read the clock or the environment
+_VOLATILE_CALLS = {
+    'now', 'today', 'utcnow', 'time', 'perf_counter', 'monotonic', 'process_time', 'uuid1',
+    'uuid4', 'urandom', 'getenv', 'listdir', 'input', 'read_csv', 'read_excel', 'read_parquet',
+    'read_pickle', 'read_json', 'load',
+}
+# calls whose point is a side effect that a cache hit would skip
+_SIDE_EFFECT_CALLS = {
+    'open', 'to_csv', 'to_excel', 'to_parquet', 'to_pickle', 'to_json', 'savefig', 'save',
+    'savez', 'dump', 'write', 'remove', 'unlink', 'rmtree', 'mkdir', 'makedirs', 'system',
+    'Popen', 'exec', 'eval',
+}
+
+
+def _has_constant_seed(node):
+    """Whether a seeding call gets a constant seed, e.g. seed(0) or default_rng(seed=0)."""
+    values = list(node.args[:1]) + [kw.value for kw in node.keywords if kw.arg == 'seed']
+    return any(isinstance(value, ast.Constant) and value.value is not None for value in values)
+
+
+def _call_name(node):
+    func = node.func
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    return None
+
+
+class CodeInfo:
+    """What the execution cache needs to know about a piece of code.
+
+    Attributes:
+        digest: Hash of the normalized AST (formatting and comments do not matter)
+        free_names: Names the code reads without defining them
+        binds_names: Whether the code binds or mutates module-level state other than imports
+        import_source: The code's top-level import statements
+        cacheable: False for code that is nondeterministic or has side effects
+        reason: Why the code is not cacheable
+    """
+
+    def __init__(self, code: str):
+        self.code = code
+        self.cacheable = True
+        self.reason = None
+        self.binds_names = False
+        self.import_source = ""
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            self.digest = hashlib.sha256(code.strip().encode()).hexdigest()
+            self.free_names = []
+            self.cacheable, self.reason = False, 'syntax error'
+            return
+        self.digest = hashlib.sha256(ast.dump(tree, annotate_fields=False).encode()).hexdigest()
+
+        loaded, bound = set(), set()
+        seeded, unseeded, random_calls = False, False, False
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name):
+                (loaded if isinstance(node.ctx, ast.Load) else bound).add(node.id)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                bound.add(node.name)
+            elif isinstance(node, ast.arg):
+                bound.add(node.arg)
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                for alias in node.names:
+                    bound.add((alias.asname or alias.name).split('.')[0])
+            elif isinstance(node, ast.ExceptHandler) and node.name:
+                bound.add(node.name)
+            elif isinstance(node, (ast.Subscript, ast.Attribute)) and isinstance(node.ctx, (ast.Store, ast.Del)):
+                self.binds_names = True
+            elif isinstance(node, (ast.Global, ast.Nonlocal)):
+                self.binds_names = True
+            elif isinstance(node, ast.Call):
+                name = _call_name(node)
+                if name in _SEED_CALLS:
+                    # default_rng(), RandomState() and seed() without a seed draw one from the OS
+                    if _has_constant_seed(node):
+                        seeded = True
+                    else:
+                        unseeded = True
+                elif any(kw.arg in _SEED_KEYWORDS and isinstance(kw.value, ast.Constant)
+                         and kw.value.value is not None for kw in node.keywords):
+                    seeded = True
+                if name in _RANDOM_CALLS:
+                    random_calls = True
+                if any(kw.arg == 'inplace' for kw in node.keywords):
+                    self.binds_names = True
+                if name in _VOLATILE_CALLS:
+                    self.cacheable, self.reason = False, f'calls {name}()'
+                elif name in _SIDE_EFFECT_CALLS:
+                    self.cacheable, self.reason = False, f'side effect {name}()'
+        if (unseeded or random_calls and not seeded) and self.cacheable:
+            self.cacheable, self.reason = False, 'unseeded randomness'
+        self.free_names = sorted(loaded - bound)
+
+        imports = []
+        for statement in tree.body:
+            if isinstance(statement, (ast.Import, ast.ImportFrom)):
+                imports.append(ast.unparse(statement))
+            elif isinstance(statement, (ast.Assign, ast.AugAssign, ast.AnnAssign, ast.FunctionDef,
+                                        ast.AsyncFunctionDef, ast.ClassDef, ast.For, ast.AsyncFor,
+                                        ast.With, ast.AsyncWith, ast.Delete, ast.Try, ast.If, ast.While)):
+                # any of these may bind names the next action relies on
+                self.binds_names = True
+            elif any(isinstance(node, ast.NamedExpr) for node in ast.walk(statement)):
+                self.binds_names = True
+        self.import_source = "\n".join(imports)
+
+
+# id(object) -> (weak reference, fingerprint); entries go away with their objects
+_fingerprints: Dict[int, Tuple[weakref.ref, str]] = {}
+
+
+def _memoized(value, compute):
+    entry = _fingerprints.get(id(value))
+    if entry is not None and entry[0]() is value:
+        return entry[1]
+    fingerprint = compute(value)
+    key = id(value)
+    _fingerprints[key] = (weakref.ref(value, lambda _, key=key: _fingerprints.pop(key, None)), fingerprint)
+    return fingerprint
+
+
+def forget_fingerprints():
+    """Drops memoized fingerprints; call after code that may have edited objects in place."""
+    _fingerprints.clear()
+
+
+def _frame_fingerprint(df):
+    if isinstance(df, pd.DataFrame):
+        header = (df.shape, list(df.columns), [str(dtype) for dtype in df.dtypes])
+    else:
+        header = (df.shape, df.name, str(df.dtype))
+    digest = hashlib.sha1(repr(header).encode())
+    try:
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    except TypeError:  # unhashable cells (lists, dicts)
+        digest.update(pickle.dumps(df))
+    return 'frame:' + digest.hexdigest()
+
+
+def _array_fingerprint(array):
+    digest = hashlib.sha1(repr((array.dtype.str, array.shape)).encode())
+    digest.update(np.ascontiguousarray(array).tobytes() if array.dtype != object else repr(array.tolist()).encode())
+    return 'array:' + digest.hexdigest()
+
+
+def value_fingerprint(value) -> Optional[str]:
+    """Stable description of a value for the cache key, or None if it cannot be trusted.
+
+    DataFrames, Series and arrays are hashed by content (once per object), modules and
+    library callables by qualified name, functions defined by earlier code by bytecode,
+    and small literals by repr. Objects may provide their own ``fingerprint()``.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return _memoized(value, _frame_fingerprint)
+    if isinstance(value, np.ndarray):
+        return _memoized(value, _array_fingerprint)
+    if isinstance(value, types.ModuleType):
+        return 'module:' + value.__name__
+    if isinstance(value, types.FunctionType):
+        code = value.__code__
+        return f'function:{value.__module__}.{value.__qualname__}:' + hashlib.sha1(
+            code.co_code + repr(code.co_consts).encode() + repr(code.co_names).encode()).hexdigest()
+    if isinstance(value, (types.BuiltinFunctionType, type)) or callable(value) and hasattr(value, '__qualname__'):
+        return f'callable:{getattr(value, "__module__", None)}.{value.__qualname__}'
+    if hasattr(value, 'fingerprint') and callable(value.fingerprint):
+        return _memoized(value, lambda obj: f'{type(obj).__name__}:{obj.fingerprint()}')
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        text = repr(value)
+        return 'literal:' + (text if len(text) <= 256 else hashlib.sha1(text.encode()).hexdigest())
+    return None
+
+
+def fingerprint_names(names, resolve: Callable) -> Dict[str, Optional[str]]:
+    """value_fingerprint() of what each name resolves to ('undefined' for unknown names)."""
+    values = {}
+    for name in names:
+        try:
+            values[name] = value_fingerprint(resolve(name))
+        except KeyError:
+            values[name] = 'undefined'
+    return values
+
+
+def namespace_resolver(namespace) -> Callable:
+    """Looks names up in an execution namespace, then in builtins (raises KeyError if absent)."""
+    def resolve(name):
+        try:
+            return namespace[name]
+        except KeyError:
+            return vars(builtins)[name]
+    return resolve
+
+
+class ExecutionCache:
+    """Content-addressed cache of the output of executed analysis code.
+
+    The key is the code's normalized AST plus a fingerprint of every free name it reads
+    (tables are hashed by content), so a hit is only possible for the same computation
+    over the same data. Code that draws unseeded random numbers, reads the clock, files
+    or the environment, or writes files is never cached.
+
+    Entries are evicted least-recently-used once the stored outputs exceed max_bytes.
+    With a path, the cache is an SQLite file that several processes (e.g. the workers of
+    a benchmark sweep) can share and that survives between runs.
+
+    Args:
+        path: SQLite file for a persistent cache; None keeps entries in memory
+        max_bytes: Total size of cached outputs to keep
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = 64 << 20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._db = None
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, output TEXT, "
+                             "size INTEGER, last_used REAL)")
+            self._db.commit()
+        self.counters = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'uncacheable': 0}
+
+    def lookup(self, code: str, resolve: Optional[Callable] = None, stateful: bool = False,
+               fingerprints: Optional[Callable] = None) -> Tuple[Optional[str], Optional[str], CodeInfo]:
+        """Looks code up in the cache.
+
+        Args:
+            code: Code about to be executed
+            resolve: Returns the value a free name of the code refers to (KeyError if none)
+            fingerprints: Alternative to resolve for namespaces in another process: maps a
+                list of names to {name: fingerprint_names() result}
+            stateful: The code runs in a namespace that persists across calls (a REPL), so
+                only code that binds nothing but imports can be skipped on a hit
+
+        Returns:
+            (key, output, info): key is None if the code cannot be cached; output is the
+            cached output on a hit and None otherwise.
+        """
+        info = self._code_info(code, stateful)
+        values = None
+        if info.cacheable:
+            values = fingerprints(info.free_names) if fingerprints is not None else fingerprint_names(info.free_names, resolve)
+        return self._find(info, values)
+
+    async def alookup(self, code: str, fingerprints: Callable, stateful: bool = False
+                      ) -> Tuple[Optional[str], Optional[str], CodeInfo]:
+        """lookup() with fingerprints a coroutine function (e.g. ExecutorPool.afingerprints)."""
+        info = self._code_info(code, stateful)
+        values = await fingerprints(info.free_names) if info.cacheable else None
+        return self._find(info, values)
+
+    @staticmethod
+    def _code_info(code, stateful):
+        info = CodeInfo(code)
+        if stateful and info.binds_names:
+            info.cacheable, info.reason = False, 'changes the session state'
+        return info
+
+    def _find(self, info: CodeInfo, values: Optional[Dict[str, Optional[str]]]):
+        key = self._key(info, values) if info.cacheable else None
+        if key is None:
+            self._count('uncacheable')
+            return None, None, info
+        output = self._get(key)
+        self._count('misses' if output is None else 'hits')
+        return key, output, info
+
+    def _key(self, info: CodeInfo, values: Dict[str, Optional[str]]) -> Optional[str]:
+        parts = [CACHE_VERSION, info.digest]
+        for name in info.free_names:
+            fingerprint = values.get(name)
+            if fingerprint is None:
+                info.cacheable, info.reason = False, f'{name} has no stable fingerprint'
+                return None
+            parts.append([name, fingerprint])
+        return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+    def _count(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def _get(self, key):
+        with self._lock:
+            if self._db is None:
+                output = self._memory.get(key)
+                if output is not None:
+                    self._memory.move_to_end(key)
+                return output
+            row = self._db.execute("SELECT output FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            return row[0]
+
+    def store(self, key: Optional[str], output: str):
+        """Stores the output of a successful run under the key returned by lookup()."""
+        if key is None or len(output) > self.max_bytes:
+            return
+        with self._lock:
+            self.counters['stores'] += 1
+            if self._db is None:
+                if key in self._memory:
+                    self._memory_bytes -= len(self._memory.pop(key))
+                self._memory[key] = output
+                self._memory_bytes += len(output)
+                while self._memory_bytes > self.max_bytes:
+                    _, evicted = self._memory.popitem(last=False)
+                    self._memory_bytes -= len(evicted)
+                    self.counters['evictions'] += 1
+                return
+            self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (key, output, len(output), time.time()))
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            while total > self.max_bytes:
+                row = self._db.execute("SELECT key, size FROM results ORDER BY last_used LIMIT 1").fetchone()
+                self._db.execute("DELETE FROM results WHERE key = ?", (row[0],))
+                total -= row[1]
+                self.counters['evictions'] += 1
+            self._db.commit()
+
+    def stats(self) -> Dict:
+        """Counters of this process plus the current number and size of entries."""
+        with self._lock:
+            stats = dict(self.counters)
+            if self._db is None:
+                stats['entries'], stats['bytes'] = len(self._memory), self._memory_bytes
+            else:
+                stats['entries'], stats['bytes'] = self._db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return stats
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def open_execution_cache(spec) -> Optional[ExecutionCache]:
+    """Builds a cache from a configure() argument: None/False (no cache), True (in memory),
+    a path (persistent SQLite file) or an ExecutionCache instance."""
+    if spec is None or spec is False:
+        return None
+    if isinstance(spec, ExecutionCache):
+        return spec
+    if spec is True:
+        return ExecutionCache()
+    return ExecutionCache(path=str(spec))
@@ -0,0 +1,799 @@
+import asyncio
+import builtins
+import contextlib
+import importlib
+import math
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+import weakref
+from typing import Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from volta.utils import LazyNamespace
+from volta.execution_cache import fingerprint_names, namespace_resolver
+from volta.output_capture import DEFAULT_OUTPUT_LIMIT, capture_output, redirect_output
+from volta.shared_tables import RemoteTables, TableServer, attach_private
+
+
+# Imported by every worker before its first job so generated code does not pay for them
+DEFAULT_PRELOAD = ('numpy', 'pandas', 'scipy', 'scipy.stats', 'statsmodels.api', 'sklearn')
+
+
+class ProtectedTables:
+    """Table lookup for a reused worker: each namespace gets its own writable DataFrame.
+
+    A table attached from shared memory is handed out over a private copy-on-write
+    mapping of its segment (see attach_private), so reading it costs nothing and only
+    the pages a job writes are copied; other tables are deep-copied when the code first
+    references them. In-place edits made by one job therefore never reach the worker's
+    table (or the shared-memory segment) seen by the jobs after it, and pandas runs with
+    its default semantics, as it does when code runs in a process of its own.
+    """
+
+    def __init__(self, tables, extras):
+        self._tables = tables
+        self._extras = extras or {}
+
+    def __contains__(self, name):
+        return name in self._extras or name in self._tables
+
+    def __getitem__(self, name):
+        if name in self._extras:
+            return self._extras[name]
+        value = self._tables[name]
+        if not isinstance(value, pd.DataFrame):
+            return value
+        handle = self._tables.handle(name) if isinstance(self._tables, RemoteTables) else None
+        if handle is not None:
+            private = attach_private(handle, value)
+            if private is not None:
+                return private
+        return value.copy(deep=True)
+
+
+def _virtual_memory_size() -> Optional[int]:
+    """Current address-space size of this process in bytes (Linux only)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _peak_rss() -> Optional[int]:
+    """Peak resident set size of this process over its lifetime, in bytes."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _resident_set_size() -> Optional[int]:
+    """Current resident set size of this process in bytes (Linux only)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# seconds between the RSS samples taken while a job runs
+RSS_SAMPLE_INTERVAL = 0.05
+
+
+class _RssSampler:
+    """Samples the RSS of this process in a background thread until stopped; peak is the
+    largest sample (None where the current RSS cannot be read)."""
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.start_rss = _resident_set_size()
+        self.peak = self.start_rss
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        if self.start_rss is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+
+    def _sample(self):
+        while not self._stop.wait(self._interval):
+            self._take()
+
+    def _take(self):
+        rss = _resident_set_size()
+        if rss is not None and rss > self.peak:
+            self.peak = rss
+
+    def stop(self) -> Optional[int]:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._take()
+        return self.peak
+
+
+def _cpu_time() -> float:
+    if resource is None:
+        return time.process_time()
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+@contextlib.contextmanager
+def resource_ceiling(memory_limit: Optional[int] = None, cpu_limit: Optional[float] = None):
+    """Caps what the block may use of this process's resources (POSIX only).
+
+    Args:
+        memory_limit: Bytes the block may grow the address space by (RLIMIT_AS); an
+            allocation beyond it raises MemoryError
+        cpu_limit: CPU seconds the block may use (RLIMIT_CPU); beyond it the kernel
+            kills the process with SIGXCPU
+    """
+    if resource is None or (not memory_limit and not cpu_limit):
+        yield
+        return
+    restore = []
+    current = _virtual_memory_size() if memory_limit else None
+    if current is not None:
+        soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+        ceiling = current + memory_limit if hard == resource.RLIM_INFINITY else min(current + memory_limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (ceiling, hard))
+        restore.append((resource.RLIMIT_AS, (soft, hard)))
+    if cpu_limit:
+        soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        ceiling = math.ceil(_cpu_time() + cpu_limit)
+        resource.setrlimit(resource.RLIMIT_CPU, (ceiling if hard == resource.RLIM_INFINITY else min(ceiling, hard), hard))
+        restore.append((resource.RLIMIT_CPU, (soft, hard)))
+    try:
+        yield
+    finally:
+        for limit, values in restore:
+            resource.setrlimit(limit, values)
+
+
+@contextlib.contextmanager
+def measure_usage(usage: Dict):
+    """Fills usage with the wall time and CPU time (seconds) of the block and, in bytes:
+
+    - peak_rss: the peak RSS of the process while the block ran, sampled every
+      RSS_SAMPLE_INTERVAL seconds (exact when the block sets a new lifetime peak)
+    - rss_growth: how far that peak rose above the RSS at the start of the block
+    - worker_peak_rss: the lifetime peak RSS of the process, which for a reused worker
+      or kernel includes the jobs it ran before
+    """
+    start_wall, start_cpu = time.perf_counter(), _cpu_time()
+    start_peak = _peak_rss()
+    sampler = _RssSampler()
+    try:
+        yield usage
+    finally:
+        usage['wall_time'] = time.perf_counter() - start_wall
+        usage['cpu_time'] = _cpu_time() - start_cpu
+        peak, worker_peak = sampler.stop(), _peak_rss()
+        if worker_peak is not None and start_peak is not None and worker_peak > start_peak:
+            # the block raised the lifetime peak, which is then its own peak
+            peak = max(peak or 0, worker_peak)
+        usage['peak_rss'] = peak
+        usage['rss_growth'] = peak - sampler.start_rss if peak is not None and sampler.start_rss is not None else None
+        usage['worker_peak_rss'] = worker_peak
+
+
+def describe_exit(exitcode) -> str:
+    """Explains why an execution process ended without returning a result."""
+    if exitcode == -getattr(signal, 'SIGXCPU', 0):
+        return "Execution exceeded the CPU time limit and was stopped"
+    return f"Execution process exited unexpectedly (exit code {exitcode})"
+
+
+def format_usage(usage: Dict) -> str:
+    """One-line summary of an execution's usage for the executor log."""
+    parts = [f"status {usage.get('status', '?')}"]
+    if usage.get('wall_time') is not None:
+        parts.append(f"wall {usage['wall_time']:.2f} s")
+    if usage.get('cpu_time') is not None:
+        parts.append(f"CPU {usage['cpu_time']:.2f} s")
+    if usage.get('peak_rss') is not None:
+        parts.append(f"peak RSS {usage['peak_rss'] / 2**20:.0f} MB")
+    if usage.get('rss_growth') is not None:
+        parts.append(f"RSS growth {usage['rss_growth'] / 2**20:.0f} MB")
+    if usage.get('worker_peak_rss') is not None:
+        parts.append(f"worker peak RSS {usage['worker_peak_rss'] / 2**20:.0f} MB")
+    if usage.get('output_bytes') is not None:
+        parts.append(f"output {usage['output_bytes'] / 1024:.1f} KB")
+    if usage.get('output_dropped'):
+        parts.append(f"{usage['output_dropped'] / 1024:.1f} KB elided (full output in {usage.get('output_path')})")
+    return "Execution usage: " + ", ".join(parts)
+
+
+def record_usage(log, usage: Dict):
+    """Adds an execution's usage to an agent log: a summary line under 'executor' and the
+    numbers under 'execution_usage'."""
+    if log is None:
+        return
+    log['executor'].append(format_usage(usage))
+    log.setdefault('execution_usage', []).append(dict(usage))
+
+
+def run_job(code, exec_globals, memory_limit=None, cpu_limit=None, output_limit=DEFAULT_OUTPUT_LIMIT):
+    """Executes code in exec_globals.
+
+    Output beyond output_limit bytes is elided in the middle (see BoundedOutput).
+
+    Returns:
+        (status, output, usage): status is 'ok' (output is the captured stdout/stderr) or
+        'error' (output is the traceback); usage holds wall_time, cpu_time, peak_rss,
+        rss_growth, worker_peak_rss (see measure_usage), output_bytes, output_dropped
+        and, if output was elided, output_path.
+    """
+    output_capture = capture_output(output_limit)
+    usage = {}
+    status = 'ok'
+    with measure_usage(usage):
+        try:
+            with redirect_output(output_capture):
+                with resource_ceiling(memory_limit, cpu_limit):
+                    exec(code, exec_globals)
+        except Exception:
+            status, output = 'error', traceback.format_exc()
+        else:
+            output = output_capture.getvalue()
+    output_capture.close()
+    usage.update(output_capture.usage())
+    return status, output, usage
+
+
+def _table_resolver(tables, extras, fallback):
+    """Resolves a free name of generated code as the worker's namespaces would, without copying tables."""
+    def resolve(name):
+        if name in extras:
+            return extras[name]
+        if name in tables:
+            return tables[name]
+        if fallback is not None and name in fallback:
+            return fallback[name]
+        return vars(builtins)[name]
+    return resolve
+
+
+def _worker_main(conn, tables, extras, fallback_module, preload, table_names=None, limits=()):
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+    fallback = vars(importlib.import_module(fallback_module)) if fallback_module else None
+    if table_names is not None:
+        tables = RemoteTables(conn, table_names)
+    tables = tables if tables is not None else {}
+    protected = ProtectedTables(tables, extras)
+    # fingerprints are taken of the worker's own tables, not of a job's copies
+    resolve = _table_resolver(tables, extras or {}, fallback)
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+        if isinstance(message, tuple) and message[0] == 'fingerprints':
+            conn.send(('fingerprints', fingerprint_names(message[1], resolve)))
+            continue
+        conn.send(run_job(message, LazyNamespace(protected, fallback=fallback), *limits))
+    conn.close()
+
+
+def _forked_main(conn, make_globals, code, limits):
+    exec_globals = make_globals()
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if message is None:
+            return
+        if message[0] == 'fingerprints':
+            conn.send(('fingerprints', fingerprint_names(message[1], namespace_resolver(exec_globals))))
+        elif message[0] == 'run':
+            conn.send(run_job(code, exec_globals, *limits))
+            return
+
+
+async def wait_readable(conn, timeout: Optional[float] = None) -> bool:
+    """Awaits a message (or EOF) on a multiprocessing connection without holding a
+    thread; False if timeout seconds pass first."""
+    loop = asyncio.get_running_loop()
+    ready = loop.create_future()
+    fd = conn.fileno()
+    try:
+        loop.add_reader(fd, lambda: ready.done() or ready.set_result(True))
+    except NotImplementedError:
+        # event loops without reader callbacks (e.g. the proactor loop on Windows)
+        return await asyncio.to_thread(conn.poll, timeout)
+    try:
+        await asyncio.wait_for(ready, timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        loop.remove_reader(fd)
+
+
+class ForkedExecution:
+    """One run of code in a process of its own; used when no ExecutorPool is configured.
+
+    The process is started (forked) right away and waits for instructions:
+    fingerprints() hashes names there, where the tables get loaded, so the
+    execution-cache lookup costs this process nothing, and run() then executes the code
+    against the same namespace. cancel() ends the process without running the code
+    (e.g. after a cache hit).
+
+    Args:
+        make_globals: Called in the new process to build the code's globals
+        code: Python source to execute
+        timeout: Seconds run() waits for the result; None waits indefinitely
+        limits: (memory_limit, cpu_limit, output_limit) as for run_job
+    """
+
+    def __init__(self, make_globals: Callable, code: str, timeout: Optional[float] = None, limits=()):
+        self.timeout = timeout
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(target=_forked_main, args=(child_conn, make_globals, code, tuple(limits)))
+        self._process.start()
+        child_conn.close()
+
+    def fingerprints(self, names) -> Dict[str, Optional[str]]:
+        """fingerprint_names() of names in the execution's namespace (None for all if it died)."""
+        try:
+            self._conn.send(('fingerprints', list(names)))
+            return self._conn.recv()[1]
+        except (EOFError, OSError):
+            return {name: None for name in names}
+
+    async def afingerprints(self, names) -> Dict[str, Optional[str]]:
+        """Awaitable fingerprints()."""
+        try:
+            self._conn.send(('fingerprints', list(names)))
+            await wait_readable(self._conn)
+            return self._conn.recv()[1]
+        except (EOFError, OSError):
+            return {name: None for name in names}
+
+    def run(self) -> Tuple[str, Optional[str], Dict]:
+        """Runs the code and ends the process.
+
+        Returns:
+            (status, output, usage) as ExecutorPool.run, with output None if the process
+            exited without a result.
+        """
+        start = time.perf_counter()
+        try:
+            self._conn.send(('run',))
+            reply = self._conn.recv() if self._conn.poll(self.timeout) else None
+        except (EOFError, OSError):
+            return self._died(start)
+        return self._finish(reply, start)
+
+    async def arun(self) -> Tuple[str, Optional[str], Dict]:
+        """Awaitable run(); the result is awaited on the event loop."""
+        start = time.perf_counter()
+        try:
+            self._conn.send(('run',))
+            reply = self._conn.recv() if await wait_readable(self._conn, self.timeout) else None
+        except (EOFError, OSError):
+            return self._died(start)
+        return self._finish(reply, start)
+
+    def _finish(self, reply, start):
+        self.cancel()
+        if reply is None:
+            return 'timeout', None, {'status': 'timeout', 'wall_time': time.perf_counter() - start}
+        status, output, usage = reply
+        usage['status'] = status
+        return status, output, usage
+
+    def _died(self, start):
+        self._process.join(1)
+        exitcode = self._process.exitcode
+        self.cancel()
+        output = f"Traceback (most recent call last):\n{describe_exit(exitcode)}" if exitcode else None
+        return 'error', output, {'status': 'error', 'wall_time': time.perf_counter() - start}
+
+    def cancel(self):
+        """Ends the process (it exits by itself once it has run the code)."""
+        try:
+            self._conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self._conn.close()
+        self._process.join(1)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+
+
+# reply of a worker that died during an exchange
+_DIED = object()
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.n_jobs = 0
+
+
+def _stop_worker(worker: _Worker, graceful: bool = False):
+    if graceful:
+        try:
+            worker.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        worker.process.join(1)
+    worker.conn.close()
+    if worker.process.is_alive():
+        worker.process.terminate()
+        worker.process.join(5)
+        if worker.process.is_alive():
+            worker.process.kill()
+    worker.process.join()
+
+
+def _stop_workers(workers):
+    """Stops every worker in the list and empties it (also run when a pool is collected)."""
+    for worker in list(workers):
+        _stop_worker(worker, graceful=True)
+    workers.clear()
+
+
+class ExecutorPool:
+    """Pool of pre-forked processes that run generated code against registered tables.
+
+    Workers import the common scientific stack once and keep the tables they have
+    loaded, so a retry does not pay for process start-up, imports or table loading again.
+    Each job is sent over the worker's pipe and runs in a fresh namespace. A job that
+    exceeds its timeout (or crashes the interpreter) takes down only its worker, which
+    is replaced right away.
+
+    With the default 'shared_memory' transport, a table is loaded once in this process
+    the first time any worker references it, copied into a SharedTableStore, and
+    attached by the workers as read-only zero-copy views. Workers therefore cost the
+    same under fork, spawn and forkserver, share one copy of each table, and a worker
+    replaced after a timeout attaches again instead of reloading. The 'inherit'
+    transport hands the session's tables to the worker process directly (copy-on-write
+    under fork, pickled otherwise), and each worker loads lazy tables itself. Either way
+    a job works on its own writable version of each table it references
+    (ProtectedTables: a copy-on-write mapping of shared memory, or a copy), so pandas
+    behaves as it does when the code runs in a process of its own.
+
+    Every job reports its wall time, CPU time, peak RSS (its own and the worker's, see
+    measure_usage) and output size; output beyond output_limit bytes is elided in the
+    middle and spilled to disk.
+    A memory_limit makes allocations beyond it raise MemoryError in the job; a cpu_limit
+    kills a worker whose job uses more CPU time, and the worker is replaced.
+
+    Args:
+        data_session: DataSession whose tables and extras are visible to the code
+        n_workers: Number of worker processes
+        fallback_module: Module whose globals resolve names the code does not define
+            (the coding agent passes its own module so its imports stay available)
+        preload: Modules imported in every worker before its first job
+        transport: 'shared_memory' or 'inherit'
+        memory_limit: Bytes a job may allocate beyond the worker's size; None for no limit
+        cpu_limit: CPU seconds a job may use; None for no limit
+        output_limit: Bytes of output returned per job; None returns all of it
+    """
+
+    def __init__(self, data_session=None, n_workers: int = 1, fallback_module: Optional[str] = None,
+                 preload=DEFAULT_PRELOAD, transport: str = 'shared_memory',
+                 memory_limit: Optional[int] = None, cpu_limit: Optional[float] = None,
+                 output_limit: Optional[int] = DEFAULT_OUTPUT_LIMIT):
+        if transport not in ('shared_memory', 'inherit'):
+            raise ValueError(f"Unknown transport: {transport}")
+        self.data_session = data_session
+        self.n_workers = n_workers
+        self.fallback_module = fallback_module
+        self.preload = tuple(preload)
+        self.transport = transport
+        self.memory_limit = memory_limit
+        self.cpu_limit = cpu_limit
+        self.output_limit = output_limit
+        methods = multiprocessing.get_all_start_methods()
+        self._ctx = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        self._server = None
+        if transport == 'shared_memory':
+            self._server = TableServer(data_session.tables if data_session is not None else None)
+        self._idle = []
+        self._workers = []
+        self._cond = threading.Condition()
+        # (loop, future) of the coroutines waiting in _aacquire
+        self._async_waiters = []
+        self._closed = False
+        self._stats = {'spawns': 0, 'jobs': 0, 'reused': 0, 'timeouts': 0, 'crashes': 0,
+                       'queue_wait_total': 0.0, 'queue_wait_max': 0.0,
+                       'wall_time_total': 0.0, 'cpu_time_total': 0.0, 'peak_rss_max': 0}
+        # stops the workers if the pool is garbage collected without close()
+        self._finalizer = weakref.finalize(self, _stop_workers, self._workers)
+        for _ in range(n_workers):
+            self._idle.append(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        tables, table_names, extras = None, None, None
+        if self.data_session is not None:
+            extras = dict(self.data_session.extras)
+            if self._server is not None:
+                table_names = list(self.data_session.tables)
+            else:
+                tables = self.data_session.tables
+        process = self._ctx.Process(target=_worker_main, daemon=True,
+                                    args=(child_conn, tables, extras, self.fallback_module, self.preload, table_names,
+                                          (self.memory_limit, self.cpu_limit, self.output_limit)))
+        process.start()
+        child_conn.close()
+        worker = _Worker(process, parent_conn)
+        self._workers.append(worker)
+        self._stats['spawns'] += 1
+        return worker
+
+    def _retire(self, worker: _Worker):
+        _stop_worker(worker)
+        if worker in self._workers:  # close() may have stopped it already
+            self._workers.remove(worker)
+
+    def _try_acquire(self) -> Optional[_Worker]:
+        """An idle worker, or None if all are busy; the caller holds _cond."""
+        if self._closed:
+            raise RuntimeError("ExecutorPool is closed")
+        if not self._idle and len(self._workers) < self.n_workers:
+            # workers stopped by release() are started again on demand
+            self._idle.append(self._spawn())
+        return self._idle.pop() if self._idle else None
+
+    def _acquire(self) -> _Worker:
+        with self._cond:
+            worker = self._try_acquire()
+            while worker is None:
+                self._cond.wait()
+                worker = self._try_acquire()
+            return worker
+
+    async def _aacquire(self) -> _Worker:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                worker = self._try_acquire()
+                if worker is not None:
+                    return worker
+                woken = loop.create_future()
+                self._async_waiters.append((loop, woken))
+            try:
+                await woken
+            finally:
+                with self._cond:
+                    if (loop, woken) in self._async_waiters:
+                        self._async_waiters.remove((loop, woken))
+
+    def _give_back(self, worker: _Worker, healthy: bool):
+        """Returns a worker to the idle list, replacing it if it is not healthy; the caller holds _cond."""
+        if not healthy:
+            self._retire(worker)
+            worker = self._spawn() if not self._closed else None
+        if worker is not None:
+            self._idle.append(worker)
+            self._cond.notify()
+            self._wake_async_waiters()
+
+    def _wake_async_waiters(self):
+        """Lets the coroutines waiting in _aacquire try again (they wait again if they
+        lose); the caller holds _cond."""
+        waiters, self._async_waiters = self._async_waiters, []
+        for loop, woken in waiters:
+            try:
+                loop.call_soon_threadsafe(lambda woken=woken: woken.done() or woken.set_result(None))
+            except RuntimeError:
+                # the waiter's event loop is closed
+                pass
+
+    def _exchange(self, worker: _Worker, message, deadline: Optional[float]):
+        """Sends message to a worker and returns its reply, answering its table requests
+        meanwhile; None if the deadline passes. Raises EOFError or OSError if the worker dies."""
+        worker.conn.send(message)
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if not worker.conn.poll(remaining):
+                return None
+            reply = worker.conn.recv()
+            if reply[0] == 'table':
+                worker.conn.send(self._server.export(reply[1]))
+                continue
+            return reply
+
+    async def _aexchange(self, worker: _Worker, message, deadline: Optional[float]):
+        """_exchange() with the replies awaited on the event loop; a table request is
+        answered from a thread, as its first export loads the table and copies it into
+        shared memory."""
+        worker.conn.send(message)
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if not await wait_readable(worker.conn, remaining):
+                return None
+            reply = worker.conn.recv()
+            if reply[0] == 'table':
+                worker.conn.send(await asyncio.to_thread(self._server.export, reply[1]))
+                continue
+            return reply
+
+    def run(self, code: str, timeout: Optional[float] = None) -> Tuple[str, str, Dict]:
+        """Runs code on an idle worker.
+
+        Args:
+            code: Python source to execute
+            timeout: Seconds to wait for the result; None waits indefinitely
+
+        Returns:
+            (status, output, usage): status is 'ok' (output is the captured stdout/stderr),
+            'error' (output is the traceback) or 'timeout' (output is empty). usage is as
+            run_job's; only wall_time is known for a job that timed out or crashed.
+        """
+        start = time.perf_counter()
+        worker = self._acquire()
+        wait = time.perf_counter() - start
+        job_start = time.perf_counter()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            reply = self._exchange(worker, code, deadline)
+        except (EOFError, OSError):
+            reply = _DIED
+        except BaseException:
+            self._abandon(worker)
+            raise
+        return self._finish_job(worker, reply, wait, job_start)
+
+    async def arun(self, code: str, timeout: Optional[float] = None) -> Tuple[str, str, Dict]:
+        """Awaitable run(): waiting for an idle worker and for the result happens on the
+        event loop, so other coroutines keep running meanwhile. Only the first export of
+        a table the job references (see TableServer) runs in the default executor.
+        Cancelling it replaces the worker running the job."""
+        start = time.perf_counter()
+        worker = await self._aacquire()
+        wait = time.perf_counter() - start
+        job_start = time.perf_counter()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            reply = await self._aexchange(worker, code, deadline)
+        except (EOFError, OSError):
+            reply = _DIED
+        except BaseException:
+            self._abandon(worker)
+            raise
+        return self._finish_job(worker, reply, wait, job_start)
+
+    def _finish_job(self, worker: _Worker, reply, wait: float, job_start: float) -> Tuple[str, str, Dict]:
+        """(status, output, usage) of a job from the worker's reply (None after a timeout,
+        _DIED if the worker died), recording it in the stats and giving the worker back."""
+        status, output, usage = 'timeout', '', {}
+        healthy = True
+        if reply is None:
+            healthy = False
+        elif reply is _DIED:
+            # the worker died mid-job (e.g. os._exit, a segfault in an extension or the CPU limit)
+            worker.process.join(1)
+            status = 'error'
+            output = f"Traceback (most recent call last):\n{describe_exit(worker.process.exitcode)}"
+            healthy = False
+        else:
+            status, output, usage = reply
+        usage.setdefault('wall_time', time.perf_counter() - job_start)
+        usage['status'] = status
+
+        with self._cond:
+            self._stats['jobs'] += 1
+            self._stats['reused'] += worker.n_jobs > 0
+            self._stats['queue_wait_total'] += wait
+            self._stats['queue_wait_max'] = max(self._stats['queue_wait_max'], wait)
+            self._stats['wall_time_total'] += usage['wall_time']
+            self._stats['cpu_time_total'] += usage.get('cpu_time') or 0.0
+            self._stats['peak_rss_max'] = max(self._stats['peak_rss_max'], usage.get('peak_rss') or 0)
+            worker.n_jobs += 1
+            if not healthy:
+                self._stats['timeouts' if status == 'timeout' else 'crashes'] += 1
+            self._give_back(worker, healthy)
+        return status, output, usage
+
+    def _abandon(self, worker: _Worker):
+        """Replaces a worker whose exchange was interrupted (e.g. a cancelled arun()); it
+        may still be busy or have a reply pending."""
+        with self._cond:
+            self._give_back(worker, healthy=False)
+
+    def fingerprints(self, names, timeout: Optional[float] = None) -> Dict[str, Optional[str]]:
+        """Execution-cache fingerprints of names (see fingerprint_names), computed by a
+        worker, where the tables live, so this process never loads or hashes them.
+
+        A name whose fingerprint could not be computed in time maps to None.
+        """
+        worker = self._acquire()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            reply = self._exchange(worker, ('fingerprints', list(names)), deadline)
+        except (EOFError, OSError):
+            reply = _DIED
+        except BaseException:
+            self._abandon(worker)
+            raise
+        return self._finish_fingerprints(worker, names, reply)
+
+    async def afingerprints(self, names, timeout: Optional[float] = None) -> Dict[str, Optional[str]]:
+        """Awaitable fingerprints(), waiting on the event loop as arun() does."""
+        worker = await self._aacquire()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            reply = await self._aexchange(worker, ('fingerprints', list(names)), deadline)
+        except (EOFError, OSError):
+            reply = _DIED
+        except BaseException:
+            self._abandon(worker)
+            raise
+        return self._finish_fingerprints(worker, names, reply)
+
+    def _finish_fingerprints(self, worker: _Worker, names, reply) -> Dict[str, Optional[str]]:
+        healthy = reply is not None and reply is not _DIED
+        with self._cond:
+            self._give_back(worker, healthy)
+        return reply[1] if healthy else {name: None for name in names}
+
+    def stats(self) -> Dict:
+        """Pool counters: spawns, jobs, reused (jobs run by an already-used worker),
+        timeouts, crashes, queue wait in seconds (total, max and mean), wall and CPU
+        time of the jobs, the largest peak RSS of a job, and the number and size of
+        tables in shared memory."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['shared_tables'] = len(self._server.store) if self._server is not None else 0
+            stats['shared_bytes'] = self._server.store.nbytes if self._server is not None else 0
+        stats['queue_wait_mean'] = stats['queue_wait_total'] / stats['jobs'] if stats['jobs'] else 0.0
+        return stats
+
+    def release(self):
+        """Stops the idle workers and frees the tables in shared memory.
+
+        The pool stays usable: the next run() starts workers again and the tables are
+        shared again on first reference. Use it between hypotheses so that an idle pool
+        holds no processes or shared memory.
+        """
+        with self._cond:
+            idle, self._idle = self._idle, []
+            for worker in idle:
+                self._workers.remove(worker)
+        for worker in idle:
+            _stop_worker(worker, graceful=True)
+        if self._server is not None:
+            self._server.close()
+
+    def close(self):
+        """Stops every worker; jobs still running are killed."""
+        with self._cond:
+            self._closed = True
+            self._idle = []
+            self._cond.notify_all()
+            self._wake_async_waiters()
+        self._finalizer()
+        if self._server is not None:
+            self._server.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,88 @@
+import ast
+import importlib.util
+import sys
+import threading
+from typing import Dict, List, Optional
+
+
+# module name -> whether it resolves; filled as generated code asks for modules
+_resolved: Dict[str, bool] = {}
+_lock = threading.Lock()
+
+
+def _find_spec(name: str):
+    """Locates a module without importing it or any of its parent packages.
+
+    importlib.util.find_spec imports the parents of a dotted name; here each level is
+    resolved against the previous level's search locations instead. Parents that are
+    already imported are used as they are (e.g. os.path).
+    """
+    parent, _, _ = name.rpartition('.')
+    if not parent or parent in sys.modules:
+        try:
+            return importlib.util.find_spec(name)
+        except (ImportError, ValueError):
+            return None
+    parent_spec = _find_spec(parent)
+    if parent_spec is None or parent_spec.submodule_search_locations is None:
+        return None
+    for finder in sys.meta_path:
+        find_spec = getattr(finder, 'find_spec', None)
+        if find_spec is None:
+            continue
+        try:
+            spec = find_spec(name, list(parent_spec.submodule_search_locations))
+        except (ImportError, ValueError, TypeError):
+            continue
+        if spec is not None:
+            return spec
+    return None
+
+
+def module_available(name: str) -> bool:
+    """Whether name can be imported here; resolved once per name and remembered."""
+    with _lock:
+        if name in _resolved:
+            return _resolved[name]
+    available = name in sys.modules or _find_spec(name) is not None
+    with _lock:
+        _resolved[name] = available
+    return available
+
+
+def imported_modules(source: str) -> List[str]:
+    """Absolute module names imported by source (``import a.b`` gives a and a.b)."""
+    names = []
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules = [node.module]
+        else:
+            continue
+        for module in modules:
+            parts = module.split('.')
+            for i in range(1, len(parts) + 1):
+                if '.'.join(parts[:i]) not in names:
+                    names.append('.'.join(parts[:i]))
+    return names
+
+
+def check_imports(source: str) -> Optional[str]:
+    """Validates the imports of generated code without executing anything.
+
+    Only module names are checked; whether ``from module import name`` finds name is
+    left to the run in the sandbox, where the modules are actually imported.
+
+    Returns:
+        None if every imported module resolves, otherwise an error message like the one
+        a failed import would give.
+    """
+    try:
+        modules = imported_modules(source)
+    except SyntaxError as e:
+        return f"SyntaxError: {e}"
+    for name in modules:
+        if not module_available(name):
+            return f"No module named '{name}'"
+    return None
@@ -0,0 +1,265 @@
+import builtins
+import multiprocessing
+import time
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+from volta.utils import LazyNamespace
+from volta.executor import ProtectedTables, describe_exit, measure_usage, resource_ceiling
+from volta.output_capture import DEFAULT_OUTPUT_LIMIT, capture_output, redirect_output
+from volta.p_value import report_p_value
+from volta.execution_cache import CodeInfo, fingerprint_names, forget_fingerprints, namespace_resolver
+from volta.shared_tables import RemoteTables, TableServer
+
+
+def _run_action(namespace, code, last_line, memory_limit=None, cpu_limit=None, output_limit=DEFAULT_OUTPUT_LIMIT):
+    """Runs one REPL action like PythonAstREPLTool: exec the body, then print the value of
+    the last line if it is an expression. Returns (ok, output, usage)."""
+    output_capture = capture_output(output_limit)
+    usage = {}
+    ok = True
+    with measure_usage(usage), redirect_output(output_capture):
+        try:
+            with resource_ceiling(memory_limit, cpu_limit):
+                exec(code, namespace)
+                try:
+                    result = eval(last_line, namespace)
+                    if result is not None:
+                        print(result, file=output_capture)
+                except MemoryError:
+                    raise
+                except:
+                    pass
+        except MemoryError as e:
+            limit = f" of {memory_limit / 2**20:.0f} MB" if memory_limit else ""
+            ok, output = False, f"MemoryError: the action exceeded the memory limit{limit}. {e}".strip()
+        except Exception as e:
+            ok, output = False, str(e)
+        else:
+            output = output_capture.getvalue()
+    output_capture.close()
+    usage.update(output_capture.usage())
+    usage['status'] = 'ok' if ok else 'error'
+    return ok, output, usage
+
+
+def _kernel_main(conn, tables, table_names, extras):
+    if table_names is not None:
+        tables = RemoteTables(conn, table_names)
+    tables = tables if tables is not None else {}
+    extras = extras or {}
+    namespace = LazyNamespace(ProtectedTables(tables, extras))
+    namespace.update(vars(builtins))
+    namespace['report_p_value'] = report_p_value
+    reserved = set(vars(builtins)) | {'__builtins__', 'report_p_value'}
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+        command = message[0]
+        if command == 'exec':
+            _, code, last_line, limits, forget = message
+            if forget:
+                forget_fingerprints()
+            ok, output, usage = _run_action(namespace, code, last_line, *limits)
+            defined = sorted(name for name in namespace if name not in reserved and not name.startswith('_')
+                             and name not in tables and name not in extras)
+            conn.send(('result', ok, output, defined, usage))
+        elif command == 'set':
+            namespace[message[1]] = message[2]
+            conn.send(('done',))
+        elif command == 'fingerprints':
+            conn.send(('fingerprints', fingerprint_names(message[1], namespace_resolver(namespace))))
+    conn.close()
+
+
+def _stop_kernel(process, conn):
+    conn.close()
+    if process.is_alive():
+        process.terminate()
+        process.join(5)
+        if process.is_alive():
+            process.kill()
+    process.join()
+
+
+class KernelTimeout(Exception):
+    pass
+
+
+class KernelDied(Exception):
+    pass
+
+
+class ReplKernel:
+    """Persistent Python process that runs the ReAct agent's actions for one session.
+
+    Variables defined by an action stay available to the next ones, as in an in-process
+    REPL, but a runaway action cannot block the orchestrator: every action has a
+    wall-clock limit and, on POSIX, ceilings on the memory it may allocate and the CPU
+    time it may use. An action that exceeds the time or CPU limit or kills the
+    interpreter gets the kernel restarted. The new kernel sees the registered tables again (attached from shared
+    memory), replays the imports and the variables pushed with set(), and reports which
+    variables of earlier actions were lost.
+
+    Args:
+        tables: Table mapping (or DataSession) the actions can reference by name
+        extras: Additional objects visible to the actions (e.g. raman_cube)
+        time_limit: Seconds an action may run; None for no limit
+        memory_limit: Bytes an action may allocate beyond the kernel's current size
+        cpu_limit: CPU seconds an action may use
+        output_limit: Bytes of output returned per action; the middle of longer output is elided
+        transport: 'shared_memory' (tables served through a TableServer) or 'inherit'
+    """
+
+    def __init__(self, tables=None, extras: Optional[Dict] = None, time_limit: Optional[float] = None,
+                 memory_limit: Optional[int] = None, transport: str = 'shared_memory', cpu_limit: Optional[float] = None,
+                 output_limit: Optional[int] = DEFAULT_OUTPUT_LIMIT):
+        if hasattr(tables, 'namespace'):  # a DataSession
+            extras = dict(tables.extras, **(extras or {}))
+            tables = tables.tables
+        self.tables = tables if tables is not None else {}
+        self.extras = dict(extras or {})
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
+        self.cpu_limit = cpu_limit
+        self.output_limit = output_limit
+        self.transport = transport
+        methods = multiprocessing.get_all_start_methods()
+        self._ctx = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        self._server = TableServer(self.tables) if transport == 'shared_memory' else None
+        self._pushed = {}
+        self._imports: List[str] = []
+        self._defined: List[str] = []
+        self.restarts = 0
+        self._process = None
+        self._conn = None
+        self._finalizer = None
+        self._start()
+
+    def _start(self):
+        parent_conn, child_conn = self._ctx.Pipe()
+        tables, table_names = (None, list(self.tables)) if self._server is not None else (self.tables, None)
+        self._process = self._ctx.Process(target=_kernel_main, daemon=True,
+                                          args=(child_conn, tables, table_names, self.extras))
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        # stops the process if the kernel is garbage collected without close()
+        self._finalizer = weakref.finalize(self, _stop_kernel, self._process, parent_conn)
+        # rehydrate: earlier imports and pushed variables; the tables come back on first reference
+        for name, value in self._pushed.items():
+            self._request(('set', name, value))
+        self._defined = list(self._pushed)
+        if self._imports:
+            self._defined = self._request(('exec', "\n".join(self._imports), "None", (), False))[3]
+
+    def _request(self, message, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            self._conn.send(message)
+            while True:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                if not self._conn.poll(remaining):
+                    raise KernelTimeout()
+                reply = self._conn.recv()
+                if reply[0] == 'table':
+                    self._conn.send(self._server.export(reply[1]))
+                    continue
+                return reply
+        except (EOFError, OSError, BrokenPipeError):
+            raise KernelDied()
+
+    def _kill(self):
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def restart(self):
+        """Replaces the kernel process; tables, imports and pushed variables are restored."""
+        self._kill()
+        self.restarts += 1
+        self._start()
+
+    def run(self, code: str, last_line: str, forget_fingerprints: bool = False) -> Tuple[bool, str, Dict]:
+        """Runs one action.
+
+        Returns:
+            (ok, output, usage): output is the printed output, or the error message when
+            the action raised, timed out or crashed the kernel. usage holds wall_time,
+            cpu_time, peak_rss and rss_growth (of the action), worker_peak_rss (of the
+            kernel, over all its actions), output_bytes and status.
+        """
+        start = time.perf_counter()
+        try:
+            _, ok, output, defined, usage = self._request(
+                ('exec', code, last_line, (self.memory_limit, self.cpu_limit, self.output_limit), forget_fingerprints),
+                timeout=self.time_limit)
+        except (KernelTimeout, KernelDied) as e:
+            usage = {'wall_time': time.perf_counter() - start}
+            if isinstance(e, KernelTimeout):
+                usage['status'] = 'timeout'
+                reason = f"Execution exceeded the time limit of {self.time_limit:.0f} seconds and was stopped"
+            else:
+                self._process.join(1)
+                usage['status'] = 'crashed'
+                reason = describe_exit(self._process.exitcode)
+            defined = self._defined
+            self.restart()
+            lost = [name for name in defined if name not in self._defined]
+            message = f"{reason}. The Python session was restarted: the datasets are available again"
+            if lost:
+                message += f", but these variables from earlier steps are lost and must be recomputed: {', '.join(lost)}"
+            message += "."
+            if "limit" in reason:
+                message += " Please use a more efficient implementation."
+            return False, message, usage
+        self._defined = defined
+        if ok:
+            imports = CodeInfo(code + "\n" + last_line).import_source
+            if imports and imports not in self._imports:
+                self._imports.append(imports)
+        return ok, output, usage
+
+    def set(self, name, value):
+        """Defines a variable in the kernel; it is restored if the kernel restarts."""
+        if self.extras.get(name) is value:
+            return
+        self._pushed[name] = value
+        self._request(('set', name, value))
+
+    def fingerprints(self, names) -> Dict[str, Optional[str]]:
+        """Execution-cache fingerprints of names, computed in the kernel."""
+        try:
+            return self._request(('fingerprints', list(names)), timeout=self.time_limit)[1]
+        except (KernelTimeout, KernelDied):
+            self.restart()
+            return {name: None for name in names}
+
+    def close(self):
+        if self._conn is not None and self._process.is_alive():
+            try:
+                self._conn.send(None)
+            except (OSError, BrokenPipeError):
+                pass
+            self._process.join(1)
+        self._kill()
+        if self._server is not None:
+            self._server.close()
+
+
+class KernelGlobals:
+    """Write-through view of a kernel's namespace for tools that share the REPL globals
+    (e.g. the particle tool stores its results as variables)."""
+
+    def __init__(self, kernel: ReplKernel):
+        self._kernel = kernel
+
+    def __setitem__(self, name, value):
+        self._kernel.set(name, value)
+
+    def update(self, values=(), **kwargs):
+        for name, value in dict(values, **kwargs).items():
+            self._kernel.set(name, value)
@@ -124,6 +124,21 @@ def _convert_message_to_dict(message: BaseMessage) -> dict:
     return message_dict
 
 
+def _create_usage_metadata(token_usage: Mapping[str, Any]) -> Dict:
+    """usage_metadata of a message from the OpenAI-style usage of the server's response."""
+    input_tokens = token_usage.get("prompt_tokens") or 0
+    output_tokens = token_usage.get("completion_tokens") or 0
+    usage = {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": token_usage.get("total_tokens") or input_tokens + output_tokens,
+    }
+    cached_tokens = (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+    if cached_tokens is not None:
+        usage["input_token_details"] = {"cache_read": cached_tokens}
+    return usage
+
+
 def _convert_dict_to_message(_dict: Mapping[str, Any]) -> BaseMessage:
     """Convert a dictionary to a LangChain message.
 
@@ -435,6 +450,9 @@ following JSON format:
                     res['finish_reason'] = 'tool_calls'
                     res["message"]['full_message'] = scratchpad + json.dumps(parsed_message, indent=4)
             message = _convert_dict_to_message(res["message"])
+            if isinstance(message, AIMessage) and response.get("usage"):
+                # callbacks and chains read usage from the message, not llm_output
+                message.usage_metadata = _create_usage_metadata(response["usage"])
             generation_info = dict(finish_reason=res.get("finish_reason"))
             if "logprobs" in res:
                 generation_info["logprobs"] = res["logprobs"]
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from typing import Any, Dict, Optional, Sequence
+
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+
+# bump when the key layout changes, so old entries stop matching
+CACHE_VERSION = 1
+
+# message fields that differ between runs without changing what the model is asked
+_VOLATILE_FIELDS = {'id', 'response_metadata', 'usage_metadata'}
+
+
+def default_cache_path() -> str:
+    return os.path.join(os.path.expanduser('~'), '.cache', 'volta', 'llm_cache.sqlite')
+
+
+def _normalize(value):
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items() if key not in _VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Serialized messages without run-specific ids and metadata, with sorted keys."""
+    try:
+        return json.dumps(_normalize(json.loads(prompt)), sort_keys=True)
+    except ValueError:  # a plain-text prompt
+        return prompt
+
+
+class LLMCache(BaseCache):
+    """SQLite cache of model responses, shared by every agent that calls a model.
+
+    The key is the model's configuration (model name, temperature, bound tools or
+    structured-output schema, ...) plus a hash of the normalized messages, so replaying
+    a run answers every identical call from disk. Calls at a temperature above zero are
+    cached too: a replay then repeats the recorded sample instead of drawing a new one.
+
+    The file can be shared by several processes (e.g. the workers of a benchmark sweep);
+    each process opens its own connection and writers wait for each other. Entries older
+    than max_age seconds are dropped, then the least recently used ones once the stored
+    responses exceed max_bytes.
+
+    Args:
+        path: SQLite file; created if missing
+        max_bytes: Total size of cached responses to keep
+        max_age: Seconds an entry stays valid; None keeps entries until evicted by size
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = 256 << 20, max_age: Optional[float] = None):
+        self.path = path or default_cache_path()
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._db = None
+        self._pid = None
+        self.counters = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._connect()
+
+    def _connect(self):
+        # a connection must not cross a fork, so each process opens its own
+        if self._db is not None and self._pid == os.getpid():
+            return self._db
+        self._db = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, llm TEXT, response TEXT, "
+                         "size INTEGER, created REAL, last_used REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._db.commit()
+        self._pid = os.getpid()
+        return self._db
+
+    @staticmethod
+    def key(prompt: str, llm_string: str) -> str:
+        parts = [CACHE_VERSION, llm_string, normalize_prompt(prompt)]
+        return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self.key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            row = db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.max_age is not None and now - row[1] > self.max_age:
+                row = None
+            if row is None:
+                self.counters['misses'] += 1
+                return None
+            db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            db.commit()
+            self.counters['hits'] += 1
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', LangChainBetaWarning)
+                generations = [loads(generation) for generation in json.loads(row[0])]
+        except Exception:
+            # written by an incompatible langchain version; the call is made again
+            return None
+        # lets usage accounting tell a hit from a call to the provider
+        for generation in generations:
+            generation.generation_info = dict(generation.generation_info or {}, llm_cache_hit=True)
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        response = json.dumps([dumps(generation) for generation in return_val])
+        if len(response) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                       (self.key(prompt, llm_string), llm_string, response, len(response), now, now))
+            self.counters['stores'] += 1
+            self._evict(db, now)
+            db.commit()
+
+    def _evict(self, db, now):
+        if self.max_age is not None:
+            self.counters['evictions'] += db.execute("DELETE FROM responses WHERE created < ?",
+                                                     (now - self.max_age,)).rowcount
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        while total > self.max_bytes:
+            row = db.execute("SELECT key, size FROM responses ORDER BY last_used LIMIT 1").fetchone()
+            db.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+            total -= row[1]
+            self.counters['evictions'] += 1
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            db = self._connect()
+            db.execute("DELETE FROM responses")
+            db.commit()
+
+    def stats(self) -> Dict:
+        """Counters of this process plus the current number and size of entries."""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['entries'], stats['bytes'] = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return stats
+
+    def close(self):
+        with self._lock:
+            if self._db is not None and self._pid == os.getpid():
+                self._db.close()
+            self._db = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_lock'], state['_db'], state['_pid'] = None, None, None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+# cache passed to every model built by get_llm / ReactAgent.get_model; None disables caching
+_active_cache: Optional[LLMCache] = None
+
+
+def open_llm_cache(spec) -> Optional[LLMCache]:
+    """Builds a cache from a constructor argument: None/False (no cache), True (the default
+    file under ~/.cache/volta), a path to an SQLite file or an LLMCache instance."""
+    if spec is None or spec is False:
+        return None
+    if isinstance(spec, LLMCache):
+        return spec
+    if spec is True:
+        return LLMCache()
+    return LLMCache(path=str(spec))
+
+
+def use_llm_cache(spec) -> Optional[LLMCache]:
+    """Sets the cache for models built from now on in this process (see open_llm_cache)."""
+    global _active_cache
+    _active_cache = open_llm_cache(spec)
+    return _active_cache
+
+
+def active_llm_cache() -> Optional[LLMCache]:
+    return _active_cache
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import threading
+from typing import Callable, Dict, Hashable, Tuple
+
+import openai
+from langchain_anthropic import ChatAnthropic
+from langchain_openai import ChatOpenAI
+
+
+# Chat models, SDK clients and structured-output wrappers shared by every agent in the
+# process: roles asking for the same model get the same object, and all models talking
+# to the same endpoint with the same key use one SDK client (and its keep-alive pool).
+_models: Dict[Tuple, object] = {}
+_clients: Dict[Tuple, tuple] = {}
+_structured: Dict[Tuple, object] = {}
+_lock = threading.RLock()
+
+_KEY_ENV = {'anthropic': 'ANTHROPIC_API_KEY', 'openai': 'OPENAI_API_KEY', 'google': 'GOOGLE_API_KEY'}
+
+
+def _digest(secret) -> str:
+    if secret is None:
+        return ''
+    if hasattr(secret, 'get_secret_value'):
+        secret = secret.get_secret_value()
+    return hashlib.sha256(str(secret).encode()).hexdigest()[:16]
+
+
+def _hashable(value) -> Hashable:
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def model_key(builder: str, provider: str, model: str, api_key=None, **params) -> Tuple:
+    """Registry key of a chat model: who builds it, provider, model, key and the other
+    constructor arguments. The key is hashed; without one the provider's environment
+    variable is used, as the model itself would."""
+    if not api_key or api_key == "EMPTY":
+        api_key = os.environ.get(_KEY_ENV.get(provider.lower(), ''), api_key)
+    return (builder, provider.lower(), model, _digest(api_key)) + tuple(
+        sorted((name, _hashable(value)) for name, value in params.items()))
+
+
+def shared_model(key: Tuple, build: Callable):
+    """The model registered under key, built (and its client shared) on first use."""
+    with _lock:
+        llm = _models.get(key)
+        if llm is None:
+            llm = _models[key] = share_client(build())
+        return llm
+
+
+def _headers(headers) -> Tuple:
+    return tuple(sorted((headers or {}).items()))
+
+
+def share_client(llm):
+    """Points llm at the registered SDK client for its endpoint, key and retry settings."""
+    with _lock:
+        # CustomChatModel gets its client from local_client() instead
+        if isinstance(llm, ChatAnthropic) and llm._client is not None:
+            key = ('anthropic', llm.anthropic_api_url, _digest(llm.anthropic_api_key),
+                   llm.default_request_timeout, llm.max_retries, _headers(llm.default_headers))
+            llm._client, llm._async_client = _clients.setdefault(key, (llm._client, llm._async_client))
+        elif (type(llm) is ChatOpenAI and llm.root_client is not None
+              and llm.http_client is None and llm.http_async_client is None):
+            key = ('openai', llm.openai_api_base, _digest(llm.openai_api_key), llm.openai_organization,
+                   repr(llm.request_timeout), llm.max_retries, _headers(llm.default_headers))
+            root, root_async = _clients.setdefault(key, (llm.root_client, llm.root_async_client))
+            llm.root_client, llm.client = root, root.chat.completions
+            if root_async is not None:
+                llm.root_async_client, llm.async_client = root_async, root_async.chat.completions
+    return llm
+
+
+def local_client(base_url: str, api_key: str = "EMPTY") -> openai.Client:
+    """The OpenAI-compatible client of a locally served model, one per server and key."""
+    key = ('local', base_url, _digest(api_key))
+    with _lock:
+        if key not in _clients:
+            _clients[key] = (openai.Client(base_url=base_url, api_key=api_key),)
+        return _clients[key][0]
+
+
+def structured_output(llm, schema, **kwargs):
+    """llm.with_structured_output(schema, **kwargs), built once per model and schema."""
+    key = (id(llm), schema) + tuple(sorted((name, _hashable(value)) for name, value in kwargs.items()))
+    with _lock:
+        runnable = _structured.get(key)
+        if runnable is None or runnable[0] is not llm:
+            # the model is kept with its wrapper, so id(llm) cannot be reused while registered
+            runnable = _structured[key] = (llm, llm.with_structured_output(schema, **kwargs))
+        return runnable[1]
+
+
+def clear_llm_registry():
+    """Forgets all shared models, clients and wrappers; later calls build new ones."""
+    with _lock:
+        _models.clear()
+        _clients.clear()
+        _structured.clear()
@@ -0,0 +1,262 @@
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+# USD per million (input, output) tokens, matched by longest model-name prefix; edit or
+# extend for other models. Calls to models not listed (e.g. locally served ones) are
+# counted but not priced.
+PRICES = {
+    'claude-3-5-sonnet': (3.0, 15.0),
+    'claude-3-7-sonnet': (3.0, 15.0),
+    'claude-sonnet-4': (3.0, 15.0),
+    'claude-3-5-haiku': (0.8, 4.0),
+    'claude-3-haiku': (0.25, 1.25),
+    'claude-3-opus': (15.0, 75.0),
+    'claude-opus-4': (15.0, 75.0),
+    'gpt-4o-mini': (0.15, 0.6),
+    'gpt-4o': (2.5, 10.0),
+    'gpt-4-turbo': (10.0, 30.0),
+    'o1-mini': (3.0, 12.0),
+    'o1': (15.0, 60.0),
+    'gemini-1.5-flash': (0.075, 0.3),
+    'gemini-1.5-pro': (1.25, 5.0),
+    'gemini-2.0-flash': (0.1, 0.4),
+}
+
+# price of input tokens read from / written to the provider's prompt cache, as a share
+# of the input price
+CACHE_PRICE_FACTORS = {
+    'anthropic': (0.1, 1.25),
+    'openai': (0.5, 1.0),
+    'google': (0.25, 1.0),
+}
+
+_COUNTERS = ('calls', 'cache_hits', 'errors', 'input_tokens', 'output_tokens',
+             'cache_read_tokens', 'cache_creation_tokens', 'latency')
+
+
+def model_price(model: Optional[str]):
+    """(input, output) USD per million tokens of model, or None if it is not priced."""
+    matches = [prefix for prefix in PRICES if model and model.startswith(prefix)]
+    return PRICES[max(matches, key=len)] if matches else None
+
+
+def provider_of(model: Optional[str], llm_type: Optional[str] = None) -> str:
+    model = model or ''
+    if model.startswith('claude-') or 'anthropic' in (llm_type or ''):
+        return 'anthropic'
+    if model.startswith('gemini'):
+        return 'google'
+    if model.startswith(('gpt-', 'o1')):
+        return 'openai'
+    return 'local'
+
+
+def _no_tokens() -> Dict[str, int]:
+    return {'input_tokens': 0, 'output_tokens': 0, 'cache_read_tokens': 0, 'cache_creation_tokens': 0}
+
+
+def token_usage(response) -> Dict[str, int]:
+    """Tokens of an LLMResult: input, output and provider prompt-cache reads/writes."""
+    usage = _no_tokens()
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, 'message', None), 'usage_metadata', None)
+            if metadata:
+                details = metadata.get('input_token_details') or {}
+                usage['input_tokens'] += metadata.get('input_tokens', 0)
+                usage['output_tokens'] += metadata.get('output_tokens', 0)
+                usage['cache_read_tokens'] += details.get('cache_read') or 0
+                usage['cache_creation_tokens'] += details.get('cache_creation') or 0
+    if not usage['input_tokens'] and not usage['output_tokens']:
+        reported = (response.llm_output or {}).get('usage') or (response.llm_output or {}).get('token_usage') or {}
+        usage['input_tokens'] = reported.get('input_tokens', reported.get('prompt_tokens', 0)) or 0
+        usage['output_tokens'] = reported.get('output_tokens', reported.get('completion_tokens', 0)) or 0
+    return usage
+
+
+def from_cache(response) -> bool:
+    """Whether an LLMResult was answered by the local response cache (see LLMCache)."""
+    return any((generation.generation_info or {}).get('llm_cache_hit')
+               for generations in response.generations for generation in generations)
+
+
+def call_cost(call: Dict) -> Optional[float]:
+    """USD cost of one recorded call; 0 for a cache hit, None if the model is not priced."""
+    if call.get('cache_hit'):
+        return 0.0
+    price = model_price(call.get('model'))
+    if price is None:
+        return None
+    read_factor, write_factor = CACHE_PRICE_FACTORS.get(call.get('provider'), (1.0, 1.0))
+    cached = call['cache_read_tokens'] + call['cache_creation_tokens']
+    input_cost = (max(call['input_tokens'] - cached, 0) + read_factor * call['cache_read_tokens']
+                  + write_factor * call['cache_creation_tokens']) * price[0]
+    return (input_cost + call['output_tokens'] * price[1]) / 1e6
+
+
+def _empty_totals() -> Dict:
+    totals = {name: 0 for name in _COUNTERS}
+    totals['latency'] = 0.0
+    totals['cost_usd'] = 0.0
+    totals['unpriced_calls'] = 0
+    return totals
+
+
+def _add(totals: Dict, call: Dict):
+    totals['calls'] += 1
+    totals['cache_hits'] += bool(call.get('cache_hit'))
+    totals['errors'] += bool(call.get('error'))
+    for name in ('input_tokens', 'output_tokens', 'cache_read_tokens', 'cache_creation_tokens', 'latency'):
+        totals[name] += call[name]
+    if call['cost_usd'] is None:
+        totals['unpriced_calls'] += 1
+    else:
+        totals['cost_usd'] += call['cost_usd']
+
+
+class UsageLog:
+    """The model calls made while this log is active (see track_usage).
+
+    Each call records its role (the graph node or agent that made it), model, input and
+    output tokens, tokens read from or written to the provider's prompt cache, latency,
+    whether it was answered by the local response cache, and its estimated cost.
+    """
+
+    def __init__(self, hypothesis: Optional[str] = None):
+        self.hypothesis = hypothesis
+        self.calls: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, call: Dict):
+        with self._lock:
+            self.calls.append(call)
+
+    def summary(self) -> Dict:
+        """Totals over all calls, by role and by model."""
+        with self._lock:
+            calls = list(self.calls)
+        summary = {'total': _empty_totals(), 'by_role': {}, 'by_model': {}}
+        for call in calls:
+            _add(summary['total'], call)
+            _add(summary['by_role'].setdefault(call['role'] or 'other', _empty_totals()), call)
+            _add(summary['by_model'].setdefault(call['model'] or 'unknown', _empty_totals()), call)
+        return summary
+
+
+def merge_usage(summaries: Iterable[Optional[Dict]]) -> Dict:
+    """Adds up UsageLog.summary() dicts, e.g. those of the hypotheses of a benchmark."""
+    merged = {'total': _empty_totals(), 'by_role': {}, 'by_model': {}}
+    for summary in summaries:
+        if not summary:
+            continue
+        for group in ('by_role', 'by_model'):
+            for name, totals in summary.get(group, {}).items():
+                merged_totals = merged[group].setdefault(name, _empty_totals())
+                for key, value in totals.items():
+                    merged_totals[key] = merged_totals.get(key, 0) + value
+        for key, value in summary.get('total', {}).items():
+            merged['total'][key] = merged['total'].get(key, 0) + value
+    return merged
+
+
+def format_usage(summary: Dict) -> str:
+    """One line per role: calls, tokens, latency and cost."""
+    lines = []
+    rows = sorted(summary['by_role'].items(), key=lambda item: -item[1]['cost_usd']) + [('total', summary['total'])]
+    for role, totals in rows:
+        lines.append(f"{role}: {totals['calls']} calls ({totals['cache_hits']} cached), "
+                     f"{totals['input_tokens']} in / {totals['output_tokens']} out tokens "
+                     f"({totals['cache_read_tokens']} from prompt cache), {totals['latency']:.1f}s, "
+                     f"${totals['cost_usd']:.4f}" + (f" + {totals['unpriced_calls']} unpriced" if totals['unpriced_calls'] else ""))
+    return "\n".join(lines)
+
+
+# log and role of the calls made in the current context; contextvars follow the calls
+# into threads started by langchain and into asyncio tasks
+_active_log = contextvars.ContextVar('llm_usage_log', default=None)
+_active_role = contextvars.ContextVar('llm_usage_role', default=None)
+
+
+@contextlib.contextmanager
+def track_usage(hypothesis: Optional[str] = None):
+    """Records the model calls made inside the block in a new UsageLog, which it yields."""
+    usage = UsageLog(hypothesis)
+    token = _active_log.set(usage)
+    try:
+        yield usage
+    finally:
+        _active_log.reset(token)
+
+
+@contextlib.contextmanager
+def llm_role(role: str):
+    """Tags the model calls made inside the block with role."""
+    token = _active_role.set(role)
+    try:
+        yield
+    finally:
+        _active_role.reset(token)
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """Callback of every model built by get_llm / ReactAgent.get_model; adds each call to
+    the UsageLog active where the call was made (calls outside track_usage are ignored)."""
+
+    # only bookkeeping, so async calls need not hand it to a thread
+    run_inline = True
+
+    def __init__(self):
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, kwargs):
+        usage = _active_log.get()
+        if usage is None:
+            return
+        params = kwargs.get('invocation_params') or {}
+        model = params.get('model') or params.get('model_name')
+        with self._lock:
+            self._runs[run_id] = (usage, _active_role.get(), model, params.get('_type'), time.perf_counter())
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs: Any) -> None:
+        self._start(run_id, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs: Any) -> None:
+        self._start(run_id, kwargs)
+
+    def _finish(self, run_id, response=None, error=None):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        usage, role, model, llm_type, start = run
+        cache_hit = response is not None and from_cache(response)
+        tokens = token_usage(response) if response is not None and not cache_hit else _no_tokens()
+        call = dict(role=role, model=model, provider=provider_of(model, llm_type), hypothesis=usage.hypothesis,
+                    cache_hit=cache_hit, error=error is not None, latency=time.perf_counter() - start, **tokens)
+        call['cost_usd'] = call_cost(call)
+        usage.add(call)
+
+    def on_llm_end(self, response, *, run_id, **kwargs: Any) -> None:
+        self._finish(run_id, response=response)
+
+    def on_llm_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self._finish(run_id, error=error)
+
+
+# one handler for the process, so adding it does not change a model's registry key
+usage_handler = UsageCallbackHandler()
+
+
+def usage_kwargs(kwargs: Dict) -> Dict:
+    """Adds the usage callback to a chat model's kwargs."""
+    callbacks = list(kwargs.get('callbacks') or [])
+    if usage_handler in callbacks:
+        return kwargs
+    return dict(kwargs, callbacks=callbacks + [usage_handler])
@@ -0,0 +1,244 @@
+import os
+import json
+import shutil
+import hashlib
+import pickle
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+from volta.utils import CACHE_DIR_NAME, _source_signature
+from volta.data_registry import default_registry
+
+
+def _file_hash(path, chunk_size=1 << 20):
+    """sha1 of a file's contents, used when the size/mtime signature alone is inconclusive."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _array_cache_dir(source_path):
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(source_path)), CACHE_DIR_NAME)
+    return os.path.join(cache_dir, f"{os.path.basename(source_path)}.npy")
+
+
+def read_array_cache(source_path):
+    """Loads the parsed-table cache of source_path with every numeric column memory-mapped.
+
+    Columns are mapped copy-on-write, so processes loading the same file share the
+    page cache instead of each holding a private parsed copy, and in-place edits by
+    one process never reach the cache or the others.
+
+    Returns:
+        The cached DataFrame, or None if there is no cache or the source has changed.
+    """
+    cache_dir = _array_cache_dir(source_path)
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    signature = _source_signature(source_path)
+    if meta.get('source') != signature:
+        # a checkout or copy touches the mtime without changing the contents
+        if meta.get('source', {}).get('size') != signature['size'] or meta.get('sha1') != _file_hash(source_path):
+            return None
+        meta['source'] = signature
+        _write_meta(meta_path, meta)
+
+    try:
+        columns = {}
+        for i, col in enumerate(meta['columns']):
+            if col['kind'] == 'npy':
+                # plain ndarray view of the map; the np.memmap subclass confuses pandas
+                columns[col['name']] = np.load(os.path.join(cache_dir, f"{i}.npy"), mmap_mode='c').view(np.ndarray)
+            else:
+                with open(os.path.join(cache_dir, f"{i}.pkl"), 'rb') as f:
+                    columns[col['name']] = pickle.load(f)
+        # copy=False keeps one block per memory-mapped column instead of consolidating into a new array
+        df = pd.DataFrame(columns, copy=False)
+        if meta.get('index') is not None:
+            with open(os.path.join(cache_dir, 'index.pkl'), 'rb') as f:
+                df.index = pickle.load(f)
+        return df
+    except Exception as e:
+        print(f"Ignoring unreadable cache {cache_dir}: {e}")
+        return None
+
+
+def write_array_cache(source_path, df):
+    """Writes df as a directory of per-column .npy files (object columns are pickled)."""
+    cache_dir = _array_cache_dir(source_path)
+    tmp_dir = f"{cache_dir}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(tmp_dir, exist_ok=True)
+        meta = {'source': _source_signature(source_path), 'sha1': _file_hash(source_path), 'columns': []}
+        for i, name in enumerate(df.columns):
+            values = df.iloc[:, i]
+            if values.dtype.kind in 'biufcmM':
+                np.save(os.path.join(tmp_dir, f"{i}.npy"), np.ascontiguousarray(values.to_numpy()))
+                meta['columns'].append({'name': name, 'kind': 'npy'})
+            else:
+                with open(os.path.join(tmp_dir, f"{i}.pkl"), 'wb') as f:
+                    pickle.dump(values.to_numpy(), f, protocol=pickle.HIGHEST_PROTOCOL)
+                meta['columns'].append({'name': name, 'kind': 'pickle'})
+        meta['index'] = None
+        if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+            with open(os.path.join(tmp_dir, 'index.pkl'), 'wb') as f:
+                pickle.dump(df.index, f, protocol=pickle.HIGHEST_PROTOCOL)
+            meta['index'] = 'pickle'
+        _write_meta(os.path.join(tmp_dir, 'meta.json'), meta)
+
+        # swap the whole directory so readers never see a half-written cache
+        if os.path.exists(cache_dir):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        os.replace(tmp_dir, cache_dir)
+    except OSError as e:
+        print(f"Could not write array cache for {source_path}: {e}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _write_meta(meta_path, meta):
+    tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+    except OSError as e:
+        print(f"Could not write cache metadata {meta_path}: {e}")
+
+
+def read_csv_cached(path, use_cache=True, **read_csv_kwargs):
+    """pd.read_csv with a memory-mapped binary cache next to the file.
+
+    The first call parses the CSV and writes the cache; later calls (from any process)
+    map the cached columns instead of parsing again. The cache is invalidated when the
+    CSV's size/mtime change and its contents hash differs.
+    """
+    if use_cache and not read_csv_kwargs:
+        df = read_array_cache(path)
+        if df is not None:
+            return df
+    df = pd.read_csv(path, **read_csv_kwargs)
+    if use_cache and not read_csv_kwargs:
+        write_array_cache(path, df)
+    return df
+
+
+class BatteryDataLoader:
+    """
+    Data loader for the operando Raman battery experiment.
+    Loads Raman peak decomposition data and voltage profile data from a Battery_Data folder.
+
+    Scripts that need a different prompt description subclass this and override
+    `_generate_data_description`.
+    """
+
+    # table name -> (file name, required)
+    data_files = {
+        "df_raman_peaks": ("raman_peaks_decomposed.csv", True),
+        "df_voltage_profile": ("voltage_profile_detailed.csv", False),
+    }
+
+    def __init__(self, data_folder: str, random_seed: int = 42, use_cache: bool = True):
+        """
+        Initialize the battery data loader.
+
+        Args:
+            data_folder: Path to the Battery_Data folder containing CSV files
+            random_seed: Random seed for any permutation operations
+            use_cache: Whether to keep a memory-mapped binary cache of the parsed CSVs
+        """
+        self.data_path = data_folder
+        self.random_seed = random_seed
+        self.use_cache = use_cache
+        self.table_dict = {}
+        self._load_battery_data()
+        self.data_desc = self._generate_data_description()
+
+    def _load_battery_data(self):
+        """Load the battery experiment CSV files."""
+        for name, (file_name, required) in self.data_files.items():
+            path = os.path.join(self.data_path, file_name)
+            if os.path.exists(path):
+                self.table_dict[name] = read_csv_cached(path, use_cache=self.use_cache)
+            elif required:
+                raise FileNotFoundError(f"{file_name} not found: {path}")
+
+    def _generate_data_description(self) -> str:
+        """Generate a description of the battery datasets."""
+        desc = """
+=== Battery Experiment Data Description ===
+
+This dataset contains Operando Raman Spectroscopy data from Li-rich layered oxide cathode cycling.
+
+"""
+        for name, df in self.table_dict.items():
+            if df is not None:
+                desc += f"**{name}**:\n"
+                desc += f"Columns: {df.columns.tolist()}\n"
+                desc += f"Shape: {df.shape}\n"
+                desc += f"Sample row: {dict(zip(df.columns, df.iloc[0]))}\n\n"
+
+                # Add column descriptions for key columns
+                if name == "df_raman_peaks":
+                    desc += """
+Column Descriptions for df_raman_peaks:
+- pixel_id: Spatial pixel identifier (0-899 for 30x30 grid)
+- time_idx: Time step index (0-113, each step is 15 minutes)
+- Eg_Center: E_g peak position in cm^{-1} (~475 cm^{-1}, M-O bending)
+- Eg_Amp: E_g peak amplitude
+- Eg_Sigma: E_g peak width
+- A1g_Center: A_{1g} peak position in cm^{-1} (~590 cm^{-1}, M-O stretching, PRIMARY SOC INDICATOR)
+- A1g_Amp: A_{1g} peak amplitude
+- A1g_Sigma: A_{1g} peak width
+- D_Center: D-band center (~1350 cm^{-1}, disordered carbon)
+- D_Amp: D-band amplitude
+- D_Sigma: D-band width
+- G_Center: G-band center (~1585 cm^{-1}, graphitic carbon)
+- G_Amp: G-band amplitude
+- G_Sigma: G-band width
+- ID_IG_Ratio: Ratio of D-band to G-band intensity (carbon disorder indicator)
+- X, Y: Spatial coordinates on the 30x30 um grid
+- Time_Min: Time in minutes from start
+- Voltage: Corresponding cell voltage (V vs Li/Li+)
+
+"""
+                elif name == "df_voltage_profile":
+                    desc += """
+Column Descriptions for df_voltage_profile:
+- time/h: Time in hours from start of experiment
+- Ewe/V: Working electrode voltage (V vs Li/Li+)
+  - Charging: Voltage increases from ~3.0V to ~4.7V (delithiation)
+  - Discharging: Voltage decreases from ~4.7V to ~3.0V (lithiation)
+
+"""
+        return desc
+
+    def get_data(self, table_name: str) -> Optional[pd.DataFrame]:
+        """Return the requested DataFrame."""
+        return self.table_dict.get(table_name, None)
+
+    def load_into_globals(self):
+        """Open a session on this loader's tables in the shared DataRegistry.
+
+        The tables are no longer written into module globals; build execution globals
+        with ``session.namespace()`` and ``close()`` the session when done.
+        """
+        return default_registry.open(self)
+
+    def display_data_description(self):
+        """Print the data description."""
+        print(self.data_desc)
+
+    def permute_selected_columns(self, random_seed: int = 42):
+        """Permute columns for null hypothesis testing."""
+        np.random.seed(random_seed)
+        for df_name in self.table_dict:
+            df = self.table_dict[df_name]
+            self.table_dict[df_name] = df.apply(np.random.permutation)
@@ -0,0 +1,203 @@
+import contextlib
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+import uuid
+from collections import deque
+from typing import Optional
+
+
+# Bytes of printed output an execution hands back to the agent (and thus to the LLM)
+DEFAULT_OUTPUT_LIMIT = 32 * 1024
+
+
+# Directory for spill files, e.g. the log directory of a run; defaults to a shared
+# directory under the system temp dir
+SPILL_DIR_ENV = 'VOLTA_OUTPUT_DIR'
+
+# Spill files kept per directory: older ones are removed when a new one is opened
+SPILL_MAX_FILES = 200
+SPILL_MAX_AGE = 24 * 3600
+
+
+def default_spill_dir() -> str:
+    return os.environ.get(SPILL_DIR_ENV) or os.path.join(tempfile.gettempdir(), 'volta_outputs')
+
+
+def prune_spill_dir(spill_dir: str, max_files: int = SPILL_MAX_FILES, max_age: float = SPILL_MAX_AGE):
+    """Removes the spill files in spill_dir older than max_age seconds, then the oldest
+    ones beyond max_files."""
+    files = []
+    try:
+        with os.scandir(spill_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith('output-') and entry.name.endswith('.txt'):
+                    try:
+                        files.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        pass
+    except OSError:
+        return
+    files.sort(reverse=True)
+    cutoff = time.time() - max_age
+    for i, (mtime, path) in enumerate(files):
+        if i >= max_files or mtime < cutoff:
+            try:
+                os.remove(path)
+            except OSError:
+                # already removed by another process
+                pass
+
+
+def capture_output(limit: Optional[int] = DEFAULT_OUTPUT_LIMIT) -> 'BoundedOutput':
+    """Capture buffer for one execution, spilling elided output to default_spill_dir()."""
+    return BoundedOutput(limit, default_spill_dir())
+
+
+@contextlib.contextmanager
+def redirect_output(output_capture: 'BoundedOutput'):
+    """Sends stdout, stderr and the root logger's first handler to output_capture inside
+    the block; the handler gets its previous stream back when the block ends."""
+    handlers = logging.getLogger().handlers
+    handler = handlers[0] if handlers and isinstance(handlers[0], logging.StreamHandler) else None
+    previous = handler.stream if handler is not None else None
+    with contextlib.redirect_stdout(output_capture), contextlib.redirect_stderr(output_capture):
+        if handler is not None:
+            handler.stream = output_capture
+        try:
+            yield output_capture
+        finally:
+            if handler is not None:
+                handler.stream = previous
+
+
+class BoundedOutput(io.TextIOBase):
+    """stdout/stderr replacement that keeps the head and tail of what is written.
+
+    Up to limit bytes are kept: the first half as written, then a rolling window of the
+    last half, so memory stays bounded however much is printed. Once the output outgrows
+    the limit, everything written (including the head) is also streamed to a spill
+    file, so the full output can still be inspected. getvalue() returns the head, an
+    elision marker with the number of bytes dropped and the spill path, and the tail,
+    cut at line boundaries. Opening a spill file prunes old ones from the directory
+    (see prune_spill_dir), so they do not pile up across runs.
+
+    Args:
+        limit: Bytes to keep; None keeps everything (like io.StringIO)
+        spill_dir: Directory for spill files; None drops the elided bytes
+    """
+
+    def __init__(self, limit: Optional[int] = DEFAULT_OUTPUT_LIMIT, spill_dir: Optional[str] = None):
+        super().__init__()
+        self.limit = limit
+        self.spill_dir = spill_dir
+        self.spill_path = None
+        self.total_bytes = 0
+        self._head = []
+        self._head_bytes = 0
+        self._tail = deque()
+        self._tail_bytes = 0
+        self._spill = None
+
+    def writable(self):
+        return True
+
+    @property
+    def dropped_bytes(self) -> int:
+        return self.total_bytes - self._head_bytes - self._tail_bytes
+
+    @property
+    def truncated(self) -> bool:
+        return self.dropped_bytes > 0
+
+    def write(self, s):
+        if not isinstance(s, str):
+            raise TypeError(f"write() argument must be str, not {type(s).__name__}")
+        written = len(s)
+        size = len(s.encode('utf-8', errors='replace'))
+        self.total_bytes += size
+        if self.limit is None:
+            self._head.append(s)
+            self._head_bytes += size
+            return written
+        if self._spill is None and self.spill_dir is not None and self.total_bytes > self.limit:
+            # nothing has been dropped yet, so the file gets the complete output
+            self._open_spill()
+        if self._spill is not None:
+            self._spill.write(s)
+        head_room = self.limit // 2 - self._head_bytes
+        if head_room > 0 and not self._tail:
+            if size <= head_room:
+                self._head.append(s)
+                self._head_bytes += size
+                return written
+            # a chunk straddling the head boundary is split by characters, close enough
+            self._head.append(s[:head_room])
+            self._head_bytes += len(s[:head_room].encode('utf-8', errors='replace'))
+            s = s[head_room:]
+            size = len(s.encode('utf-8', errors='replace'))
+        self._tail.append((s, size))
+        self._tail_bytes += size
+        tail_limit = self.limit - self.limit // 2
+        while self._tail_bytes > tail_limit and self._tail:
+            chunk, chunk_size = self._tail.popleft()
+            excess = self._tail_bytes - tail_limit
+            if chunk_size > excess:
+                # keep the end of the chunk
+                kept = chunk[-(chunk_size - excess):] if chunk_size - excess < len(chunk) else chunk
+                kept_size = len(kept.encode('utf-8', errors='replace'))
+                self._tail.appendleft((kept, kept_size))
+                self._tail_bytes += kept_size - chunk_size
+                break
+            self._tail_bytes -= chunk_size
+        return written
+
+    def _open_spill(self):
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            prune_spill_dir(self.spill_dir, max_files=SPILL_MAX_FILES - 1)
+            path = os.path.join(self.spill_dir, f"output-{uuid.uuid4().hex[:12]}.txt")
+            self._spill = open(path, 'w', encoding='utf-8', errors='replace')
+        except OSError as e:
+            self.spill_dir = None
+            # not print(): stdout is this object while the code runs
+            if sys.__stderr__ is not None:
+                sys.__stderr__.write(f"Warning: could not spill output to disk: {e}\n")
+            return
+        self.spill_path = path
+        self._spill.write("".join(self._head))
+        self._spill.write("".join(chunk for chunk, _ in self._tail))
+
+    def getvalue(self) -> str:
+        if self._spill is not None:
+            self._spill.flush()
+        head = "".join(self._head)
+        tail = "".join(chunk for chunk, _ in self._tail)
+        if not self.truncated:
+            return head + tail
+        # drop the partial lines on either side of the gap
+        if '\n' in head:
+            head = head[:head.rfind('\n') + 1]
+        if '\n' in tail[:-1]:
+            tail = tail[tail.find('\n') + 1:]
+        dropped = self.total_bytes - len(head.encode('utf-8', errors='replace')) - len(tail.encode('utf-8', errors='replace'))
+        marker = f"[... {dropped} bytes of output elided"
+        if self.spill_path is not None:
+            marker += f"; full output in {self.spill_path}"
+        marker += " ...]\n"
+        return head + marker + tail
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+        super().close()
+
+    def usage(self) -> dict:
+        """Output fields for the execution's usage record."""
+        usage = {'output_bytes': self.total_bytes, 'output_dropped': self.dropped_bytes}
+        if self.spill_path is not None:
+            usage['output_path'] = self.spill_path
+        return usage
@@ -0,0 +1,126 @@
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+# Prefix of the line report_p_value prints; the line survives any process boundary
+# because it travels with the captured output
+REPORT_PREFIX = "P-VALUE REPORT:"
+
+_REPORT_RE = re.compile(r'^' + re.escape(REPORT_PREFIX) + r'\s*(\{.*\})\s*$', re.MULTILINE)
+
+_NUMBER = r'(\d+(?:\.\d+)?(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)'
+# "p-value of 3.50e-03", "p-value: 0.012", "p_value = 1e-4", "p = 0.03"; inequalities
+# such as "p < 0.001" do not give the value and are left to the LLM parser
+_P_VALUE_RE = re.compile(
+    r'(?:\bp[-_ ]?val(?:ue)?s?\b\s*(?:of|is|was|=|:)?|\bp\s*[=:])\s*' + _NUMBER + r'(?!\d)',
+    re.IGNORECASE)
+# "p < 0.001", "p-value <= 1e-10", "p_value is less than 0.05", "p ≥ 0.1"
+_P_INEQUALITY_RE = re.compile(
+    r'(?:\bp[-_ ]?val(?:ue)?s?\b|\bp)\s*(?:(?:is|was|of)\s+)?(?:[<>≤≥]|(?:less|greater|smaller|larger|lower|higher)\s+than\b|below\b|above\b)',
+    re.IGNORECASE)
+# "p-values of 0.01 and 0.2" states more than one
+_P_VALUES_RE = re.compile(r'\bp[-_ ]?values\b', re.IGNORECASE)
+
+
+def report_p_value(p, test_name: Optional[str] = None, n: Optional[int] = None) -> float:
+    """Reports the final p-value of the falsification test.
+
+    Prints one machine-readable line that the agent reads back instead of asking an
+    LLM to find the number in the output.
+
+    Args:
+        p: The p-value
+        test_name: Name of the statistical test, e.g. "Mann-Whitney U"
+        n: Sample size the test was run on
+
+    Returns:
+        The p-value as a float
+    """
+    try:
+        p = float(p)
+    except (TypeError, ValueError):
+        raise ValueError(f"report_p_value expects a number, got {p!r}") from None
+    if p < 0 or p > 1:
+        raise ValueError(f"A p-value must be between 0 and 1, got {p}")
+    report = {'p_value': p}
+    if test_name is not None:
+        report['test'] = str(test_name)
+    if n is not None:
+        report['n'] = int(n)
+    print(f"{REPORT_PREFIX} {json.dumps(report)}")
+    return p
+
+
+def parse_reports(text: Optional[str]) -> List[Dict]:
+    """The reports printed by report_p_value in text, in order."""
+    reports = []
+    for match in _REPORT_RE.finditer(text or ""):
+        try:
+            report = json.loads(match.group(1))
+            report['p_value'] = float(report['p_value'])
+        except (ValueError, KeyError, TypeError):
+            continue
+        reports.append(report)
+    return reports
+
+
+def parse_final_answer(text: Optional[str], anchored: bool = False) -> Optional[str]:
+    """Reads the p-value stated in a final answer such as "... with a p-value of 3.50e-03".
+
+    Strict on purpose: only text after "Final Answer:" is read when present (and the
+    marker is required if anchored), the answer must state exactly one p-value between
+    0 and 1 (repeats of the same value are fine) and no p-value inequality such as
+    "p < 0.001". Anything else returns None so the caller can fall back to the LLM parser.
+    """
+    if not text:
+        return None
+    if "Final Answer:" in text:
+        text = text.rsplit("Final Answer:", 1)[1]
+    elif anchored:
+        return None
+    if _P_INEQUALITY_RE.search(text) or _P_VALUES_RE.search(text):
+        return None
+    values = {}
+    for match in _P_VALUE_RE.finditer(text):
+        value = float(match.group(1))
+        values.setdefault(value, match.group(1))
+    if len(values) != 1:
+        return None
+    value, p_val = next(iter(values.items()))
+    if not 0 <= value <= 1:
+        return None
+    return p_val
+
+
+def extract_p_value(text: Optional[str], reports: Optional[List[Dict]] = None,
+                    anchored: bool = False) -> Tuple[Optional[str], Optional[str]]:
+    """Finds the p-value without an LLM call.
+
+    Args:
+        text: Captured output or final answer of the falsification test
+        reports: Reports already collected elsewhere (e.g. from the REPL's observations);
+            the reports printed in text are added to them
+        anchored: Read a stated p-value only after "Final Answer:" (see
+            parse_final_answer), e.g. for the stdout of a program, which prints the
+            p-values of assumption checks and intermediate tests too
+
+    Returns:
+        (p_val, source): p_val as a string, source is "report_p_value" or "regex".
+        (None, None) if neither finds a p-value.
+    """
+    reports = list(reports or []) + parse_reports(text)
+    if reports:
+        # the last report is the final one
+        return repr(reports[-1]['p_value']), 'report_p_value'
+    p_val = parse_final_answer(_REPORT_RE.sub('', text or ""), anchored=anchored)
+    if p_val is not None:
+        return p_val, 'regex'
+    return None, None
+
+
+def describe_report(report: Dict) -> str:
+    details = [report['test']] if report.get('test') else []
+    if report.get('n') is not None:
+        details.append(f"n={report['n']}")
+    return f"{report['p_value']:.2e}" + (f" ({', '.join(details)})" if details else "")
@@ -7,6 +7,8 @@ from pydantic import PrivateAttr
 from typing import Dict, Optional
 import matplotlib.pyplot as plt
 
+from volta.raman_cube import pixel_positions
+
 
 class ParticleIdentifier:
     """Identifies isolated particles from A1g spatial intensity data."""
@@ -14,13 +16,47 @@ class ParticleIdentifier:
     def __init__(self, df_raman_peaks: pd.DataFrame):
         self.df = df_raman_peaks
         self.grid_size = 30
+        self._times = None
+
+    def _build_pixel_index(self):
+        """Precomputes, for every (time step, Y, X), the row of self.df holding that pixel.
+
+        Built once per identifier; heatmaps and timeseries then gather values with a
+        single fancy index instead of scanning the table per time step and pixel.
+        """
+        times, _, _, t_pos, _, _ = pixel_positions(self.df)
+        ys = self.df['Y'].to_numpy().astype(int)
+        xs = self.df['X'].to_numpy().astype(int)
+        in_grid = (ys >= 0) & (ys < self.grid_size) & (xs >= 0) & (xs < self.grid_size)
+        rows = np.flatnonzero(in_grid)
+        t_pos, ys, xs = t_pos[in_grid], ys[in_grid], xs[in_grid]
+
+        # Heatmaps keep the last row of a duplicated pixel (as a row-by-row fill would),
+        # timeseries use the first matching row.
+        last_index = np.full((len(times), self.grid_size, self.grid_size), -1, dtype=np.int64)
+        last_index[t_pos, ys, xs] = rows
+        if np.count_nonzero(last_index >= 0) == len(rows):
+            first_index = last_index
+        else:
+            first_index = np.full_like(last_index, -1)
+            first_index[t_pos[::-1], ys[::-1], xs[::-1]] = rows[::-1]
+
+        self._times = times
+        self._time_pos = {t: i for i, t in enumerate(times.tolist())}
+        self._last_index = last_index
+        self._first_index = first_index
 
     def get_heatmap(self, time_idx: int, column: str = 'A1g_Amp') -> np.ndarray:
         """Extract 30x30 heatmap for given time and column."""
-        data = self.df[self.df['time_idx'] == time_idx]
+        if self._times is None:
+            self._build_pixel_index()
         heatmap = np.zeros((self.grid_size, self.grid_size))
-        for _, row in data.iterrows():
-            heatmap[int(row['Y']), int(row['X'])] = row[column]
+        t = self._time_pos.get(time_idx)
+        if t is None:
+            return heatmap
+        rows = self._last_index[t]
+        present = rows >= 0
+        heatmap[present] = self.df[column].to_numpy()[rows[present]]
         return heatmap
 
     def identify_particles(self, time_idx: int = 0,
@@ -97,29 +133,46 @@ class ParticleIdentifier:
 
         Returns DataFrame with columns: time_idx, particle_id, mean_value, std_value
         """
-        results = []
-        time_indices = self.df['time_idx'].unique()
-
-        for time_idx in sorted(time_indices):
-            time_data = self.df[self.df['time_idx'] == time_idx]
-
-            for pid, pixels in particle_pixels.items():
-                values = []
-                for x, y in pixels:
-                    pixel_data = time_data[(time_data['X'] == x) & (time_data['Y'] == y)]
-                    if len(pixel_data) > 0:
-                        values.append(pixel_data[column].values[0])
-
-                if values:
-                    results.append({
-                        'time_idx': time_idx,
-                        'particle_id': pid,
-                        'mean_value': np.mean(values),
-                        'std_value': np.std(values),
-                        'n_pixels': len(values)
-                    })
-
-        return pd.DataFrame(results)
+        if self._times is None:
+            self._build_pixel_index()
+        values = self.df[column].to_numpy()
+        pids = list(particle_pixels.keys())
+        n_times = len(self._times)
+
+        mean_value = np.full((n_times, len(pids)), np.nan)
+        std_value = np.full((n_times, len(pids)), np.nan)
+        n_pixels = np.zeros((n_times, len(pids)), dtype=np.int64)
+
+        for j, pid in enumerate(pids):
+            coords = np.array([(int(x), int(y)) for x, y in particle_pixels[pid]], dtype=np.int64).reshape(-1, 2)
+            in_grid = np.all((coords >= 0) & (coords < self.grid_size), axis=1)
+            coords = coords[in_grid]
+            rows = self._first_index[:, coords[:, 1], coords[:, 0]]  # (time, pixel)
+            present = rows >= 0
+            n_pixels[:, j] = present.sum(axis=1)
+
+            # time steps where every pixel of the particle is present: one reduction over all of them
+            complete = n_pixels[:, j] == rows.shape[1]
+            if rows.shape[1] > 0 and complete.any():
+                particle_values = values[rows[complete]]
+                mean_value[complete, j] = particle_values.mean(axis=1)
+                std_value[complete, j] = particle_values.std(axis=1)
+            for t in np.flatnonzero(~complete & (n_pixels[:, j] > 0)):
+                particle_values = values[rows[t][present[t]]]
+                mean_value[t, j] = np.mean(particle_values)
+                std_value[t, j] = np.std(particle_values)
+
+        found = n_pixels > 0
+        if not found.any():
+            return pd.DataFrame([])
+        t_idx, p_idx = np.nonzero(found)
+        return pd.DataFrame({
+            'time_idx': self._times[t_idx],
+            'particle_id': [pids[k] for k in p_idx],
+            'mean_value': mean_value[found],
+            'std_value': std_value[found],
+            'n_pixels': n_pixels[found]
+        })
 
     def visualize_particles(self, result: dict, save_path: str = None):
         """Plot identified particles on heatmap."""
@@ -174,8 +227,10 @@ Action Input: {"time_idx": 0, "min_particle_size": 4, "return_timeseries": true,
     _exec_globals: Dict = PrivateAttr(default_factory=dict)
 
     def set_data(self, df_raman_peaks: pd.DataFrame):
-        """Initialize with Raman data."""
-        self._identifier = ParticleIdentifier(df_raman_peaks)
+        """Initialize with Raman data (the pixel index is kept while the table is unchanged)."""
+        identifier = getattr(self, '_identifier', None)
+        if identifier is None or identifier.df is not df_raman_peaks:
+            self._identifier = ParticleIdentifier(df_raman_peaks)
 
     def set_globals(self, exec_globals: Dict):
         """Set the shared globals namespace for variable sharing."""
@@ -0,0 +1,381 @@
+import ast
+import hashlib
+import math
+from typing import Dict, List, NamedTuple, Optional
+
+import pandas as pd
+
+from volta.schema_digest import get_table_profiles, profile_table
+from volta.utils import LazyTableDict
+
+
+# Rough per-unit costs in seconds, measured on pandas 2.x with 10^5-row tables
+ITERROWS_PER_ROW = 2e-5
+ITERTUPLES_PER_ROW = 1e-6
+APPLY_PER_ROW = 2e-5
+FILTER_FIXED = 2e-4
+FILTER_PER_ROW = 5e-9
+SCALAR_ACCESS = 1e-5
+CONCAT_PER_PIECE = 1e-4
+PYTHON_STATEMENT = 1e-7
+
+# Used when a loop's length cannot be worked out from the code or the table profiles
+DEFAULT_ITERATIONS = 100
+DEFAULT_ROWS = 10_000
+
+_SAME_ROWS = {'copy', 'reset_index', 'set_index', 'sort_values', 'sort_index', 'fillna', 'astype',
+              'rename', 'drop', 'dropna', 'drop_duplicates', 'query', 'assign', 'merge', 'join', 'to_numpy'}
+_NOT_ROWS = {'columns', 'dtypes', 'shape', 'ndim', 'size'}
+_WRAPPERS = {'enumerate', 'sorted', 'list', 'tuple', 'reversed', 'set', 'tqdm', 'iter'}
+
+_HINTS = {
+    'iterrows': "replace row-wise iterrows() with vectorized column operations (or NumPy arrays; "
+                "scipy.spatial.distance.cdist / pdist for pairwise distances)",
+    'itertuples': "replace the row loop with vectorized column operations",
+    'apply': "replace apply(axis=1) with column arithmetic, np.where or np.select",
+    'filter': "filter once: iterate over df.groupby(column) (or pivot the table) instead of "
+              "re-filtering the whole table in every iteration",
+    'concat': "collect the pieces in a list and call pd.concat once after the loop",
+    'scalar': "read the columns into NumPy arrays (.to_numpy()) before the loop instead of .loc/.at per element",
+    'loop': "replace the nested Python loops with NumPy broadcasting or vectorized pandas operations",
+}
+
+
+class PerfFinding(NamedTuple):
+    line: int
+    kind: str
+    cost: float  # estimated seconds
+    message: str
+
+
+def table_stats(data_loader) -> Dict[str, Dict]:
+    """Row counts and column cardinalities of a loader's tables, from their profiles.
+
+    Loaders with sidecar profiles (table_profile) are profiled without loading; for other
+    lazy loaders only the tables already loaded are profiled, so linting never loads data.
+    """
+    tables = data_loader.table_dict
+    if hasattr(data_loader, 'table_profile') or not isinstance(tables, LazyTableDict):
+        profiles = get_table_profiles(data_loader)
+    else:
+        profiles = {name: profile_table(tables[name]) for name in tables
+                    if tables.is_loaded(name) and isinstance(tables[name], pd.DataFrame)}
+    return {name: {'n_rows': profile['n_rows'],
+                   'n_unique': {col['name']: col['n_unique'] for col in profile['columns'] if col['n_unique']}}
+            for name, profile in profiles.items()}
+
+
+class _CostVisitor(ast.NodeVisitor):
+    def __init__(self, stats):
+        self.stats = stats
+        self.rows = {}    # variable -> (table, estimated rows) for tables and frames derived from them
+        self.sizes = {}   # variable -> estimated length for ints and collections
+        self.loops = []   # iteration estimates of the enclosing loops
+        self.findings: List[PerfFinding] = []
+
+    @property
+    def multiplier(self):
+        return math.prod(self.loops) if self.loops else 1
+
+    def _add(self, node, kind, cost, what):
+        self.findings.append(PerfFinding(getattr(node, 'lineno', 0), kind, cost, what))
+
+    # -- value estimates -------------------------------------------------------
+
+    def _column(self, node):
+        """(table, column) for df.col / df['col'] expressions."""
+        base = None
+        if isinstance(node, ast.Attribute):
+            base, column = node.value, node.attr
+        elif isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, str):
+            base, column = node.value, node.slice.value
+        if base is None:
+            return None
+        origin = self._rows(base)
+        return (origin[0], column) if origin else None
+
+    def _n_unique(self, node) -> Optional[int]:
+        column = self._column(node)
+        if column is None:
+            return None
+        return self.stats.get(column[0], {}).get('n_unique', {}).get(column[1])
+
+    def _selectivity(self, mask) -> float:
+        """Estimated share of rows a boolean mask keeps."""
+        if isinstance(mask, ast.BinOp) and isinstance(mask.op, ast.BitAnd):
+            return self._selectivity(mask.left) * self._selectivity(mask.right)
+        if isinstance(mask, ast.Compare) and len(mask.ops) == 1 and isinstance(mask.ops[0], ast.Eq):
+            n_unique = self._n_unique(mask.left) or self._n_unique(mask.comparators[0])
+            if n_unique:
+                return 1 / n_unique
+        return 1.0
+
+    @staticmethod
+    def _is_mask(node):
+        if isinstance(node, ast.Compare):
+            return True
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.BitAnd, ast.BitOr)):
+            return True
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Invert):
+            return True
+        return isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in ('isin', 'between')
+
+    def _rows(self, node):
+        """(table, rows) if node evaluates to a table or a frame/column derived from one."""
+        if isinstance(node, ast.Name):
+            if node.id in self.rows:
+                return self.rows[node.id]
+            if node.id in self.stats:
+                return node.id, self.stats[node.id]['n_rows']
+            return None
+        if isinstance(node, ast.Subscript):
+            base = self._rows(node.value)
+            if base is None:
+                return None
+            if self._is_mask(node.slice):
+                return base[0], max(1, int(base[1] * self._selectivity(node.slice)))
+            return base
+        if isinstance(node, ast.Attribute):
+            return self._rows(node.value) if node.attr not in _NOT_ROWS else None
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+            if node.func.attr in _SAME_ROWS:
+                return self._rows(node.func.value)
+            if node.func.attr in ('head', 'tail', 'sample'):
+                base = self._rows(node.func.value)
+                n = self._int(node.args[0]) if node.args else 5
+                return (base[0], min(base[1], n or base[1])) if base else None
+        return None
+
+    def _int(self, node) -> Optional[int]:
+        if isinstance(node, ast.Constant) and isinstance(node.value, int) and not isinstance(node.value, bool):
+            return node.value
+        if isinstance(node, ast.Name):
+            return self.sizes.get(node.id)
+        if isinstance(node, ast.BinOp):
+            left, right = self._int(node.left), self._int(node.right)
+            if left is None or right is None:
+                return None
+            if isinstance(node.op, ast.Add):
+                return left + right
+            if isinstance(node.op, ast.Sub):
+                return left - right
+            if isinstance(node.op, ast.Mult):
+                return left * right
+            if isinstance(node.op, ast.FloorDiv) and right:
+                return left // right
+            return None
+        if isinstance(node, ast.Call):
+            name = node.func.id if isinstance(node.func, ast.Name) else None
+            if name == 'len' and node.args:
+                origin = self._rows(node.args[0])
+                return origin[1] if origin else self._length(node.args[0])
+            if name == 'int' and node.args:
+                return self._int(node.args[0])
+        if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Attribute) and node.value.attr == 'shape':
+            if isinstance(node.slice, ast.Constant) and node.slice.value == 0:
+                origin = self._rows(node.value.value)
+                return origin[1] if origin else None
+        return None
+
+    def _length(self, node) -> Optional[int]:
+        """Estimated number of items iterating over node yields."""
+        if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+            return len(node.elts)
+        if isinstance(node, ast.Name):
+            return self.sizes.get(node.id)
+        if isinstance(node, ast.Call):
+            func = node.func
+            name = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+            if name == 'range' and node.args:
+                bounds = [self._int(arg) for arg in node.args]
+                if None in bounds:
+                    return None
+                start, stop, step = (0, bounds[0], 1) if len(bounds) == 1 else (bounds + [1])[:3]
+                return max(0, math.ceil((stop - start) / step)) if step else None
+            if name in _WRAPPERS and node.args:
+                return self._length(node.args[0])
+            if name == 'zip':
+                lengths = [self._length(arg) for arg in node.args]
+                known = [n for n in lengths if n is not None]
+                return min(known) if known else None
+            if name in ('iterrows', 'itertuples', 'items') and isinstance(func, ast.Attribute):
+                origin = self._rows(func.value)
+                return origin[1] if origin else DEFAULT_ROWS
+            if name == 'unique':
+                if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id in ('np', 'numpy') and node.args:
+                    return self._n_unique(node.args[0])
+                if isinstance(func, ast.Attribute):
+                    return self._n_unique(func.value)
+            if name == 'groupby' and isinstance(func, ast.Attribute) and node.args:
+                key = node.args[0]
+                if isinstance(key, ast.Constant) and isinstance(key.value, str):
+                    origin = self._rows(func.value)
+                    if origin:
+                        return self.stats.get(origin[0], {}).get('n_unique', {}).get(key.value)
+        origin = self._rows(node)
+        if origin is not None and isinstance(node, (ast.Subscript, ast.Attribute)):
+            return origin[1]  # iterating over a column
+        return None
+
+    # -- statements ------------------------------------------------------------
+
+    def _bind(self, target, value):
+        if not isinstance(target, ast.Name):
+            return
+        origin, size = self._rows(value), self._int(value)
+        if size is None and not isinstance(value, (ast.Constant, ast.BinOp)):
+            size = self._length(value)
+        self.rows.pop(target.id, None)
+        self.sizes.pop(target.id, None)
+        if origin is not None:
+            self.rows[target.id] = origin
+        elif size is not None:
+            self.sizes[target.id] = size
+
+    def visit_Assign(self, node):
+        self.generic_visit(node)
+        for target in node.targets:
+            self._bind(target, node.value)
+        self._check_concat(node.value, node.targets)
+
+    def visit_AnnAssign(self, node):
+        self.generic_visit(node)
+        if node.value is not None:
+            self._bind(node.target, node.value)
+
+    def _check_concat(self, value, targets):
+        """x = pd.concat([x, ...]) or x = x.append(...) inside a loop copies x every time."""
+        if not self.loops or not isinstance(value, ast.Call) or not isinstance(value.func, ast.Attribute):
+            return
+        names = {t.id for t in targets if isinstance(t, ast.Name)}
+        used = {n.id for n in ast.walk(value) if isinstance(n, ast.Name)}
+        if value.func.attr in ('concat', 'append') and names & used:
+            n = self.multiplier
+            self._add(value, 'concat', CONCAT_PER_PIECE * n * n / 2,
+                      f"{value.func.attr}() grows a DataFrame inside a loop (quadratic copying)")
+
+    def _loop(self, node, iterations, body):
+        self.loops.append(max(iterations, 1))
+        statements = sum(1 for child in body for _ in ast.walk(child) if isinstance(_, ast.stmt))
+        if len(self.loops) > 1:
+            cost = self.multiplier * statements * PYTHON_STATEMENT
+            if cost > 1:
+                self._add(node, 'loop', cost, f"{len(self.loops)} nested Python loops, about {self.multiplier:,} iterations")
+        for child in body:
+            self.visit(child)
+        self.loops.pop()
+
+    def visit_For(self, node):
+        self.visit(node.iter)
+        func = node.iter.func if isinstance(node.iter, ast.Call) else None
+        iterations = self._length(node.iter)
+        if isinstance(func, ast.Attribute) and func.attr in ('iterrows', 'itertuples'):
+            per_row = ITERROWS_PER_ROW if func.attr == 'iterrows' else ITERTUPLES_PER_ROW
+            self._add(node, func.attr, self.multiplier * iterations * per_row,
+                      f"{func.attr}() over about {iterations:,} rows" + (" inside a loop" if self.loops else ""))
+        if isinstance(node.target, ast.Name):
+            self.rows.pop(node.target.id, None)
+            self.sizes.pop(node.target.id, None)
+        self._loop(node, iterations if iterations is not None else DEFAULT_ITERATIONS, node.body)
+        for child in node.orelse:
+            self.visit(child)
+
+    visit_AsyncFor = visit_For
+
+    def visit_While(self, node):
+        self.visit(node.test)
+        self._loop(node, DEFAULT_ITERATIONS, node.body)
+
+    def _comprehension(self, node):
+        iterations = 1
+        for generator in node.generators:
+            self.visit(generator.iter)
+            iterations *= self._length(generator.iter) or DEFAULT_ITERATIONS
+        self.loops.append(iterations)
+        for child in ast.iter_child_nodes(node):
+            if not isinstance(child, ast.comprehension):
+                self.visit(child)
+        for generator in node.generators:
+            for condition in generator.ifs:
+                self.visit(condition)
+        self.loops.pop()
+
+    visit_ListComp = visit_SetComp = visit_GeneratorExp = visit_DictComp = _comprehension
+
+    # -- expressions -----------------------------------------------------------
+
+    def visit_Subscript(self, node):
+        self.generic_visit(node)
+        if not self.loops:
+            return
+        base = self._rows(node.value)
+        if base is None:
+            return
+        if self._is_mask(node.slice):
+            self._add(node, 'filter', self.multiplier * (FILTER_FIXED + base[1] * FILTER_PER_ROW),
+                      f"boolean filter of a {base[1]:,}-row table repeated about {self.multiplier:,} times")
+        elif (isinstance(node.value, ast.Attribute) and node.value.attr in ('loc', 'iloc', 'at', 'iat')
+              and self.multiplier >= 10_000):
+            self._add(node, 'scalar', self.multiplier * SCALAR_ACCESS,
+                      f".{node.value.attr}[] element access repeated about {self.multiplier:,} times")
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        func = node.func
+        if not isinstance(func, ast.Attribute):
+            return
+        if func.attr == 'apply' and any(k.arg == 'axis' and isinstance(k.value, ast.Constant) and k.value.value in (1, 'columns')
+                                        for k in node.keywords):
+            base = self._rows(func.value)
+            rows = base[1] if base else DEFAULT_ROWS
+            self._add(node, 'apply', self.multiplier * rows * APPLY_PER_ROW, f"row-wise apply(axis=1) over about {rows:,} rows")
+        elif func.attr == 'query' and self.loops:
+            base = self._rows(func.value)
+            if base is not None:
+                self._add(node, 'filter', self.multiplier * (FILTER_FIXED + base[1] * FILTER_PER_ROW),
+                          f"query() on a {base[1]:,}-row table repeated about {self.multiplier:,} times")
+
+
+class PerfLinter:
+    """Static pass over generated code that flags known slow pandas patterns and estimates
+    their run time from the registered tables' sizes, before anything is executed.
+
+    Args:
+        stats: {table: {'n_rows': int, 'n_unique': {column: int}}}, e.g. table_stats(loader)
+    """
+
+    def __init__(self, stats: Optional[Dict[str, Dict]] = None):
+        self.stats = stats or {}
+        self._warned = set()
+
+    def lint(self, code: str) -> List[PerfFinding]:
+        """Findings sorted by estimated cost, most expensive first."""
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            return []
+        visitor = _CostVisitor(self.stats)
+        visitor.visit(tree)
+        return sorted(visitor.findings, key=lambda f: -f.cost)
+
+    def review(self, code: str, time_budget: Optional[float]) -> Optional[str]:
+        """Returns a rewrite hint if the code's estimated run time exceeds time_budget seconds.
+
+        A given piece of code is only sent back once: if the model resubmits it unchanged,
+        it runs, so an estimate that is too pessimistic cannot block the test.
+        """
+        if not time_budget:
+            return None
+        findings = self.lint(code)
+        estimate = sum(f.cost for f in findings)
+        if estimate <= time_budget:
+            return None
+        digest = hashlib.sha1(code.encode()).hexdigest()
+        if digest in self._warned:
+            return None
+        self._warned.add(digest)
+        lines = [f"This code was not run: its estimated run time (about {estimate:,.0f} s) exceeds the "
+                 f"time limit of {time_budget:,.0f} s. Please rewrite it to avoid these patterns:"]
+        for finding in [f for f in findings if f.cost >= 1][:5]:
+            lines.append(f"- line {finding.line}: {finding.message} (~{finding.cost:,.0f} s); {_HINTS[finding.kind]}")
+        return "\n".join(lines)
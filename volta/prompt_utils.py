@@ -76,6 +76,7 @@ NEVER PRODUCE ANY PLACEHOLDER IN ANY FUNCTION. PLACEHOLDER IS WORSE THAN FAILURE
 PLACEHOLDER including coming up with placeholder genes, names, ids, functions, p-value, or any other placeholder.
 The output should be a single p-value. If there are multiple p-values produced by the test, you should aggregate them in a meaningful and rigorous way.
 When printing p-values, please use scientific notations (e.g. 3.50e-03) instead of the raw number.
+Report the final p-value by calling `report_p_value(p, test_name, n)` at the end of the code; the function is already available, do not define or import it.
 For querying biological IDs, write code to look directly at raw datasets to map the exact ID, avoiding the use of LLMs to generate or infer gene names or IDs. Additionally, if the dataset includes p-values in its columns, refrain from using them as direct outputs of the falsification test; instead, process or contextualize them appropriately to maintain analytical rigor.
 -------------------------------------------------------
 
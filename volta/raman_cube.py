@@ -0,0 +1,145 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from typing import List, Optional
+
+
+# Columns of df_raman_peaks that index the cube instead of being stored as features
+INDEX_COLUMNS = ('time_idx', 'X', 'Y', 'pixel_id')
+
+
+def pixel_positions(df: pd.DataFrame, time_column: str = 'time_idx',
+                    x_column: str = 'X', y_column: str = 'Y'):
+    """Maps every row of a long-format pixel table to its (time, y, x) grid position.
+
+    Returns:
+        times, ys, xs: sorted unique coordinate values along each axis
+        t_pos, y_pos, x_pos: per-row integer positions into those axes
+    """
+    times, t_pos = np.unique(df[time_column].to_numpy(), return_inverse=True)
+    ys, y_pos = np.unique(df[y_column].to_numpy(), return_inverse=True)
+    xs, x_pos = np.unique(df[x_column].to_numpy(), return_inverse=True)
+    return times, ys, xs, t_pos.ravel(), y_pos.ravel(), x_pos.ravel()
+
+
+class RamanCube:
+    """Dense (T, Y, X, feature) float32 representation of df_raman_peaks.
+
+    The long-format table has one row per pixel and time step. The cube stores the
+    same values in a contiguous ndarray so that a frame, a pixel timeseries or a
+    whole feature are array views instead of boolean scans over the table.
+    Pixels missing from the table are NaN.
+
+    Example:
+        cube.frame(0, 'A1g_Center')          # (Y, X) map at time_idx 0
+        cube.pixel_series(3, 7, 'Voltage')   # (T,) timeseries of pixel X=3, Y=7
+        cube.feature('A1g_Center')           # (T, Y, X) array
+    """
+
+    def __init__(self, data: np.ndarray, features: List[str], times: np.ndarray,
+                 ys: np.ndarray, xs: np.ndarray):
+        self.data = data
+        self.features = list(features)
+        self.times = times
+        self.ys = ys
+        self.xs = xs
+        self._feature_pos = {name: i for i, name in enumerate(self.features)}
+        self._time_pos = {t.item() if isinstance(t, np.generic) else t: i for i, t in enumerate(times)}
+        self._y_pos = {y.item() if isinstance(y, np.generic) else y: i for i, y in enumerate(ys)}
+        self._x_pos = {x.item() if isinstance(x, np.generic) else x: i for i, x in enumerate(xs)}
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, features: Optional[List[str]] = None,
+                       time_column: str = 'time_idx', x_column: str = 'X', y_column: str = 'Y',
+                       dtype=np.float32) -> 'RamanCube':
+        """Builds the cube from a long-format table with one row per (time, X, Y).
+
+        Args:
+            df: Long-format table such as df_raman_peaks
+            features: Columns to store; defaults to every numeric non-index column
+        """
+        if features is None:
+            index_columns = set(INDEX_COLUMNS) | {time_column, x_column, y_column}
+            features = [col for col in df.columns
+                        if col not in index_columns and pd.api.types.is_numeric_dtype(df[col])]
+        times, ys, xs, t_pos, y_pos, x_pos = pixel_positions(df, time_column, x_column, y_column)
+
+        data = np.full((len(times), len(ys), len(xs), len(features)), np.nan, dtype=dtype)
+        data[t_pos, y_pos, x_pos, :] = df[features].to_numpy(dtype=dtype)
+        return cls(data, features, times, ys, xs)
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def feature_index(self, name: str) -> int:
+        try:
+            return self._feature_pos[name]
+        except KeyError:
+            raise KeyError(f"Unknown feature '{name}'. Available features: {self.features}") from None
+
+    def time_position(self, time_idx) -> int:
+        """Position along the time axis of a time_idx value."""
+        try:
+            return self._time_pos[time_idx]
+        except KeyError:
+            raise KeyError(f"time_idx {time_idx} not found in the cube") from None
+
+    def frame(self, time_idx, feature: Optional[str] = None) -> np.ndarray:
+        """(Y, X, feature) view at one time step, or (Y, X) if a feature is given."""
+        frame = self.data[self.time_position(time_idx)]
+        if feature is not None:
+            return frame[..., self.feature_index(feature)]
+        return frame
+
+    def pixel_series(self, x, y, feature: Optional[str] = None) -> np.ndarray:
+        """(T, feature) view of one pixel over time, or (T,) if a feature is given."""
+        try:
+            series = self.data[:, self._y_pos[y], self._x_pos[x]]
+        except KeyError:
+            raise KeyError(f"Pixel (X={x}, Y={y}) not found in the cube") from None
+        if feature is not None:
+            return series[:, self.feature_index(feature)]
+        return series
+
+    def feature(self, name: str) -> np.ndarray:
+        """(T, Y, X) view of one feature across all time steps and pixels."""
+        return self.data[..., self.feature_index(name)]
+
+    def fingerprint(self) -> str:
+        """Content hash of the cube, used to key cached executions that read it."""
+        digest = hashlib.sha1(repr((self.data.shape, list(self.features))).encode())
+        digest.update(np.ascontiguousarray(self.data).tobytes())
+        for axis in (self.times, self.ys, self.xs):
+            digest.update(np.ascontiguousarray(axis).tobytes())
+        return digest.hexdigest()
+
+    def describe(self) -> str:
+        """Short description for agent prompts."""
+        n_times, n_y, n_x, _ = self.data.shape
+        return (
+            f"**raman_cube**: RamanCube of df_raman_peaks, float32 array `raman_cube.data` with shape "
+            f"(T={n_times}, Y={n_y}, X={n_x}, feature={len(self.features)}); NaN where a pixel is missing.\n"
+            f"Features: {self.features}\n"
+            f"Helpers: raman_cube.frame(time_idx, feature=None) -> (Y, X[, feature]); "
+            f"raman_cube.pixel_series(x, y, feature=None) -> (T[, feature]); "
+            f"raman_cube.feature(name) -> (T, Y, X); raman_cube.times / .xs / .ys hold the axis values.\n"
+        )
+
+    def __repr__(self):
+        return f"RamanCube(shape={self.data.shape}, features={self.features})"
+
+
+def get_raman_cube(data_loader, table_name: str = 'df_raman_peaks') -> Optional[RamanCube]:
+    """Returns the RamanCube of a loader, building it on first use.
+
+    Returns None if the loader has no Raman peak table.
+    """
+    cube = getattr(data_loader, '_raman_cube', None)
+    if cube is None:
+        table_dict = getattr(data_loader, 'table_dict', {})
+        if table_name not in table_dict or table_dict[table_name] is None:
+            return None
+        cube = RamanCube.from_dataframe(table_dict[table_name])
+        data_loader._raman_cube = cube
+    return cube
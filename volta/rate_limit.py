@@ -0,0 +1,307 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from volta.llm_usage import from_cache, token_usage
+
+
+# Environment variables read when no limiter was set in the process, so runners that start
+# each hypothesis as a subprocess can share one budget, e.g.
+#   VOLTA_RATE_LIMITS="requests_per_minute=50,input_tokens_per_minute=40000,output_tokens_per_minute=8000"
+RATE_LIMITS_ENV = 'VOLTA_RATE_LIMITS'
+RATE_LIMIT_DB_ENV = 'VOLTA_RATE_LIMIT_DB'
+
+_LIMIT_NAMES = ('requests_per_minute', 'input_tokens_per_minute', 'output_tokens_per_minute')
+
+
+def default_rate_limit_path() -> str:
+    return os.path.join(tempfile.gettempdir(), 'volta_rate_limits.sqlite')
+
+
+class RateLimiter:
+    """Token buckets per provider and model, shared by all processes using the same file.
+
+    Each (provider, model) has three buckets that refill continuously up to one minute's
+    allowance: requests, input tokens and output tokens. A request takes one request
+    token and may start only while both token buckets are positive; the tokens a call
+    actually used are taken out when its response arrives (so a bucket can go negative
+    and then holds back the following requests until it has refilled). The buckets live
+    in an SQLite file and are updated under its write lock, so the workers of a
+    ProcessPoolExecutor, or separate runner processes, draw from one budget.
+
+    Args:
+        path: SQLite file holding the buckets
+        requests_per_minute: Requests allowed per minute per model; None for no limit
+        input_tokens_per_minute: Prompt tokens allowed per minute per model; None for no limit
+        output_tokens_per_minute: Completion tokens allowed per minute per model; None for no limit
+        per_model: Overrides of the limits above by model name, e.g.
+            {'claude-3-5-haiku-20241022': {'requests_per_minute': 100}}
+    """
+
+    def __init__(self, path: Optional[str] = None, requests_per_minute: Optional[float] = None,
+                 input_tokens_per_minute: Optional[float] = None, output_tokens_per_minute: Optional[float] = None,
+                 per_model: Optional[Dict[str, Dict]] = None):
+        self.path = path or default_rate_limit_path()
+        self.defaults = {'requests_per_minute': requests_per_minute,
+                         'input_tokens_per_minute': input_tokens_per_minute,
+                         'output_tokens_per_minute': output_tokens_per_minute}
+        self.per_model = per_model or {}
+        self._lock = threading.Lock()
+        self._db = None
+        self._pid = None
+        self._models = {}
+        self.counters = {'requests': 0, 'waits': 0, 'wait_time': 0.0, 'input_tokens': 0, 'output_tokens': 0}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    def _connect(self):
+        # a connection must not cross a fork, so each process opens its own
+        if self._db is not None and self._pid == os.getpid():
+            return self._db
+        self._db = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, requests REAL, "
+                         "input_tokens REAL, output_tokens REAL, updated REAL)")
+        self._pid = os.getpid()
+        return self._db
+
+    def limits(self, model: str) -> Dict[str, Optional[float]]:
+        return dict(self.defaults, **self.per_model.get(model, {}))
+
+    def _update(self, key: str, limits: Dict, take_request: bool, input_tokens: int = 0, output_tokens: int = 0) -> float:
+        """Refills the buckets of key and takes what is asked for if it is available.
+
+        Returns:
+            0 if the request was admitted (or only tokens were recorded), otherwise the
+            seconds until it could be.
+        """
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = db.execute("SELECT requests, input_tokens, output_tokens, updated FROM buckets WHERE key = ?",
+                                 (key,)).fetchone()
+                capacities = [limits[name] for name in _LIMIT_NAMES]
+                if row is None:
+                    levels = [capacity or 0.0 for capacity in capacities]
+                else:
+                    elapsed = max(now - row[3], 0.0)
+                    levels = [min(level + elapsed * capacity / 60, capacity) if capacity else 0.0
+                              for level, capacity in zip(row[:3], capacities)]
+                wait = 0.0
+                if take_request:
+                    requests, tokens_in, tokens_out = capacities
+                    if requests and levels[0] < 1:
+                        wait = max(wait, (1 - levels[0]) * 60 / requests)
+                    for level, capacity in ((levels[1], tokens_in), (levels[2], tokens_out)):
+                        if capacity and level <= 0:
+                            wait = max(wait, (1 - level) * 60 / capacity)
+                    if wait == 0 and requests:
+                        levels[0] -= 1
+                if capacities[1]:
+                    levels[1] -= input_tokens
+                if capacities[2]:
+                    levels[2] -= output_tokens
+                db.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?, ?)", (key, *levels, now))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return wait
+
+    def acquire(self, key: str, model: str, blocking: bool = True) -> bool:
+        """Takes one request for key, waiting for the buckets to refill if blocking."""
+        limits = self.limits(model)
+        if not any(limits.values()):
+            return True
+        waited = 0.0
+        while True:
+            wait = self._update(key, limits, take_request=True)
+            if wait == 0:
+                self._admitted(waited)
+                return True
+            if not blocking:
+                return False
+            # other processes may free capacity sooner, so look again at least every few seconds
+            wait = min(wait, 5.0)
+            time.sleep(wait)
+            waited += wait
+
+    async def aacquire(self, key: str, model: str, blocking: bool = True) -> bool:
+        """acquire() that sleeps on the event loop while the buckets refill."""
+        limits = self.limits(model)
+        if not any(limits.values()):
+            return True
+        waited = 0.0
+        while True:
+            wait = self._update(key, limits, take_request=True)
+            if wait == 0:
+                self._admitted(waited)
+                return True
+            if not blocking:
+                return False
+            wait = min(wait, 5.0)
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def _admitted(self, waited: float):
+        with self._lock:
+            self.counters['requests'] += 1
+            if waited:
+                self.counters['waits'] += 1
+                self.counters['wait_time'] += waited
+
+    def record(self, key: str, model: str, input_tokens: int, output_tokens: int):
+        """Takes the tokens a finished call used out of key's token buckets."""
+        with self._lock:
+            self.counters['input_tokens'] += input_tokens
+            self.counters['output_tokens'] += output_tokens
+        limits = self.limits(model)
+        if limits['input_tokens_per_minute'] or limits['output_tokens_per_minute']:
+            self._update(key, limits, take_request=False, input_tokens=input_tokens, output_tokens=output_tokens)
+
+    def for_model(self, provider: str, model: str) -> 'ModelRateLimiter':
+        """The langchain rate limiter of one model (the same object on every call)."""
+        key = f"{provider.lower()}:{model}"
+        with self._lock:
+            if key not in self._models:
+                self._models[key] = ModelRateLimiter(self, key, model)
+            return self._models[key]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self.counters)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_lock'], state['_db'], state['_pid'], state['_models'] = None, None, None, {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class ModelRateLimiter(BaseRateLimiter):
+    """Passed to a chat model as rate_limiter; langchain calls acquire() before each request
+    that is not answered from the cache."""
+
+    def __init__(self, limiter: RateLimiter, key: str, model: str):
+        self.limiter = limiter
+        self.key = key
+        self.model = model
+        self.handler = TokenUsageHandler(self)
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        return self.limiter.acquire(self.key, self.model, blocking=blocking)
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        return await self.limiter.aacquire(self.key, self.model, blocking=blocking)
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """Callback of a rate-limited model that charges each response's tokens to its buckets.
+
+    Responses answered by the cache took no request from the buckets (langchain only
+    calls the rate limiter on a cache miss), so their tokens are not charged either.
+    """
+
+    def __init__(self, rate_limiter: ModelRateLimiter):
+        self.rate_limiter = rate_limiter
+
+    def on_llm_end(self, response, **kwargs: Any) -> None:
+        if from_cache(response):
+            return
+        usage = token_usage(response)
+        self.rate_limiter.limiter.record(self.rate_limiter.key, self.rate_limiter.model,
+                                         usage['input_tokens'], usage['output_tokens'])
+
+
+# limiter applied to every model built by get_llm / ReactAgent.get_model; None for no limits
+_active_limiter: Optional[RateLimiter] = None
+_env_checked = False
+
+
+def _parse_limits(spec: str, strict: bool = False) -> Dict[str, float]:
+    limits = {}
+    for item in spec.split(','):
+        name, _, value = item.partition('=')
+        if name.strip() not in _LIMIT_NAMES:
+            if strict:
+                raise ValueError(f"Unknown rate limit '{name.strip()}'; expected one of {', '.join(_LIMIT_NAMES)}")
+            print(f"Warning: ignoring unknown rate limit '{name.strip()}' in {RATE_LIMITS_ENV}")
+            continue
+        limits[name.strip()] = float(value)
+    return limits
+
+
+def _limiter_from_env() -> Optional[RateLimiter]:
+    spec = os.environ.get(RATE_LIMITS_ENV)
+    if not spec:
+        return None
+    return RateLimiter(path=os.environ.get(RATE_LIMIT_DB_ENV), **_parse_limits(spec))
+
+
+def export_rate_limits(spec: Optional[str], path: Optional[str] = None) -> Dict[str, float]:
+    """Puts rate limits in the environment, for runners whose hypotheses run in
+    subprocesses or ProcessPoolExecutor workers started afterwards.
+
+    Args:
+        spec: Limits in the VOLTA_RATE_LIMITS format, e.g. "requests_per_minute=50,output_tokens_per_minute=8000";
+            None or empty leaves the environment unchanged
+        path: SQLite file holding the shared buckets (default: in the temp directory)
+
+    Returns:
+        The parsed limits; raises ValueError for an unknown limit name
+    """
+    global _env_checked
+    if not spec:
+        return {}
+    limits = _parse_limits(spec, strict=True)
+    os.environ[RATE_LIMITS_ENV] = spec
+    if path:
+        os.environ[RATE_LIMIT_DB_ENV] = path
+    _env_checked = False
+    return limits
+
+
+def use_rate_limits(spec) -> Optional[RateLimiter]:
+    """Sets the rate limiter for models built from now on in this process.
+
+    Args:
+        spec: None/False (no limits), a RateLimiter, or a dict of RateLimiter arguments
+    """
+    global _active_limiter, _env_checked
+    if spec is None or spec is False:
+        _active_limiter = None
+    elif isinstance(spec, RateLimiter):
+        _active_limiter = spec
+    else:
+        _active_limiter = RateLimiter(**spec)
+    _env_checked = True
+    return _active_limiter
+
+
+def active_rate_limiter() -> Optional[RateLimiter]:
+    global _active_limiter, _env_checked
+    if not _env_checked:
+        _active_limiter = _limiter_from_env()
+        _env_checked = True
+    return _active_limiter
+
+
+def rate_limit_kwargs(provider: str, model: str, kwargs: Dict) -> Dict:
+    """Adds the active limiter's rate_limiter and token callback to a chat model's kwargs."""
+    limiter = active_rate_limiter()
+    if limiter is None or 'rate_limiter' in kwargs:
+        return kwargs
+    model_limiter = limiter.for_model(provider, model)
+    callbacks = list(kwargs.get('callbacks') or [])
+    return dict(kwargs, rate_limiter=model_limiter, callbacks=callbacks + [model_limiter.handler])
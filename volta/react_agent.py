@@ -1,6 +1,13 @@
 from volta.react_utils import create_agent
 from volta.prompt_utils import get_react_coding_agent_system_prompt
 from volta.llm.custom_model import CustomChatModel
+from volta.raman_cube import get_raman_cube
+from volta.executor import record_usage
+from volta.output_capture import DEFAULT_OUTPUT_LIMIT
+from volta.llm_cache import active_llm_cache
+from volta.llm_registry import local_client, model_key, shared_model
+from volta.rate_limit import rate_limit_kwargs
+from volta.llm_usage import usage_kwargs
 from langchain_anthropic import ChatAnthropic
 from langchain_openai import ChatOpenAI
 import os
@@ -10,9 +17,11 @@ import openai
 from langchain_core.callbacks import FileCallbackHandler, StdOutCallbackHandler
 import logging
 import uuid
+from functools import partial
 import traceback
 import io
 import contextlib
+import contextvars
 import sys
 import re
 
@@ -21,8 +30,8 @@ import re
 
 class LiveLogger:
     """Custom stdout handler that logs in real-time while also printing output."""
-    def __init__(self, log):
-        self.original_stdout = sys.stdout  # Store original stdout
+    def __init__(self, log, stdout=None):
+        self.original_stdout = stdout or sys.stdout  # Store original stdout
         self.log = log  # Log dictionary
         self.current_buffer = []  # Store intermediate logs
 
@@ -55,6 +64,37 @@ class LiveLogger:
         self.original_stdout.flush()
 
 
+# LiveLogger of the agenerate() call running in the current context, so agents awaited
+# side by side in one event loop each log their own output
+_live_logger = contextvars.ContextVar('live_logger', default=None)
+
+
+class _RoutedStdout:
+    """sys.stdout while agenerate() calls may be running: writes go to the LiveLogger of
+    the current context (tool threads inherit it), everything else to the real stdout."""
+    def __init__(self, stdout):
+        self.stdout = stdout
+
+    def _target(self):
+        return _live_logger.get() or self.stdout
+
+    def write(self, message):
+        return self._target().write(message)
+
+    def flush(self):
+        self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stdout, name)
+
+
+def _routed_stdout():
+    # installed once and left in place: other coroutines may still be writing through it
+    if not isinstance(sys.stdout, _RoutedStdout):
+        sys.stdout = _RoutedStdout(sys.stdout)
+    return sys.stdout
+
+
 def get_prompt_data(
         prompt_config: str = None
 ):
@@ -77,8 +117,14 @@ class ReactAgent():
         prompt_revision: bool = False,
         port=None,
         api_key="EMPTY",
+        action_time_limit: float = None,
+        memory_limit: int = None,
+        cpu_limit: float = None,
+        output_limit: int = DEFAULT_OUTPUT_LIMIT,
     ):
         self.prompt_revision = prompt_revision
+        # report_p_value() calls made during the last generate()
+        self.p_value_reports = []
         self.api = "custom"
         if model_name[:7] == 'claude-':
             self.api = 'anthropic'
@@ -110,9 +156,17 @@ class ReactAgent():
         self.agent = create_agent(
             llm=self.llm,
             handlers=[self.stdout_handler],
-            max_iterations=self.max_iterations
+            max_iterations=self.max_iterations,
+            action_time_limit=action_time_limit,
+            memory_limit=memory_limit,
+            cpu_limit=cpu_limit,
+            output_limit=output_limit,
         )
 
+    def close(self):
+        """Stops the REPL kernel, if the actions run in one."""
+        self.agent.tools[0]._close_kernel()
+
     def get_model(
             self,
             api,
@@ -121,6 +175,19 @@ class ReactAgent():
             api_key=None,
             **kwargs
     ):
+        # responses come from the disk cache when one is enabled (see volta.llm_cache.use_llm_cache)
+        kwargs.setdefault('cache', active_llm_cache())
+        # tokens, latency and cost of each call are recorded per role (see volta.llm_usage)
+        kwargs = usage_kwargs(kwargs)
+        if api in ("anthropic", "openai", "google"):
+            # requests and tokens per minute are capped across processes when limits are set
+            kwargs = rate_limit_kwargs(api, model, kwargs)
+        # agents asking for the same model share one object, and one SDK client per endpoint
+        params = dict(kwargs, port=port) if api not in ("anthropic", "openai", "google") else kwargs
+        return shared_model(model_key('get_model', api, model, api_key, **params),
+                            partial(self._build_model, api, model, port, api_key, **kwargs))
+
+    def _build_model(self, api, model, port=None, api_key=None, **kwargs):
         llm = None
         if (api == "anthropic"):
             # Use provided api_key if available, otherwise fall back to environment variable
@@ -169,21 +236,63 @@ class ReactAgent():
                 **kwargs
             )
             api_key = "EMPTY" if api_key is None else api_key
-            llm.client = openai.Client(base_url=f"http://127.0.0.1:{port}/v1", api_key=api_key).chat.completions
+            llm.client = local_client(f"http://127.0.0.1:{port}/v1", api_key).chat.completions
         return llm
         
-    def generate(self, data_loader, test_spec, domain, log=None):
-        try:
-            self.agent.tools[0]._set_globals(data_loader.table_dict)
+    def _prepare(self, data_loader, test_spec, domain, dataset_desc=None, data_session=None, execution_cache=None, perf_linter=None):
+        """Points the tools at the data and returns the agent's input."""
+        # a registry session, if given, supplies the tables (and raman_cube) to the REPL
+        self.agent.tools[0]._set_globals(data_session if data_session is not None else data_loader.table_dict)
+        self.agent.tools[0]._execution_cache = execution_cache
+        self.agent.tools[0]._perf_linter = perf_linter
+        self.agent.tools[0].drain_usage()
+        self.agent.tools[0].drain_reports()
+        self.p_value_reports = []
+        # dataset_desc, if given, replaces data_loader.data_desc (e.g. a schema digest)
+        use_loader_desc = dataset_desc is None
+        if use_loader_desc:
             dataset_desc = data_loader.data_desc
 
-            # Initialize particle tool with data (if present)
-            for tool in self.agent.tools:
-                if hasattr(tool, 'set_data') and 'df_raman_peaks' in data_loader.table_dict:
-                    tool.set_data(data_loader.table_dict['df_raman_peaks'])
-                    # Share the globals namespace so particle tool can store results
-                    if hasattr(tool, 'set_globals'):
-                        tool.set_globals(self.agent.tools[0]._exec_globals)
+        # Expose the dense Raman cube next to df_raman_peaks (built once per loader)
+        raman_cube = get_raman_cube(data_loader)
+        if raman_cube is not None:
+            self.agent.tools[0]._exec_globals['raman_cube'] = raman_cube
+            if use_loader_desc:
+                dataset_desc = dataset_desc + "\n" + raman_cube.describe()
+
+        # Initialize particle tool with data (if present)
+        for tool in self.agent.tools:
+            if hasattr(tool, 'set_data') and 'df_raman_peaks' in data_loader.table_dict:
+                tool.set_data(data_loader.table_dict['df_raman_peaks'])
+                # Share the globals namespace so particle tool can store results
+                if hasattr(tool, 'set_globals'):
+                    tool.set_globals(self.agent.tools[0]._exec_globals)
+            # battery statistics tools work on the cube (they report an error without one)
+            if hasattr(tool, 'set_cube'):
+                tool.set_cube(raman_cube)
+
+        return {
+            "system_prompt": get_react_coding_agent_system_prompt(domain=domain, prompt_revision=self.prompt_revision),
+            "input": f"""Falsification Test: {test_spec}
+    Datasets: {dataset_desc}
+    Thought:"""
+        }
+
+    def _finish(self, log):
+        for usage in self.agent.tools[0].drain_usage():
+            record_usage(log, usage)
+        self.p_value_reports = self.agent.tools[0].drain_reports()
+
+    def _stopped(self, e, log):
+        error_message = f"Execution Stopped due to: {e}\n{traceback.format_exc()}"
+        print(error_message)
+        if log is not None:
+            log['executor'].append(f"```\n{error_message}\n```")  # Markdown format
+        return None
+
+    def generate(self, data_loader, test_spec, domain, log=None, dataset_desc=None, data_session=None, execution_cache=None, perf_linter=None):
+        try:
+            agent_input = self._prepare(data_loader, test_spec, domain, dataset_desc, data_session, execution_cache, perf_linter)
             
             # Use LiveLogger only if a log is provided
             logger = LiveLogger(log) if log is not None else sys.stdout
@@ -191,28 +300,43 @@ class ReactAgent():
             # Redirect stdout to capture real-time logs
             sys.stdout = logger
             try:
-                output = self.agent.invoke(input={
-                    "system_prompt": get_react_coding_agent_system_prompt(domain=domain, prompt_revision=self.prompt_revision),
-                    "input": f"""Falsification Test: {test_spec}
-    Datasets: {dataset_desc}
-    Thought:"""
-                })
+                output = self.agent.invoke(input=agent_input)
             finally:
                 sys.stdout = logger.original_stdout  # Restore stdout
+                self._finish(log)
 
             return output['output']
 
         except Exception as e:
-            error_message = f"Execution Stopped due to: {e}\n{traceback.format_exc()}"
-            print(error_message)
-            if log is not None:
-                log['executor'].append(f"```\n{error_message}\n```")  # Markdown format
-            return None
+            return self._stopped(e, log)
+
+    async def agenerate(self, data_loader, test_spec, domain, log=None, dataset_desc=None, data_session=None, execution_cache=None, perf_linter=None):
+        """generate() with the ReAct loop awaited; stdout is routed per context instead of swapped."""
+        try:
+            agent_input = self._prepare(data_loader, test_spec, domain, dataset_desc, data_session, execution_cache, perf_linter)
+            stdout = _routed_stdout()
+            token = _live_logger.set(LiveLogger(log, stdout=stdout.stdout) if log is not None else None)
+            try:
+                output = await self.agent.ainvoke(input=agent_input)
+            finally:
+                _live_logger.reset(token)
+                self._finish(log)
+
+            return output['output']
+
+        except Exception as e:
+            return self._stopped(e, log)
     '''
     def generate(self, data_loader, test_spec, domain, log = None):
         try:
             self.agent.tools[0]._set_globals(data_loader.table_dict)
             dataset_desc = data_loader.data_desc
+
+            # Expose the dense Raman cube next to df_raman_peaks (built once per loader)
+            raman_cube = get_raman_cube(data_loader)
+            if raman_cube is not None:
+                self.agent.tools[0]._exec_globals['raman_cube'] = raman_cube
+                dataset_desc = dataset_desc + "\n" + raman_cube.describe()
             output = self.agent.invoke(input={
                 "system_prompt": get_react_coding_agent_system_prompt(domain=domain, prompt_revision=self.prompt_revision),
                 "input": f"""Falsification Test: {test_spec}
@@ -6,13 +6,20 @@ from langchain.chains.llm import LLMChain
 from langchain_experimental.tools.python.tool import PythonAstREPLTool
 from langchain.schema import AgentAction, AgentFinish
 from pydantic import Field, PrivateAttr
-from typing import List, Union, Dict
-import contextlib
-import io
+from typing import List, Union, Dict, Optional
 import logging
 import re
 
 from volta.particle_tools import ParticleIdentificationTool
+from volta.battery_stats import battery_stats_tools
+from volta.utils import LazyNamespace
+from volta.data_registry import DataSession, default_registry
+from volta.execution_cache import ExecutionCache, forget_fingerprints, namespace_resolver
+from volta.kernel import KernelGlobals, ReplKernel
+from volta.executor import measure_usage
+from volta.output_capture import DEFAULT_OUTPUT_LIMIT, capture_output, redirect_output
+from volta.p_value import parse_reports, report_p_value
+from volta.perf_lint import PerfLinter
 
 logging.basicConfig(level=logging.INFO)
 
@@ -34,6 +41,7 @@ Thought: I now know the final answer
 Final Answer: the final output from the falsification test (i.e., whether you are able to reject the null hypothesis with statistical significance). Make sure to also include the p-value of the statistical test written in scientific notations.
 
 IMPORTANT: Please make sure the Final Answer includes the p-value of the falsification test regardless if you are able to reject the null hypothesis. **Only return the Final Answer if you have obtained a non-zero p-value**. When printing p-values, please use scientific notations instead of the raw number.
+Before giving the Final Answer, record the final p-value by calling `report_p_value(p, test_name, n)` (already available in the global namespace) in your last action, e.g. `report_p_value(result.pvalue, "linear regression", len(df))`.
 
 IMPORTANT: Please avoid p-hacking! Be fair and rigorous.
 
@@ -150,8 +158,12 @@ Begin!
 
 
 def load_data_to_react_globals(data_loader):
-    for name, df in data_loader.table_dict.items():
-            globals()[name] = df
+    """Opens a session on data_loader in the shared DataRegistry.
+
+    Tables are no longer written into this module's globals; pass the returned session
+    to ``CustomPythonAstREPLTool._set_globals`` and close it when done.
+    """
+    return default_registry.open(data_loader)
 
 
 # Set up a prompt template
@@ -206,18 +218,38 @@ class CustomOutputParser(AgentOutputParser):
 
 class CustomPythonAstREPLTool(PythonAstREPLTool):
     _exec_globals:Dict = PrivateAttr()
+    _execution_cache:Optional[ExecutionCache] = PrivateAttr(default=None)
+    _kernel:Optional[ReplKernel] = PrivateAttr(default=None)
+    _kernel_options:Optional[Dict] = PrivateAttr(default=None)
+    # usage of each action since the last drain_usage()
+    _usage:List[Dict] = PrivateAttr(default_factory=list)
+    # report_p_value() calls seen in action outputs since the last drain_reports()
+    _reports:List[Dict] = PrivateAttr(default_factory=list)
+    # bytes of output returned per action; the middle of longer output is elided
+    _output_limit:Optional[int] = PrivateAttr(default=DEFAULT_OUTPUT_LIMIT)
+    # reviews actions against the kernel's time limit before they run
+    _perf_linter:Optional[PerfLinter] = PrivateAttr(default=None)
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Initialize a persistent global namespace for code execution
         self._exec_globals = {}
         self._exec_globals.update(__builtins__)
+        self._exec_globals['report_p_value'] = report_p_value
     
     def _set_globals(self, table_dict=None):
-        self._exec_globals = {}
+        if self._kernel_options is not None:
+            # actions run in a separate, time-limited process that keeps their variables
+            self._close_kernel()
+            self._kernel = ReplKernel(table_dict, **self._kernel_options)
+            self._exec_globals = KernelGlobals(self._kernel)
+            return
+        # tables are resolved on first reference, so lazily-loaded tables stay unloaded until used
+        if isinstance(table_dict, DataSession):
+            self._exec_globals = table_dict.namespace()
+        else:
+            self._exec_globals = LazyNamespace(table_dict)
         self._exec_globals.update(__builtins__)
-        
-        if table_dict:
-            self._exec_globals.update(table_dict)
+        self._exec_globals['report_p_value'] = report_p_value
         
     def _run(self, query: str, run_manager=None):
         code_match = re.search(r"```(.*?)```", query, re.DOTALL)
@@ -236,10 +268,47 @@ class CustomPythonAstREPLTool(PythonAstREPLTool):
         code_lines = code.strip().split('\n')
         code = '\n'.join(code_lines[:-1])   # avoid printing the last line twice
         last_line = code_lines[-1]
-        
-        output_capture = io.StringIO()
-        with contextlib.redirect_stdout(output_capture), contextlib.redirect_stderr(output_capture):
-            logging.getLogger().handlers[0].stream = output_capture
+
+        if self._perf_linter is not None and self._kernel is not None:
+            perf_hint = self._perf_linter.review(code + '\n' + last_line, self._kernel.time_limit)
+            if perf_hint is not None:
+                return perf_hint
+
+        cache_key, info = None, None
+        if self._execution_cache is not None:
+            if self._kernel is not None:
+                # the values live in the kernel, so it fingerprints them itself
+                cache_key, cached, info = self._execution_cache.lookup(
+                    code + '\n' + last_line, stateful=True, fingerprints=self._kernel.fingerprints)
+            else:
+                cache_key, cached, info = self._execution_cache.lookup(
+                    code + '\n' + last_line, namespace_resolver(self._exec_globals), stateful=True)
+            if cached is not None:
+                # a hit skips the run, but later actions may still rely on its imports
+                if self._kernel is not None:
+                    self._kernel.run(info.import_source, "None")  # usage of the replay is not an action's
+                else:
+                    exec(info.import_source, self._exec_globals)
+                self._reports += parse_reports(cached)
+                return cached if cached else "Execution completed without output."
+            if info.binds_names and self._kernel is None:
+                # the code may edit tables in place, so their fingerprints must be recomputed
+                forget_fingerprints()
+
+        if self._kernel is not None:
+            ok, output, usage = self._kernel.run(code, last_line, forget_fingerprints=bool(info and info.binds_names))
+            self._usage.append(usage)
+            if not ok:
+                return output
+            if cache_key is not None:
+                self._execution_cache.store(cache_key, output)
+            self._reports += parse_reports(output)
+            return output if output else "Execution completed without output."
+
+        output_capture = capture_output(self._output_limit)
+        usage = {'status': 'ok'}
+        self._usage.append(usage)
+        with measure_usage(usage), redirect_output(output_capture):
             try:
                 exec(code, self._exec_globals)
                 try:
@@ -249,12 +318,39 @@ class CustomPythonAstREPLTool(PythonAstREPLTool):
                 except:
                     pass
             except Exception as e:
-                return str(e)
+                usage['status'] = 'error'
+                error = str(e)
+            else:
+                error = None
+        if error is not None:
+            output_capture.close()
+            usage.update(output_capture.usage())
+            return error
         
         # Retrieve the output and return it
         output = output_capture.getvalue()
+        output_capture.close()
+        usage.update(output_capture.usage())
+        if cache_key is not None:
+            self._execution_cache.store(cache_key, output)
+        self._reports += parse_reports(output)
         return output if output else "Execution completed without output."
 
+    def drain_usage(self) -> List[Dict]:
+        """Returns the usage of the actions run since the last call and clears it."""
+        usage, self._usage = self._usage, []
+        return usage
+
+    def drain_reports(self) -> List[Dict]:
+        """Returns the p-value reports printed since the last call and clears them."""
+        reports, self._reports = self._reports, []
+        return reports
+
+    def _close_kernel(self):
+        if self._kernel is not None:
+            self._kernel.close()
+            self._kernel = None
+
 
 def create_agent(
     llm,
@@ -262,9 +358,19 @@ def create_agent(
     max_iterations = 50,
     early_stopping_method: str = "force",
     include_particle_tool: bool = True,
+    include_battery_stats: bool = True,
+    action_time_limit: Optional[float] = None,
+    memory_limit: Optional[int] = None,
+    cpu_limit: Optional[float] = None,
+    output_limit: Optional[int] = DEFAULT_OUTPUT_LIMIT,
 ):
     output_parser = CustomOutputParser()
     python_tool = CustomPythonAstREPLTool(callbacks=handlers)
+    python_tool._output_limit = output_limit
+    if action_time_limit is not None or memory_limit is not None or cpu_limit is not None:
+        # run the actions in a kernel process so a runaway action can be stopped
+        python_tool._kernel_options = {'time_limit': action_time_limit, 'memory_limit': memory_limit,
+                                       'cpu_limit': cpu_limit, 'output_limit': output_limit}
     tools = [python_tool]
 
     # Add particle identification tool
@@ -272,6 +378,10 @@ def create_agent(
         particle_tool = ParticleIdentificationTool()
         tools.append(particle_tool)
 
+    # Vectorized statistics over the Raman cube (each returns a statistic and a p-value)
+    if include_battery_stats:
+        tools.extend(battery_stats_tools())
+
     tool_names = [tool.name for tool in tools]
 
     prompt = CustomPromptTemplate(
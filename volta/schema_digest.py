@@ -0,0 +1,224 @@
+import re
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+
+_WORD = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+[a-z]*|[a-z0-9]+', re.IGNORECASE)
+_STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it', 'its', 'of',
+    'on', 'or', 'that', 'the', 'this', 'to', 'with', 'was', 'were', 'will', 'which', 'df', 'id',
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English and code)."""
+    return (len(text) + 3) // 4
+
+
+def _tokens(text) -> set:
+    """Lowercased word tokens; 'A1g_Center' -> {'a1g', 'center'}, 'MAPPED_GENE' -> {'mapped', 'gene'}."""
+    tokens = set()
+    for word in _WORD.findall(str(text)):
+        word = word.lower()
+        if len(word) > 1 and word not in _STOPWORDS:
+            tokens.add(word[:-1] if len(word) > 3 and word.endswith('s') else word)
+    return tokens
+
+
+def _compact_value(value, max_chars=30):
+    if isinstance(value, (float, np.floating)):
+        text = f"{value:.4g}"
+    else:
+        text = str(value)
+    return text if len(text) <= max_chars else text[:max_chars - 3] + "..."
+
+
+def profile_table(df: pd.DataFrame, n_examples: int = 3) -> Dict:
+    """Column-level summary of a table: dtype, cardinality, missing share, range and examples.
+
+    The result only holds JSON-serializable values so it can be stored in cache metadata.
+    """
+    columns = []
+    for i, name in enumerate(df.columns):
+        values = df.iloc[:, i]
+        try:
+            n_unique = int(values.nunique(dropna=True))
+        except TypeError:  # unhashable cells (lists, dicts)
+            n_unique = None
+        profile = {
+            'name': str(name),
+            'dtype': str(values.dtype),
+            'n_unique': n_unique,
+            'missing': float(values.isna().mean()) if len(values) else 0.0,
+        }
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values) and values.notna().any():
+            profile['range'] = [_compact_value(values.min()), _compact_value(values.max())]
+        examples = []
+        for value in values.dropna().head(1000):
+            text = _compact_value(value)
+            if text not in examples:
+                examples.append(text)
+            if len(examples) == n_examples:
+                break
+        profile['examples'] = examples
+        columns.append(profile)
+    return {'n_rows': int(len(df)), 'columns': columns}
+
+
+def get_table_profiles(data_loader) -> Dict[str, Dict]:
+    """Returns {table name: profile_table(...)} for a loader, computed once and cached on it.
+
+    Loaders that implement ``table_profile(name)`` (e.g. ExperimentalDataLoader, which keeps
+    profiles in its sidecar metadata) are asked for each profile instead.
+    """
+    profiles = getattr(data_loader, '_table_profiles', None)
+    if profiles is None:
+        profiles = {}
+        for name in data_loader.table_dict:
+            if hasattr(data_loader, 'table_profile'):
+                profile = data_loader.table_profile(name)
+            else:
+                df = data_loader.table_dict[name]
+                profile = profile_table(df) if isinstance(df, pd.DataFrame) else None
+            if profile is not None:
+                profiles[name] = profile
+        data_loader._table_profiles = profiles
+    return profiles
+
+
+def _metadata_descriptions(data_loader):
+    """Table and column descriptions from DiscoveryBench-style metadata, if the loader has any."""
+    table_desc, column_desc = {}, {}
+    for entry in getattr(data_loader, 'available_datasets', None) or []:
+        if not isinstance(entry, dict) or 'name' not in entry:
+            continue
+        table_name = f'df_{entry["name"].split(".")[0]}'
+        table_desc[table_name] = entry.get('description', '')
+        for column in entry.get('columns', {}).get('raw', []):
+            if 'description' in column:
+                column_desc[(table_name, column['name'])] = column['description']
+    return table_desc, column_desc
+
+
+def _column_line(profile: Dict, description: Optional[str]) -> str:
+    stats = [profile['dtype']]
+    if profile['n_unique'] is not None:
+        stats.append(f"{profile['n_unique']} unique")
+    if profile['missing'] > 0:
+        stats.append(f"{profile['missing']:.0%} missing")
+    line = f"  - {profile['name']} ({', '.join(stats)})"
+    if 'range' in profile:
+        line += f" range {profile['range'][0]}..{profile['range'][1]}"
+    elif profile['examples']:
+        line += ": " + " | ".join(profile['examples'])
+    if description:
+        line += f" - {_compact_value(description, 80)}"
+    return line
+
+
+def build_schema_digest(data_loader, hypothesis: str, token_budget: int = 1500) -> str:
+    """Summarizes the loader's tables for an agent prompt within a token budget.
+
+    Every table is listed with its size, even if the headers alone exceed the budget.
+    Column details (dtype, cardinality, missing share, range or example values) go first
+    to the columns that match the hypothesis by word overlap with column names,
+    descriptions and example values. The other columns are listed by name and upgraded
+    to details while space is left.
+
+    Args:
+        data_loader: Any loader with a table_dict
+        hypothesis: Text used to rank tables and columns
+        token_budget: Approximate number of tokens the digest may use
+    """
+    profiles = get_table_profiles(data_loader)
+    table_desc, column_desc = _metadata_descriptions(data_loader)
+    query = _tokens(hypothesis)
+
+    # relevance of every column and table
+    column_scores = {}
+    table_scores = {}
+    for name, profile in profiles.items():
+        best = 0
+        for position, col in enumerate(profile['columns']):
+            score = 3 * len(query & _tokens(col['name']))
+            score += len(query & _tokens(column_desc.get((name, col['name']), '')))
+            score += len(query & _tokens(' '.join(col['examples'])))
+            column_scores[(name, position)] = score
+            best = max(best, score)
+        table_scores[name] = 2 * len(query & _tokens(name)) + len(query & _tokens(table_desc.get(name, ''))) + best
+    table_order = sorted(profiles, key=lambda name: -table_scores[name])
+    table_rank = {name: rank for rank, name in enumerate(table_order)}
+
+    header = "Schema digest (tables and columns ordered by relevance to the hypothesis):"
+    headers = {}
+    for name in table_order:
+        profile = profiles[name]
+        line = f"{name}: {profile['n_rows']} rows x {len(profile['columns'])} columns"
+        if table_desc.get(name):
+            line += f" - {_compact_value(table_desc[name], 120)}"
+        headers[name] = line
+    budget = token_budget * 4 - len(header) - sum(len(line) + 1 for line in headers.values())
+
+    # 1. details for the columns that match the hypothesis, best first
+    details = {name: [] for name in table_order}
+    described = set()
+    candidates = sorted(column_scores, key=lambda key: (-column_scores[key], table_rank[key[0]], key[1]))
+    lines_of = {}
+    for key in candidates:
+        col = profiles[key[0]]['columns'][key[1]]
+        lines_of[key] = _column_line(col, column_desc.get((key[0], col['name'])))
+
+    def describe(key):
+        details[key[0]].append(lines_of[key])
+        described.add(key)
+
+    for key in candidates:
+        if column_scores[key] > 0 and len(lines_of[key]) + 1 <= budget:
+            describe(key)
+            budget -= len(lines_of[key]) + 1
+
+    # 2. every other column is at least named; 3. upgrade names to details while space is left
+    other_prefix = "  - other columns: "
+    budget -= sum(len(other_prefix) + 1 for name in table_order
+                  if any((name, p) not in described for p in range(len(profiles[name]['columns']))))
+    budget -= sum(len(profiles[name]['columns'][position]['name']) + 2
+                  for name, position in candidates if (name, position) not in described)
+    for key in candidates:
+        if key in described:
+            continue
+        extra = len(lines_of[key]) + 1 - (len(profiles[key[0]]['columns'][key[1]]['name']) + 2)
+        if extra <= budget:
+            describe(key)
+            budget -= extra
+
+    others = {}
+    name_budget = budget + sum(len(profiles[name]['columns'][position]['name']) + 2
+                               for name, position in candidates if (name, position) not in described)
+    for name in table_order:
+        remaining = [col['name'] for position, col in enumerate(profiles[name]['columns'])
+                     if (name, position) not in described]
+        if not remaining:
+            continue
+        name_budget += len(other_prefix) + 1
+        line = other_prefix
+        for i, col_name in enumerate(remaining):
+            piece = col_name if i == 0 else ", " + col_name
+            # keep room for the trailing ", ..." unless this is the last name
+            reserve = 0 if i == len(remaining) - 1 else 5
+            if len(line) + len(piece) + reserve + 1 > name_budget:
+                line = line + (", ..." if i > 0 else "")
+                break
+            line += piece
+        if line.endswith(": "):
+            continue
+        others[name] = line
+        name_budget -= len(line) + 1
+
+    lines = [header]
+    for name in table_order:
+        lines.append(headers[name])
+        lines.extend(details[name])
+        if name in others:
+            lines.append(others[name])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,295 @@
+import mmap
+import os
+import pickle
+import threading
+import uuid
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from volta.utils import LazyTableDict
+
+
+_ALIGNMENT = 64
+
+# segments attached by this process, kept open for as long as the process may use their views
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _aligned(offset):
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+class TableHandle:
+    """Picklable description of a table stored in one shared-memory segment.
+
+    Numeric, boolean and datetime columns are raw arrays in the segment and attach as
+    zero-copy views. Other columns (strings, categoricals, extension arrays) and a
+    non-default index are pickled into the same segment and unpickled on attach.
+    """
+
+    def __init__(self, segment: str, size: int, labels: pd.Index, columns: List[Dict], index: Optional[Dict], n_rows: int):
+        self.segment = segment
+        self.size = size
+        self.labels = labels
+        self.columns = columns
+        self.index = index
+        self.n_rows = n_rows
+
+    def __repr__(self):
+        return f"TableHandle({self.segment}, {self.n_rows} rows x {len(self.labels)} columns, {self.size} bytes)"
+
+
+def _free_segments(segments: Dict[str, shared_memory.SharedMemory]):
+    for segment in segments.values():
+        segment.close()
+        segment.unlink()
+    segments.clear()
+
+
+class SharedTableStore:
+    """Copies tables into shared memory once so that any process can attach to them.
+
+    Child processes receive a TableHandle (a few hundred bytes) instead of a pickled
+    DataFrame, whatever the multiprocessing start method, and map the same pages as
+    every other process attached to the table. The segments live until close(), or
+    until the store is garbage collected.
+    """
+
+    def __init__(self):
+        self._segments: Dict[str, shared_memory.SharedMemory] = {}
+        self._handles: Dict[str, TableHandle] = {}
+        weakref.finalize(self, _free_segments, self._segments)
+
+    def __contains__(self, name):
+        return name in self._handles
+
+    def __len__(self):
+        return len(self._handles)
+
+    def get(self, name) -> TableHandle:
+        return self._handles[name]
+
+    @property
+    def nbytes(self):
+        return sum(handle.size for handle in self._handles.values())
+
+    def put(self, name: str, df: pd.DataFrame) -> TableHandle:
+        """Copies df into a new segment (replacing any previous copy of name)."""
+        layout, blobs, offset = [], [], 0
+        for i in range(df.shape[1]):
+            values = df.iloc[:, i]
+            if isinstance(values.dtype, np.dtype) and values.dtype.kind in 'biufcmM':
+                array = np.ascontiguousarray(values.to_numpy())
+                offset = _aligned(offset)
+                layout.append({'kind': 'array', 'dtype': array.dtype.str, 'offset': offset, 'nbytes': array.nbytes})
+                blobs.append((offset, array))
+                offset += array.nbytes
+            else:
+                blob = pickle.dumps(values.array, protocol=pickle.HIGHEST_PROTOCOL)
+                layout.append({'kind': 'pickle', 'offset': offset, 'nbytes': len(blob)})
+                blobs.append((offset, blob))
+                offset += len(blob)
+
+        index = None
+        if not isinstance(df.index, pd.RangeIndex):
+            blob = pickle.dumps(df.index, protocol=pickle.HIGHEST_PROTOCOL)
+            index = {'kind': 'pickle', 'offset': offset, 'nbytes': len(blob)}
+            blobs.append((offset, blob))
+            offset += len(blob)
+        elif (df.index.start, df.index.step) != (0, 1):
+            index = {'kind': 'range', 'start': df.index.start, 'stop': df.index.stop, 'step': df.index.step}
+
+        segment = shared_memory.SharedMemory(name=f"volta_{uuid.uuid4().hex[:16]}", create=True, size=max(offset, 1))
+        for start, data in blobs:
+            if isinstance(data, np.ndarray):
+                np.ndarray(data.shape, dtype=data.dtype, buffer=segment.buf, offset=start)[...] = data
+            else:
+                segment.buf[start:start + len(data)] = data
+
+        self.remove(name)
+        self._segments[name] = segment
+        handle = TableHandle(segment.name, offset, df.columns, layout, index, len(df))
+        self._handles[name] = handle
+        return handle
+
+    def remove(self, name):
+        self._handles.pop(name, None)
+        segment = self._segments.pop(name, None)
+        if segment is not None:
+            segment.close()
+            segment.unlink()
+
+    def close(self):
+        """Frees every segment; views already attached elsewhere stay valid until detached."""
+        for name in list(self._segments):
+            self.remove(name)
+
+
+def _allow_mapping(nbytes: int):
+    """Raises this process's address-space limit (RLIMIT_AS), if one is set, by nbytes.
+
+    Mapping a segment only adds pages that already exist, so it should not use up the
+    memory_limit of a job (see resource_ceiling, which restores the limit afterwards);
+    pages written through a private mapping are still counted in the job's RSS.
+    """
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if soft != resource.RLIM_INFINITY:
+        soft = soft + nbytes if hard == resource.RLIM_INFINITY else min(soft + nbytes, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def attach_table(handle: TableHandle) -> pd.DataFrame:
+    """Builds a DataFrame over a shared segment. Array columns are read-only views.
+
+    The attaching process must share the owner's multiprocessing resource tracker (as
+    children started through multiprocessing do once the owner has one running); a
+    private tracker would unlink the segment when the attaching process exits.
+    """
+    segment = _attached.get(handle.segment)
+    if segment is None:
+        _allow_mapping(handle.size)
+        segment = _attached[handle.segment] = shared_memory.SharedMemory(name=handle.segment)
+    return _build_table(handle, segment.buf, writable=False)
+
+
+# where POSIX shared memory segments appear as files (Linux)
+SHM_DIR = '/dev/shm'
+
+
+def attach_private(handle: TableHandle, attached: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """A writable DataFrame over a private copy-on-write mapping of a table's segment.
+
+    Array columns map the shared pages, and a page is copied for this DataFrame only
+    when it is written, so reading costs no memory and an edit never reaches the
+    segment or other processes. Other columns are copied from attached, the table's
+    attach_table() view. Returns None where segments cannot be mapped privately.
+    """
+    if not any(col['kind'] == 'array' for col in handle.columns):
+        return _build_table(handle, None, writable=True, attached=attached)
+    try:
+        fd = os.open(os.path.join(SHM_DIR, handle.segment.lstrip('/')), os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        _allow_mapping(handle.size)
+        # the arrays keep the mapping alive; it is unmapped once they are collected
+        buffer = mmap.mmap(fd, handle.size, access=mmap.ACCESS_COPY)
+    except (OSError, ValueError):
+        return None
+    finally:
+        os.close(fd)
+    return _build_table(handle, buffer, writable=True, attached=attached)
+
+
+def _build_table(handle: TableHandle, buffer, writable: bool, attached: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """DataFrame of handle with its array columns over buffer; the other columns and the
+    index are unpickled from buffer, or copied from attached if given."""
+    columns = {}
+    for i, col in enumerate(handle.columns):
+        if col['kind'] == 'array':
+            dtype = np.dtype(col['dtype'])
+            array = np.ndarray((handle.n_rows,), dtype=dtype, buffer=buffer, offset=col['offset'])
+            array.flags.writeable = writable
+            columns[i] = array
+        elif attached is not None:
+            columns[i] = attached.iloc[:, i].array.copy()
+        else:
+            columns[i] = pickle.loads(buffer[col['offset']:col['offset'] + col['nbytes']])
+    # copy=False keeps every array column as its own block over the mapped pages
+    df = pd.DataFrame(columns, index=pd.RangeIndex(handle.n_rows), copy=False)
+    df.columns = handle.labels
+
+    if attached is not None:
+        df.index = attached.index
+    elif handle.index is not None:
+        if handle.index['kind'] == 'range':
+            df.index = pd.RangeIndex(handle.index['start'], handle.index['stop'], handle.index['step'])
+        else:
+            df.index = pickle.loads(buffer[handle.index['offset']:handle.index['offset'] + handle.index['nbytes']])
+    return df
+
+
+class TableServer:
+    """Answers child processes' table requests from a table mapping via a SharedTableStore.
+
+    A table is loaded and copied into shared memory on its first request and every later
+    request gets the same handle. Tables of a LazyTableDict that this process has not
+    loaded are read with peek(), so the store holds the only copy. Entries that are not
+    DataFrames are sent as pickled values.
+    """
+
+    def __init__(self, tables):
+        self.tables = tables if tables is not None else {}
+        self.store = SharedTableStore()
+        self._values = {}
+        self._lock = threading.Lock()
+        # children must share this tracker; one of their own would unlink the segments on exit
+        resource_tracker.ensure_running()
+
+    def export(self, name):
+        """Returns ('handle', TableHandle), ('value', value) or ('missing', error)."""
+        with self._lock:
+            if name in self.store:
+                return 'handle', self.store.get(name)
+            if name in self._values:
+                return 'value', self._values[name]
+            try:
+                value = self.tables.peek(name) if isinstance(self.tables, LazyTableDict) else self.tables[name]
+            except Exception as e:
+                return 'missing', repr(e)
+            if isinstance(value, pd.DataFrame):
+                return 'handle', self.store.put(name, value)
+            self._values[name] = value
+            return 'value', value
+
+    def close(self):
+        with self._lock:
+            self.store.close()
+            self._values = {}
+
+
+class RemoteTables:
+    """Child-side table mapping: asks the parent's TableServer over conn on first reference
+    and attaches the table from shared memory.
+
+    The parent must answer ('table', name) messages with TableServer.export(name).
+    """
+
+    def __init__(self, conn, names):
+        self._conn = conn
+        self._names = set(names)
+        self._cache = {}
+        self._handles = {}
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __getitem__(self, name):
+        if name not in self._cache:
+            if name not in self._names:
+                raise KeyError(name)
+            self._conn.send(('table', name))
+            kind, value = self._conn.recv()
+            if kind == 'missing':
+                raise RuntimeError(f"Could not load table {name}: {value}")
+            if kind == 'handle':
+                self._handles[name] = value
+                value = attach_table(value)
+            self._cache[name] = value
+        return self._cache[name]
+
+    def handle(self, name) -> Optional[TableHandle]:
+        """The TableHandle of a table attached from shared memory, None for other values."""
+        self[name]
+        return self._handles.get(name)
@@ -5,10 +5,24 @@ import json
 import time
 import openai
 from glob import glob
+import copy
+from functools import partial
+from collections.abc import MutableMapping
 import numpy as np
 import pandas as pd
 
+try:
+    import pyarrow  # noqa: F401  (enables the columnar Parquet sidecar cache)
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
 from volta.llm.custom_model import CustomChatModel
+from volta.llm_cache import active_llm_cache
+from volta.llm_registry import local_client, model_key, shared_model
+from volta.rate_limit import rate_limit_kwargs
+from volta.llm_usage import usage_kwargs
+from volta.schema_digest import profile_table
 from langchain_anthropic import ChatAnthropic
 from langchain_openai import ChatOpenAI
 from langchain_core.messages.base import get_msg_title_repr
@@ -24,6 +38,20 @@ def get_llm(model = 'claude-3-5-sonnet-20240620', temperature=0.7, port=30000, a
     #     source = "Llama"
     # if source not in ['OpenAI', 'Anthropic']:
     #     raise ValueError('Invalid source')
+    # responses come from the disk cache when one is enabled (see volta.llm_cache.use_llm_cache)
+    kwargs.setdefault('cache', active_llm_cache())
+    # tokens, latency and cost of each call are recorded per role (see volta.llm_usage)
+    kwargs = usage_kwargs(kwargs)
+    if source != 'Local':
+        # requests and tokens per minute are capped across processes when limits are set
+        kwargs = rate_limit_kwargs(source, model, kwargs)
+    # roles asking for the same model share one object, and one SDK client per endpoint
+    params = dict(kwargs, temperature=temperature, port=port) if source == 'Local' else dict(kwargs, temperature=temperature)
+    return shared_model(model_key('get_llm', source, model, api_key, **params),
+                        partial(_build_llm, source, model, temperature, port, api_key, **kwargs))
+
+
+def _build_llm(source, model, temperature, port, api_key, **kwargs):
     if source == 'OpenAI':
         if model.startswith("o1"):
             return ChatOpenAI(model = model, temperature = -1, **kwargs)
@@ -36,13 +64,397 @@ def get_llm(model = 'claude-3-5-sonnet-20240620', temperature=0.7, port=30000, a
     else:
         # assuming a locally-served model
         assert port is not None, f"Model {model} is not supported, please provide a local port if it is a locally-served model."
-        llm = CustomChatModel(model = model, model_type=source, temperature = temperature)
-        llm.client = openai.Client(base_url=f"http://127.0.0.1:{port}/v1", api_key=api_key).chat.completions
+        llm = CustomChatModel(model = model, model_type=source, temperature = temperature, cache = kwargs['cache'])
+        llm.client = local_client(f"http://127.0.0.1:{port}/v1", api_key).chat.completions
         return llm
 
+
+# Sidecar files written next to the source tables, e.g. bio_database/.volta_cache/gwas_catalog.pkl.parquet
+CACHE_DIR_NAME = '.volta_cache'
+
+
+def _source_signature(path):
+    """Returns the (size, mtime) signature used to decide whether a sidecar is stale."""
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _cache_paths(source_path, suffix):
+    """Returns (sidecar_path, meta_path) for a source file."""
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(source_path)), CACHE_DIR_NAME)
+    base = os.path.basename(source_path)
+    return os.path.join(cache_dir, f"{base}.{suffix}"), os.path.join(cache_dir, f"{base}.json")
+
+
+def read_cache_meta(source_path):
+    """Returns the sidecar metadata for source_path, or None if it is missing or stale."""
+    _, meta_path = _cache_paths(source_path, 'parquet')
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        if meta.get('source') != _source_signature(source_path):
+            return None
+        return meta
+    except (OSError, ValueError):
+        return None
+
+
+def write_cache_meta(source_path, meta):
+    """Writes sidecar metadata for source_path, stamped with the current source signature."""
+    _, meta_path = _cache_paths(source_path, 'parquet')
+    meta = dict(meta, source=_source_signature(source_path))
+    try:
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+    except OSError as e:
+        print(f"Could not write cache metadata for {source_path}: {e}")
+
+
+def read_columnar_cache(source_path, columns=None):
+    """Reads a fresh Parquet sidecar of source_path, optionally only some columns.
+
+    Returns:
+        The cached DataFrame, or None if there is no usable sidecar.
+    """
+    if not HAS_PYARROW:
+        return None
+    meta = read_cache_meta(source_path)
+    if meta is None or not meta.get('columnar', False):
+        return None
+    parquet_path, _ = _cache_paths(source_path, 'parquet')
+    try:
+        return pd.read_parquet(parquet_path, columns=list(columns) if columns is not None else None)
+    except Exception as e:
+        print(f"Ignoring unreadable cache {parquet_path}: {e}")
+        return None
+
+
+def read_cache_columns(source_path):
+    """Column names of a fresh Parquet sidecar of source_path, read from its schema only.
+
+    Returns:
+        The list of column names, or None if there is no usable sidecar.
+    """
+    if not HAS_PYARROW:
+        return None
+    meta = read_cache_meta(source_path)
+    if meta is None or not meta.get('columnar', False):
+        return None
+    import pyarrow.parquet as pq
+    parquet_path, _ = _cache_paths(source_path, 'parquet')
+    try:
+        pandas_meta = pq.read_schema(parquet_path).pandas_metadata
+    except Exception:
+        return None
+    if not pandas_meta:
+        return None
+    index_fields = {field for field in pandas_meta.get('index_columns', []) if isinstance(field, str)}
+    return [col['name'] for col in pandas_meta['columns'] if col['field_name'] not in index_fields]
+
+
+def write_columnar_cache(source_path, df, meta=None):
+    """Writes df as a Parquet sidecar of source_path together with its metadata.
+
+    Tables that Arrow cannot represent (e.g. mixed-type object columns) only get
+    metadata, flagged with ``columnar: False`` so later loads go straight to the source.
+    """
+    meta = dict(meta or {})
+    meta['columnar'] = False
+    if HAS_PYARROW and isinstance(df, pd.DataFrame):
+        parquet_path, _ = _cache_paths(source_path, 'parquet')
+        try:
+            os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+            tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+            df.to_parquet(tmp_path)
+            os.replace(tmp_path, parquet_path)
+            meta['columnar'] = True
+        except Exception as e:
+            print(f"Could not write columnar cache for {source_path}: {e}")
+    write_cache_meta(source_path, meta)
+
+
+def _arrow_string_dtype():
+    """Arrow-backed string dtype with NaN missing values and numpy bool results, or None.
+
+    Unlike 'string[pyarrow]', comparisons on it return plain bool arrays, so masks built
+    from string columns behave as they do on object columns.
+    """
+    if not HAS_PYARROW:
+        return None
+    try:
+        return pd.StringDtype('pyarrow_numpy')
+    except (TypeError, ValueError):  # pandas < 2.1
+        return None
+
+
+def _downcast_column(values, arrow_strings):
+    """Returns a more compact equivalent of a column, or the column itself."""
+    dtype = values.dtype
+    if not isinstance(dtype, np.dtype):
+        return values  # already an extension dtype (categorical, nullable, arrow)
+    if dtype.kind in 'iu' and dtype.itemsize > 4:
+        # never below 32 bits, so arithmetic in generated code (col * 1000, sums)
+        # does not overflow where it would not have before
+        narrow = np.dtype(np.int32 if dtype.kind == 'i' else np.uint32)
+        info = np.iinfo(narrow)
+        if len(values) == 0 or (values.min() >= info.min and values.max() <= info.max):
+            return values.astype(narrow)
+        return values
+    if dtype.kind == 'f' and dtype.itemsize > 4:
+        as_float32 = values.to_numpy().astype(np.float32)
+        # only when every value survives the round trip
+        if np.array_equal(as_float32.astype(dtype), values.to_numpy(), equal_nan=True):
+            return pd.Series(as_float32, index=values.index, name=values.name)
+        return values
+    if dtype == object and arrow_strings and pd.api.types.infer_dtype(values, skipna=True) == 'string':
+        string_dtype = _arrow_string_dtype()
+        if string_dtype is not None:
+            return values.astype(string_dtype)
+    return values
+
+
+def compact_table(df, arrow_strings=True):
+    """Shrinks the in-memory footprint of a table without losing information.
+
+    - 64-bit integer columns become 32-bit when their range allows (never narrower)
+    - float64 columns become float32 when every value round-trips exactly
+    - string columns become Arrow-backed strings with NaN semantics (if pyarrow is
+      installed); they are not made categorical, so groupby/value_counts see only
+      observed values
+
+    Returns:
+        (compacted DataFrame, bytes before, bytes after)
+    """
+    before = int(df.memory_usage(deep=True).sum())
+    compacted = df.copy(deep=False)
+    for i in range(compacted.shape[1]):
+        column = compacted.iloc[:, i]
+        new_column = _downcast_column(column, arrow_strings)
+        if new_column is not column:
+            compacted.isetitem(i, new_column)
+    after = int(compacted.memory_usage(deep=True).sum())
+    return compacted, before, after
+
+
+def table_dtypes(df):
+    """{column: dtype name} of a table, for data descriptions of compacted tables."""
+    return {str(name): str(dtype) for name, dtype in df.dtypes.items()}
+
+
+def format_memory_report(memory_report):
+    """Formats {table name: (bytes before, bytes after)} as one line per table plus a total."""
+    lines = []
+    for name, (before, after) in memory_report.items():
+        lines.append(f"{name}: {before / 2**20:.1f} MB -> {after / 2**20:.1f} MB")
+    total_before = sum(before for before, _ in memory_report.values())
+    total_after = sum(after for _, after in memory_report.values())
+    lines.append(f"Total: {total_before / 2**20:.1f} MB -> {total_after / 2**20:.1f} MB")
+    return "\n".join(lines)
+
+
+def _apply_to_loaded(func, loader):
+    return func(loader())
+
+
+class LazyTableDict(MutableMapping):
+    """Dictionary of tables where each entry is loaded on first access.
+
+    Iteration order follows registration order, as with a regular dict. Methods that
+    visit values (``items()``, ``values()``) load every table; use ``loaded_items()``
+    to only visit the tables that are already in memory.
+    """
+
+    def __init__(self, loaders=None):
+        self._names = []
+        self._tables = {}
+        self._loaders = {}
+        for name, loader in (loaders or {}).items():
+            self.set_loader(name, loader)
+
+    def set_loader(self, name, loader):
+        """Registers a zero-argument callable that produces the table for name."""
+        if name not in self._names:
+            self._names.append(name)
+        self._tables.pop(name, None)
+        self._loaders[name] = loader
+
+    def is_loaded(self, name):
+        return name in self._tables
+
+    def loaded_items(self):
+        return [(name, self._tables[name]) for name in self._names if name in self._tables]
+
+    def peek(self, name):
+        """Returns the table for name without keeping it in memory if it is not loaded yet."""
+        if name in self._tables:
+            return self._tables[name]
+        if name not in self._loaders:
+            raise KeyError(name)
+        return self._loaders[name]()
+
+    def transform(self, name, func):
+        """Replaces the table for name by func(table), computed when the entry is next read.
+
+        A table that is not loaded yet stays unloaded.
+        """
+        if name in self._tables:
+            self.set_loader(name, partial(func, self._tables[name]))
+        elif name in self._loaders:
+            self.set_loader(name, partial(_apply_to_loaded, func, self._loaders[name]))
+        else:
+            raise KeyError(name)
+
+    def __getitem__(self, name):
+        if name not in self._tables:
+            if name not in self._loaders:
+                raise KeyError(name)
+            self._tables[name] = self._loaders.pop(name)()
+        return self._tables[name]
+
+    def __setitem__(self, name, value):
+        if name not in self._names:
+            self._names.append(name)
+        self._loaders.pop(name, None)
+        self._tables[name] = value
+
+    def __delitem__(self, name):
+        if name not in self._names:
+            raise KeyError(name)
+        self._names.remove(name)
+        self._tables.pop(name, None)
+        self._loaders.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self._tables or name in self._loaders
+
+    def __iter__(self):
+        return iter(list(self._names))
+
+    def __len__(self):
+        return len(self._names)
+
+    def __repr__(self):
+        loaded = sum(1 for name in self._names if name in self._tables)
+        return f"LazyTableDict({len(self._names)} tables, {loaded} loaded)"
+
+
+class LazyNamespace(dict):
+    """Execution namespace that resolves missing names from a table dictionary.
+
+    Used as the ``globals`` of executed code so that only the tables the code actually
+    references are loaded from a LazyTableDict. Names that are not tables are looked up
+    in ``fallback`` (e.g. a module's globals), which is read but never copied or written.
+    """
+
+    def __init__(self, tables=None, fallback=None):
+        super().__init__()
+        self._tables = tables if tables is not None else {}
+        self._fallback = fallback if fallback is not None else {}
+
+    def __missing__(self, name):
+        if name in self._tables:
+            value = self._tables[name]
+        elif name in self._fallback:
+            value = self._fallback[name]
+        else:
+            raise KeyError(name)
+        self[name] = value
+        return value
+
+
+class PermutationGroup:
+    """Columns of one table that are shuffled together by one row permutation.
+
+    Only the RandomState state that produces the permutation is stored, so a permuted
+    loader costs a few KB per group until its tables are built; the index array is
+    regenerated from the state when needed.
+
+    Args:
+        columns (list): Column names permuted together
+        rng_state (tuple): np.random.RandomState state that generates the permutation
+        n_rows (int): Number of rows of the table
+        align_index (bool): Reproduce ``df[cols].sample(frac=1).reset_index(drop=True)``
+            assigned back to the table (aligned on the index). Otherwise the raw values
+            are shuffled, as ``np.random.permutation(df[col])`` does.
+    """
+
+    def __init__(self, columns, rng_state, n_rows, align_index=True):
+        self.columns = list(columns)
+        self.rng_state = rng_state
+        self.n_rows = n_rows
+        self.align_index = align_index
+
+    @classmethod
+    def from_seed(cls, columns, seed, n_rows, align_index=True):
+        return cls(columns, np.random.RandomState(seed).get_state(), n_rows, align_index)
+
+    def indices(self):
+        rng = np.random.RandomState()
+        rng.set_state(self.rng_state)
+        return rng.permutation(self.n_rows)
+
+
+def permute_table(df, groups):
+    """Builds the permuted version of df described by a list of PermutationGroups.
+
+    The result is a shallow copy: columns outside every group share memory with df.
+    """
+    permuted = df.copy(deep=False)
+    for group in groups:
+        indices = group.indices()
+        if group.align_index:
+            permuted[group.columns] = df[group.columns].iloc[indices].reset_index(drop=True)
+        else:
+            for col in group.columns:
+                permuted[col] = df[col].to_numpy()[indices]
+    return permuted
+
+
+def set_permuted_table(table_dict, name, groups):
+    """Replaces table_dict[name] by a lazily built permutation of its current value.
+
+    groups is a list of PermutationGroups, or a callable building that list from the
+    table, so that a table that is not loaded yet stays unloaded until it is read.
+
+    Returns the LazyTableDict holding the entry (plain dicts are converted).
+    """
+    if not isinstance(table_dict, LazyTableDict):
+        lazy_tables = LazyTableDict()
+        for key, value in table_dict.items():
+            lazy_tables[key] = value
+        table_dict = lazy_tables
+    table_dict.transform(name, partial(_permute_with_groups, groups))
+    return table_dict
+
+
+def _permute_with_groups(groups, df):
+    return permute_table(df, groups(df) if callable(groups) else groups)
+
+
+def _seeded_groups(columns_per_group, seeds, df):
+    """One PermutationGroup per (columns, seed) pair, sized to df."""
+    return [PermutationGroup.from_seed(columns, seed, len(df)) for columns, seed in zip(columns_per_group, seeds)]
+
+
 class ExperimentalDataLoader:
-    def __init__(self, data_path, table_dict_selection='default', data_sampling=-1):
+    def __init__(self, data_path, table_dict_selection='default', data_sampling=-1, use_cache=True,
+                 compact_dtypes=False):
+        """Tables are registered lazily and only unpickled when first accessed.
+
+        Args:
+            data_path (str): Folder containing the bio_database directory
+            table_dict_selection (str): 'default' (3 core tables) or 'all_bio'
+            data_sampling (int): Number of datasets to sample (-1 for all)
+            use_cache (bool): Read/write Parquet sidecars in bio_database/.volta_cache
+            compact_dtypes (bool): Compact each table's dtypes as it is loaded (see compact_table)
+        """
         self.data_path = os.path.join(data_path, 'bio_database')
+        self.use_cache = use_cache
+        self.compact_dtypes = compact_dtypes
+        self.memory_report = {}
         self.available_datasets = [
             "gtex_tissue_gene_tpm",
             "gwas_catalog",
@@ -96,78 +508,273 @@ class ExperimentalDataLoader:
         self.data_desc = self._generate_data_description()
         
     def _load_selected_datasets(self):
-        """Loads only the selected datasets and returns a dictionary."""
-        table_dict = {}
+        """Registers the selected datasets; each one is loaded on first access."""
+        table_dict = LazyTableDict()
         for dataset in self.datasets_to_load:
             df_name = f"df_{dataset}"
-            table_dict[df_name] = self._load_data(f"{dataset}.pkl")
+            table_dict.set_loader(df_name, partial(self._load_data, f"{dataset}.pkl"))
         return table_dict
 
-    def _load_data(self, file_name):
-        """Helper method to load data from a pickle file."""
-        try:
-            return pd.read_pickle(os.path.join(self.data_path, file_name))
-        except FileNotFoundError:
+    def _load_data(self, file_name, columns=None):
+        """Helper method to load data from the columnar cache or the pickle file."""
+        file_path = os.path.join(self.data_path, file_name)
+        if not os.path.exists(file_path):
             print(f"File {file_name} not found in path {self.data_path}")
             return None
+        df = read_columnar_cache(file_path, columns=columns) if self.use_cache else None
+        if df is None:
+            df = pd.read_pickle(file_path)
+            if self.use_cache and isinstance(df, pd.DataFrame) and read_cache_meta(file_path) is None:
+                write_columnar_cache(file_path, df, {'row_desc': self._describe_first_row(df)})
+            if columns is not None:
+                df = df[list(columns)]
+        if self.compact_dtypes and isinstance(df, pd.DataFrame):
+            df, before, after = compact_table(df)
+            if columns is None:
+                self.memory_report[f"df_{os.path.splitext(file_name)[0]}"] = (before, after)
+                meta = read_cache_meta(file_path) if self.use_cache else None
+                if meta is not None and meta.get('compact_dtypes') != table_dtypes(df):
+                    write_cache_meta(file_path, dict(meta, compact_dtypes=table_dtypes(df)))
+        return df
+
+    @staticmethod
+    def _describe_first_row(df):
+        return str(dict(zip(df.columns.values, df.iloc[0].values)))
 
     def _generate_data_description(self):
-        """Generates a description of each dataset's columns and the first row of data."""
+        """Generates a description of each dataset's columns and the first row of data.
+
+        The first-row summary is stored in the cache metadata, so describing the data
+        does not require loading any table once the sidecars exist.
+        """
         desc = ""
-        for name, df in self.table_dict.items():
+        for name in self.table_dict:
+            meta = None
+            if self.use_cache and not self.table_dict.is_loaded(name):
+                dataset_path = os.path.join(self.data_path, f"{name[len('df_'):]}.pkl")
+                if os.path.exists(dataset_path):
+                    meta = read_cache_meta(dataset_path)
+            if meta is not None and 'row_desc' in meta:
+                desc += f"{name}:\n{meta['row_desc']}\n"
+                if self.compact_dtypes and 'compact_dtypes' in meta:
+                    desc += f"Dtypes: {meta['compact_dtypes']}\n"
+                desc += "\n"
+                continue
+            df = self.table_dict[name]
             if df is not None:
-                desc += f"{name}:\n{dict(zip(df.columns.values, df.iloc[0].values))}\n\n"
+                desc += f"{name}:\n{self._describe_first_row(df)}\n"
+                if self.compact_dtypes:
+                    desc += f"Dtypes: {table_dtypes(df)}\n"
+                desc += "\n"
         return desc
 
-    def get_data(self, table_name):
-        """Returns the requested DataFrame."""
-        return self.table_dict.get(table_name, None)
+    def table_profile(self, table_name):
+        """Column profile of a table (see schema_digest.profile_table).
+
+        The profile is kept in the table's cache metadata, so later loaders can build a
+        schema digest without loading the table.
+        """
+        dataset_path = os.path.join(self.data_path, f"{table_name[len('df_'):]}.pkl")
+        meta = read_cache_meta(dataset_path) if self.use_cache and os.path.exists(dataset_path) else None
+        if meta is not None and 'profile' in meta:
+            return meta['profile']
+        df = self.table_dict[table_name]
+        if not isinstance(df, pd.DataFrame):
+            return None
+        profile = profile_table(df)
+        if self.use_cache:
+            meta = read_cache_meta(dataset_path)
+            if meta is not None:
+                write_cache_meta(dataset_path, dict(meta, profile=profile))
+        return profile
+
+    def get_data(self, table_name, columns=None):
+        """Returns the requested DataFrame.
+
+        Args:
+            table_name (str): Name of the table, e.g. 'df_gwas_catalog'
+            columns (list): Optional subset of columns. If the table has not been loaded
+                yet, only these columns are read from the columnar cache.
+        """
+        if table_name not in self.table_dict:
+            return None
+        if columns is not None and not self.table_dict.is_loaded(table_name):
+            return self._load_data(f"{table_name[len('df_'):]}.pkl", columns=columns)
+        df = self.table_dict[table_name]
+        if df is not None and columns is not None:
+            df = df[list(columns)]
+        return df
     
     def load_into_globals(self):
-        """Loads each dataset into the global namespace."""
-        for name, df in self.table_dict.items():
-            if df is not None:
-                globals()[name] = df
+        """Opens a session on this loader's tables in the shared DataRegistry.
+
+        The tables are no longer written into module globals; build execution globals
+        with ``session.namespace()`` and ``close()`` the session when done.
+        """
+        from volta.data_registry import default_registry
+        return default_registry.open(self)
 
     def display_data_description(self):
         """Prints the data description."""
         print(self.data_desc)
 
+    def display_memory_report(self):
+        """Prints memory before/after dtype compaction for the tables loaded so far."""
+        print(format_memory_report(self.memory_report))
+
+    def _table_columns(self, table_name):
+        """Column names of a table, read from its sidecar schema when it is not loaded.
+
+        Returns None if the table does not exist.
+        """
+        if table_name not in self.table_dict:
+            return None
+        if not self.table_dict.is_loaded(table_name) and self.use_cache:
+            dataset_path = os.path.join(self.data_path, f"{table_name[len('df_'):]}.pkl")
+            columns = read_cache_columns(dataset_path) if os.path.exists(dataset_path) else None
+            if columns is not None:
+                return columns
+        df = self.table_dict.peek(table_name)
+        return None if df is None else list(df.columns)
+
     def permute_selected_columns(self, random_seed = 42):
+        """Registers permuted versions of the tables; each is built when first read.
 
+        Only column names are needed up front (from the sidecar schemas), so tables that
+        are never read are never loaded.
+        """
         if self.table_dict_selection == 'default':
             self.random_seed = random_seed
-            """Permutes the specified columns together for each dataset in permute_columns."""
+            # Permutes the specified columns together for each dataset in permute_columns
             for dataset_name, columns_to_permute in self.permute_columns.items():
                 df_name = f"df_{dataset_name}"
-                df = self.table_dict.get(df_name, None)
+                columns = self._table_columns(df_name)
                 
-                if df is not None and all(col in df.columns for col in columns_to_permute):
+                if columns is not None and all(col in columns for col in columns_to_permute):
                     # Set the random seed for reproducibility
                     if self.random_seed is not None:
                         np.random.seed(self.random_seed)
 
-                    # Permute rows of the selected columns together
-                    # Shuffle the DataFrame rows and then reassign the columns
-                    permuted_df = df[columns_to_permute].sample(frac=1, random_state=self.random_seed).reset_index(drop=True)
-                    df[columns_to_permute] = permuted_df
-                    
-                    # Update the table_dict with the permuted DataFrame
-                    self.table_dict[df_name] = df
+                    # Permute rows of the selected columns together, with the permutation
+                    # df[columns].sample(frac=1, random_state=seed) would draw
+                    groups = partial(_seeded_groups, [columns_to_permute], [self.random_seed])
+                    set_permuted_table(self.table_dict, df_name, groups)
                     print(f"Permuted columns {columns_to_permute} in dataset {df_name}")
                 else:
                     print(f"Columns {columns_to_permute} not found in dataset {df_name} or dataset does not exist.")
         elif self.table_dict_selection == 'all_bio':
+            # each column is shuffled independently; the seed advances column by column across tables
             for df_name in self.table_dict:
-                df = self.table_dict[df_name]
-                permuted_df = df.copy()
-                for col in df.columns:
-                    permuted_df[col] = df[col].sample(frac=1, random_state=random_seed).reset_index(drop=True)
+                columns = self._table_columns(df_name)
+                if columns is None:
+                    continue
+                seeds = []
+                for col in columns:
+                    seeds.append(random_seed)
                     random_seed = random_seed * 2 % (2 ** 31)
-                self.table_dict[df_name] = permuted_df
+                groups = partial(_seeded_groups, [[col] for col in columns], seeds)
+                set_permuted_table(self.table_dict, df_name, groups)
+
 
+def _temporal_columns(filepath, delimiter):
+    """Columns Arrow would parse as dates/times, judged from the first block of the file."""
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    reader = pa_csv.open_csv(filepath, parse_options=pa_csv.ParseOptions(delimiter=delimiter))
+    try:
+        return [field.name for field in reader.schema if pa.types.is_temporal(field.type)]
+    finally:
+        reader.close()
 
-def load_file_dynamic(filepath):
+
+def _read_csv_arrow(filepath, delimiter, string_columns):
+    """Multithreaded Arrow CSV read with pandas' default missing-value markers."""
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    from pandas._libs.parsers import STR_NA_VALUES
+    convert_options = pa_csv.ConvertOptions(column_types={col: pa.string() for col in string_columns},
+                                            null_values=list(STR_NA_VALUES), strings_can_be_null=True)
+    table = pa_csv.read_csv(filepath, parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+                            convert_options=convert_options)
+    return _missing_strings_as_nan(table.to_pandas())
+
+
+def _missing_strings_as_nan(df):
+    """Arrow-backed reads leave missing strings as None where the C parser gives NaN."""
+    for i in np.flatnonzero((df.dtypes == object).to_numpy()):
+        column = df.iloc[:, i]
+        if column.isna().any():
+            df.isetitem(i, column.where(column.notna(), np.nan))
+    return df
+
+
+def _differs_from_read_csv(df):
+    """Whether an Arrow-parsed table may differ from what pd.read_csv returns.
+
+    pandas renames empty header fields ('Unnamed: 0', e.g. the index column of a file
+    written with to_csv()) and duplicates ('a.1'), and reads integers beyond int64 as
+    uint64 or objects where Arrow falls back to float64.
+    """
+    names = [str(col) for col in df.columns]
+    if any(not name.strip() for name in names) or len(set(names)) != len(names):
+        return True
+    for i in np.flatnonzero((df.dtypes == np.float64).to_numpy()):
+        values = df.iloc[:, i].to_numpy()
+        values = values[np.isfinite(values)]
+        if len(values) and np.abs(values).max() >= 2 ** 53 and (values == np.round(values)).all():
+            return True
+    return False
+
+
+# Stored in the sidecar metadata of delimited files; sidecars written by another
+# version of read_delimited are parsed again
+DELIMITED_READER_VERSION = 2
+
+
+def read_delimited(filepath, delimiter=',', use_cache=True):
+    """Reads a CSV/TSV like pd.read_csv, using a multithreaded parser and a sidecar cache.
+
+    With pyarrow installed, the file is parsed by Arrow's multithreaded reader. Columns
+    Arrow would turn into dates or timestamps are read as strings instead (the default
+    parser keeps them as strings), and this schema is stored in the sidecar metadata.
+    Floats are correctly rounded, as with float_precision='round_trip', so they can
+    differ from the default parser in the last bit. The parsed table is written as a
+    Parquet sidecar, so later loads of an unchanged file skip parsing. Files Arrow cannot
+    read the same way (mixed-type columns, implicit index, empty or duplicate header
+    names, integers beyond int64, ...) go through pd.read_csv.
+    """
+    meta = read_cache_meta(filepath) if use_cache else None
+    if meta is not None and meta.get('reader') != DELIMITED_READER_VERSION:
+        meta = None
+    if meta is not None:
+        df = read_columnar_cache(filepath)
+        if df is not None:
+            return _missing_strings_as_nan(df)
+
+    df = None
+    string_columns = []
+    if HAS_PYARROW:
+        try:
+            if meta is not None and 'string_columns' in meta:
+                string_columns = meta['string_columns']
+            else:
+                string_columns = _temporal_columns(filepath, delimiter)
+            df = _read_csv_arrow(filepath, delimiter, string_columns)
+            if _differs_from_read_csv(df):
+                df = None
+        except Exception:
+            df = None
+        if df is None:
+            string_columns = []
+    if df is None:
+        df = pd.read_csv(filepath, delimiter=delimiter)
+
+    if use_cache and meta is None:
+        write_columnar_cache(filepath, df, {'string_columns': string_columns, 'reader': DELIMITED_READER_VERSION})
+    return df
+
+
+def load_file_dynamic(filepath, use_cache=True):
     # Read the first few bytes to infer the delimiter
     with open(filepath, 'r') as file:
         first_line = file.readline()
@@ -181,15 +788,27 @@ def load_file_dynamic(filepath):
         raise ValueError("Unknown delimiter. File is neither CSV nor TSV.")
     
     # Load the DataFrame using the detected delimiter
-    df = pd.read_csv(filepath, delimiter=delimiter)
+    df = read_delimited(filepath, delimiter=delimiter, use_cache=use_cache)
     return df
 
 
 class DiscoveryBenchDataLoader:
-    def __init__(self, data_path, metadata):
+    def __init__(self, data_path, metadata, compact_dtypes=False, file_cache=None):
+        """
+        Args:
+            data_path (str): Task directory holding the data files
+            metadata (dict): DiscoveryBench metadata JSON
+            compact_dtypes (bool): Compact table dtypes after loading (see compact_table)
+            file_cache (dict): Optional {file path: DataFrame} shared between loaders of the
+                same task directory, so each file is parsed once; each loader gets its own
+                deep copy, so in-place edits made through one loader never reach another
+        """
         self.data_path = data_path
         self.metadata = metadata    # dictionary/json object
         self.available_datasets = metadata["datasets"]
+        self.compact_dtypes = compact_dtypes
+        self.file_cache = file_cache
+        self.memory_report = {}
         self.table_dict = self._load_datasets()
         self.data_desc = self._generate_data_description()
     
@@ -197,7 +816,19 @@ class DiscoveryBenchDataLoader:
         table_dict = {}
         for entry in self.available_datasets:
             table_path = os.path.join(self.data_path, entry["name"])
-            table_dict[f'df_{entry["name"].split(".")[0]}'] = load_file_dynamic(table_path)
+            df_name = f'df_{entry["name"].split(".")[0]}'
+            if self.file_cache is None:
+                df = load_file_dynamic(table_path)
+            else:
+                if table_path not in self.file_cache:
+                    self.file_cache[table_path] = load_file_dynamic(table_path)
+                # deep copy: in-place value writes (df.loc[...] = ..., fillna(inplace=True))
+                # made through this loader must not reach the cached table or other loaders
+                df = self.file_cache[table_path].copy(deep=True)
+            if self.compact_dtypes:
+                df, before, after = compact_table(df)
+                self.memory_report[df_name] = (before, after)
+            table_dict[df_name] = df
         return table_dict
     
     def _generate_data_description(self):
@@ -212,39 +843,60 @@ class DiscoveryBenchDataLoader:
                 value = df[column['name']].iloc[0]
                 if isinstance(value, np.generic):
                     value = value.item()
+                elif value is pd.NA:
+                    value = None
                 column["example_value"] = value
             desc_entry = {
                 "description": entry["description"],
                 "columns": json.dumps(columns),
             }
+            if self.compact_dtypes:
+                desc_entry["dtypes"] = table_dtypes(df)
             desc[table_name] = desc_entry
         
         return json.dumps(desc, indent=4)
     
     def load_into_globals(self):
-        """Loads each dataset into the global namespace."""
-        for name, df in self.table_dict.items():
-            if df is not None:
-                globals()[name] = df
+        """Opens a session on this loader's tables in the shared DataRegistry.
+
+        The tables are no longer written into module globals; build execution globals
+        with ``session.namespace()`` and ``close()`` the session when done.
+        """
+        from volta.data_registry import default_registry
+        return default_registry.open(self)
     
     def display_data_description(self):
         """Prints the data description."""
         print(self.data_desc)
+
+    def display_memory_report(self):
+        """Prints memory before/after dtype compaction for each table."""
+        print(format_memory_report(self.memory_report))
     
     def permute_selected_columns(self, columns="all", random_seed = 42):
-        # permute all columns
+        # permute all columns, each with the permutation df.apply(np.random.permutation) would draw
         np.random.seed(random_seed)
-        for df_name in self.table_dict:
+        for df_name in list(self.table_dict):
             df = self.table_dict[df_name]
-            self.table_dict[df_name] = df.apply(np.random.permutation)
-        
-        # for df_name in self.table_dict:
-        #     df = self.table_dict[df_name]
-        #     permuted_df = df.copy()
-        #     for col in df.columns:
-        #         permuted_df[col] = df[col].sample(frac=1, random_state=random_seed).reset_index(drop=True)
-        #         random_seed = random_seed * 2 % (2 ** 31)
-        #     self.table_dict[df_name] = permuted_df
+            groups = []
+            for col in df.columns:
+                groups.append(PermutationGroup([col], np.random.get_state(), len(df), align_index=False))
+                np.random.permutation(len(df))  # advance the global stream past this column
+            self.table_dict = set_permuted_table(self.table_dict, df_name, groups)
+
+    def permuted(self, random_seed = 42):
+        """Returns a permuted copy of this loader that shares the original tables.
+
+        Permuted tables are only built when accessed, so keeping both loaders alive
+        costs little more than one.
+        """
+        permuted_loader = copy.copy(self)
+        permuted_loader.table_dict = LazyTableDict()
+        for name, df in self.table_dict.items():
+            permuted_loader.table_dict[name] = df
+        permuted_loader.permute_selected_columns(random_seed=random_seed)
+        return permuted_loader
+
 
 class KnowledgeGraphLoader:
     """Loader and query interface for the VOLTA knowledge graph."""
@@ -406,15 +1058,20 @@ def pretty_print(message, printout = True):
     return title
 
 class CustomDataLoader:
-    def __init__(self, data_folder, random_seed=42):
+    def __init__(self, data_folder, random_seed=42, compact_dtypes=False, use_cache=True):
         """Initialize data loader with path to data folder.
         
         Args:
             data_folder (str): Path to folder containing pickle files
             random_seed (int): Random seed for permutations
+            compact_dtypes (bool): Compact each table's dtypes after loading (see compact_table)
+            use_cache (bool): Keep Parquet sidecars of parsed CSVs in data_folder/.volta_cache
         """
         self.data_path = data_folder
         self.random_seed = random_seed
+        self.use_cache = use_cache
+        self.compact_dtypes = compact_dtypes
+        self.memory_report = {}
         self.table_dict = {}
         self._load_all_datasets()
         self.data_desc = self._generate_data_description()
@@ -434,7 +1091,12 @@ class CustomDataLoader:
             if file_path.endswith('.pkl'):
                 self.table_dict[df_name] = self._load_data(file_name)
             elif file_path.endswith('.csv'):
-                self.table_dict[df_name] = pd.read_csv(file_path)
+                self.table_dict[df_name] = read_delimited(file_path, use_cache=self.use_cache)
+
+            if self.compact_dtypes and self.table_dict[df_name] is not None:
+                df, before, after = compact_table(self.table_dict[df_name])
+                self.table_dict[df_name] = df
+                self.memory_report[df_name] = (before, after)
 
     def _load_data(self, file_name):
         """Helper method to load data from a pickle file."""
@@ -453,6 +1115,8 @@ class CustomDataLoader:
         for name, df in self.table_dict.items():
             if df is not None:
                 desc += f"{name}:\nColumns: {df.columns.tolist()}\n"
+                if self.compact_dtypes:
+                    desc += f"Dtypes: {table_dtypes(df)}\n"
                 desc += f"Sample row: {dict(zip(df.columns, df.iloc[0]))}\n\n"
         return desc
 
@@ -461,15 +1125,22 @@ class CustomDataLoader:
         return self.table_dict.get(table_name, None)
 
     def load_into_globals(self):
-        """Loads each dataset into the global namespace."""
-        for name, df in self.table_dict.items():
-            if df is not None:
-                globals()[name] = df
+        """Opens a session on this loader's tables in the shared DataRegistry.
+
+        The tables are no longer written into module globals; build execution globals
+        with ``session.namespace()`` and ``close()`` the session when done.
+        """
+        from volta.data_registry import default_registry
+        return default_registry.open(self)
 
     def display_data_description(self):
         """Prints the data description."""
         print(self.data_desc)
 
+    def display_memory_report(self):
+        """Prints memory before/after dtype compaction for each table."""
+        print(format_memory_report(self.memory_report))
+
     def permute_columns(self, dataset_name, columns_to_permute):
         """Permutes specified columns in a dataset.
         
@@ -486,7 +1157,7 @@ class CustomDataLoader:
         if not all(col in df.columns for col in columns_to_permute):
             raise ValueError(f"Not all columns {columns_to_permute} found in {df_name}")
             
+        # same permutation as df[columns].sample(frac=1) right after seeding the global RNG
         np.random.seed(self.random_seed)
-        permuted_df = df[columns_to_permute].sample(frac=1).reset_index(drop=True)
-        df[columns_to_permute] = permuted_df
-        self.table_dict[df_name] = df
\ No newline at end of file
+        group = PermutationGroup(columns_to_permute, np.random.get_state(), len(df))
+        self.table_dict = set_permuted_table(self.table_dict, df_name, [group])
\ No newline at end of file
@@ -1,5 +1,6 @@
 from volta.utils import ExperimentalDataLoader, CustomDataLoader, DiscoveryBenchDataLoader
 from volta.agent import SequentialFalsificationTest
+from volta.output_capture import DEFAULT_OUTPUT_LIMIT
 from typing import Optional, Dict, Any
 import os
 import requests
@@ -13,11 +14,13 @@ import shutil
 class Volta:
     """Wrapper class for hypothesis validation using sequential falsification testing."""
     
-    def __init__(self, llm: str = "claude-3-5-sonnet-20240620", is_locally_served = False, server_port = None, api_key = "EMPTY", **kwargs):
+    def __init__(self, llm: str = "claude-3-5-sonnet-20240620", is_locally_served = False, server_port = None, api_key = "EMPTY", llm_cache = None, **kwargs):
         """Initialize Volta.
         
         Args:
             llm (str): Name of the LLM model to use
+            llm_cache: Answer repeated model calls from disk: True (default file under
+                ~/.cache/volta), a path to an SQLite file, or an LLMCache
             **kwargs: Additional arguments to pass to SequentialFalsificationTest
         """
         self.llm = llm
@@ -26,9 +29,11 @@ class Volta:
         self.is_local = is_locally_served
         self.port = server_port
         self.api_key = api_key
+        self.llm_cache = llm_cache
         self.kwargs = kwargs
 
-    def register_data(self, data_path: str, data_sampling: int = -1, loader_type: str = 'bio', metadata: Optional[Dict] = None):
+    def register_data(self, data_path: str, data_sampling: int = -1, loader_type: str = 'bio', metadata: Optional[Dict] = None,
+                      compact_dtypes: bool = False):
         """Register data for hypothesis testing.
         
         Args:
@@ -36,6 +41,8 @@ class Volta:
             data_sampling (int): Number of datasets to sample (-1 for all)
             loader_type (str): Type of data loader to use ('bio', 'custom', or 'discovery_bench')
             metadata (Optional[Dict]): Metadata required for DiscoveryBenchDataLoader
+            compact_dtypes (bool): Compact table dtypes (32-bit numerics, Arrow strings)
+                to reduce memory; the loader's memory_report holds before/after sizes
         """            
         if not os.path.exists(data_path):
             os.makedirs(data_path)
@@ -51,23 +58,28 @@ class Volta:
             self.data_loader = ExperimentalDataLoader(
                 data_path=data_path,
                 table_dict_selection='all_bio',
-                data_sampling=data_sampling
+                data_sampling=data_sampling,
+                compact_dtypes=compact_dtypes
             )
         elif loader_type == 'bio_selected':
             self.data_loader = ExperimentalDataLoader(
                 data_path=data_path,
                 table_dict_selection='default',
-                data_sampling=data_sampling
+                data_sampling=data_sampling,
+                compact_dtypes=compact_dtypes
             )
         elif loader_type == 'custom':
-            self.data_loader = CustomDataLoader(data_folder=data_path)
+            self.data_loader = CustomDataLoader(data_folder=data_path, compact_dtypes=compact_dtypes)
         elif loader_type == 'discovery_bench':
             if metadata is None:
                 raise ValueError("Metadata must be provided for DiscoveryBenchDataLoader")
-            self.data_loader = DiscoveryBenchDataLoader(data_path=data_path, metadata=metadata)
+            self.data_loader = DiscoveryBenchDataLoader(data_path=data_path, metadata=metadata, compact_dtypes=compact_dtypes)
         else:
             raise ValueError(f"Unknown loader_type: {loader_type}")
 
+        if compact_dtypes and self.data_loader.memory_report:
+            self.data_loader.display_memory_report()
+
 
     def configure(self,
                  alpha: float = 0.1,
@@ -80,7 +92,14 @@ class Volta:
                  use_reference_agent: bool = False,
                  kg_path: str = None,
                  use_hitl: bool = False,
-                 hitl_callback = None):
+                 hitl_callback = None,
+                 schema_token_budget: Optional[int] = None,
+                 executor_workers: int = 1,
+                 execution_cache=None,
+                 memory_limit: Optional[int] = None,
+                 cpu_limit: Optional[float] = None,
+                 output_limit: Optional[int] = DEFAULT_OUTPUT_LIMIT,
+                 perf_lint: bool = True):
         """Configure the sequential falsification test parameters.
 
         Args:
@@ -95,6 +114,19 @@ class Volta:
             kg_path (str): Path to knowledge graph JSON file
             use_hitl (bool): Whether to enable human-in-the-loop checkpoints
             hitl_callback: Callback function for HITL decisions
+            schema_token_budget (Optional[int]): If set, agents see a schema digest of about this many
+                tokens, ranked by relevance to the hypothesis, instead of the full data description
+            executor_workers (int): Pre-forked processes that run the coding agent's code
+                (0 starts a new process per attempt)
+            execution_cache: Reuse the output of identical code over identical tables: True
+                (in memory), a path to a persistent SQLite cache, or an ExecutionCache
+            memory_limit (Optional[int]): MB a single execution may allocate before it fails
+                with a MemoryError (Linux only)
+            cpu_limit (Optional[float]): CPU seconds a single execution may use before it is killed
+            output_limit (Optional[int]): Bytes of printed output an execution returns to the agent;
+                the middle of longer output is elided and the full text written to a temporary file
+            perf_lint (bool): Estimate the run time of generated code from the table sizes and send
+                code that would exceed time_limit back to the model before running it
         """
         if self.data_loader is None:
             raise ValueError("Please register data first using register_data()")
@@ -102,7 +134,9 @@ class Volta:
         self.use_reference_agent = use_reference_agent
         self.use_hitl = use_hitl
 
-        self.agent = SequentialFalsificationTest(llm=self.llm, is_local=self.is_local, port=self.port, api_key=self.api_key)
+        if self.agent is not None:
+            self.agent.close()
+        self.agent = SequentialFalsificationTest(llm=self.llm, is_local=self.is_local, port=self.port, api_key=self.api_key, llm_cache=self.llm_cache)
         self.agent.configure(
             data=self.data_loader,
             alpha=alpha,
@@ -116,6 +150,13 @@ class Volta:
             kg_path=kg_path,
             use_hitl=use_hitl,
             hitl_callback=hitl_callback,
+            schema_token_budget=schema_token_budget,
+            executor_workers=executor_workers,
+            execution_cache=execution_cache,
+            memory_limit=memory_limit,
+            cpu_limit=cpu_limit,
+            output_limit=output_limit,
+            perf_lint=perf_lint,
             **self.kwargs
         )
 
@@ -126,7 +167,8 @@ class Volta:
             hypothesis (str): The scientific hypothesis to test
             
         Returns:
-            Dict containing the test results including logs, final message, and parsed results
+            Dict containing the test results including logs, final message, parsed results
+            and the model usage
         """
         if self.agent is None:
             raise ValueError("Please configure the agent first using configure()")
@@ -136,7 +178,33 @@ class Volta:
         return {
             "log": log,
             "last_message": last_message,
-            "parsed_result": parsed_result
+            "parsed_result": parsed_result,
+            # tokens, latency and cost of the model calls, in total, by role and by model
+            "llm_usage": log.get('llm_usage')
+        }
+
+    async def avalidate(self, hypothesis: str) -> Dict[str, Any]:
+        """validate() as a coroutine; several hypotheses can be awaited together, each
+        on its own Volta instance.
+
+        Args:
+            hypothesis (str): The scientific hypothesis to test
+
+        Returns:
+            Dict containing the test results including logs, final message, parsed results
+            and the model usage
+        """
+        if self.agent is None:
+            raise ValueError("Please configure the agent first using configure()")
+
+        log, last_message, parsed_result = await self.agent.ago(hypothesis)
+
+        return {
+            "log": log,
+            "last_message": last_message,
+            "parsed_result": parsed_result,
+            # tokens, latency and cost of the model calls, in total, by role and by model
+            "llm_usage": log.get('llm_usage')
         }
 
     def _setup_default_agent(self, use_reference_agent=False, use_hitl=False):
@@ -186,7 +254,7 @@ class Volta:
             prev_log = copy.deepcopy(self.agent.log)  # Store initial log state
 
             # Run the agent asynchronously
-            task = asyncio.create_task(asyncio.to_thread(self.agent.go, prompt))
+            task = asyncio.create_task(self.agent.ago(prompt))
 
             while not task.done():  # Check while the agent is still running
                 await asyncio.sleep(1)  # Wait for 1 second